@@ -1,35 +1,77 @@
 import os
 import sys
-import pymongo
-import certifi
+import time
+import argparse
 import pandas as pd
 from dotenv import load_dotenv
+from pydantic import BaseModel, Field
+from typing import Annotated, Dict, List, Optional
+from dataclasses import asdict
+from contextlib import asynccontextmanager
 from uvicorn import run as app_run
 from src.logging.logger import logging
-from fastapi.responses import Response
+from fastapi.responses import StreamingResponse
 from fastapi.responses import RedirectResponse
+from fastapi.responses import PlainTextResponse
 from fastapi.templating import Jinja2Templates
-from src.utils.main_utils.utils import load_object
+from src.serving.streaming import stream_predictions
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi import FastAPI, File, UploadFile, Request
-from src.constants import DATA_INGESTION_DATABASE_NAME
-from src.constants import DATA_INGESTION_COLLECTION_NAME
-from src.utils.ml_utils.model.estimator import NetworkModel
-from src.pipeline.training_pipeline import TrainingPipeline
+from fastapi import FastAPI, File, UploadFile, Request, HTTPException, Query
+from src.constants import (
+    PREDICTION_COLUMN_NAME,
+    PREDICTION_STREAM_CHUNK_SIZE,
+    PREDICTION_STREAM_MAX_CHUNK_SIZE,
+    PREDICTION_STREAM_FORMATS,
+    PREDICTION_PREVIEW_ROWS,
+    MODEL_SERVING_HOST,
+    MODEL_SERVING_PORT,
+    MODEL_SERVING_WORKERS,
+    PREDICTION_CACHE_ENABLED,
+    DATA_VALIDATION_DRIFT_THRESHOLD,
+    DATA_VALIDATION_PSI_THRESHOLD
+)
+from src.serving.model_registry import ModelRegistry
+from src.serving.micro_batcher import MicroBatcher, get_feature_columns, records_to_matrix
+from src.serving.prediction_cache import PredictionCache, CachedNetworkModel
+from src.serving.output_sink import PredictionOutputSink
+from src.pipeline.training_job import TrainingJobManager
 from src.exception.exception import NetworkSecurityException
+from src.utils.ml_utils.metric.drift_metric import detect_drift_from_reference
+from src.utils.main_utils.instrumentation import metrics_registry, timer
 
 
-ca=certifi.where()
+# MongoDB is only read by the training pipeline, which connects from its own worker process
 load_dotenv()
 
-MONGO_DB_URL=os.getenv('MONGO_DB_URL')
-print(MONGO_DB_URL)
+# Built once per worker process: with --workers N the prediction cache, micro-batcher, output sink
+# and /metrics counters are per worker, only the training jobs are shared through TRAINING_JOB_STORE_DIR
+model_registry=ModelRegistry()
+training_job_manager=TrainingJobManager(on_success=model_registry.refresh)
+prediction_cache=PredictionCache() if PREDICTION_CACHE_ENABLED else None
+micro_batcher=MicroBatcher(model_registry, prediction_cache=prediction_cache)
+prediction_output_sink=PredictionOutputSink()
+
+def get_predictor(served_model):
+    """
+        Model used by the prediction routes, wrapped by the prediction cache when it is enabled
+    """
+    if prediction_cache is None:
+        return served_model.network_model
+    return CachedNetworkModel(served_model.network_model, served_model.version, prediction_cache)
 
-mongo_client=pymongo.MongoClient(MONGO_DB_URL, tlsCAfile=ca)
-database=mongo_client[DATA_INGESTION_DATABASE_NAME]
-collection=mongo_client[DATA_INGESTION_COLLECTION_NAME]
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the model once at startup and keep it resident for every request
+    model_registry.start()
+    prediction_output_sink.start()
+    await micro_batcher.start()
+    yield
+    await micro_batcher.stop()
+    prediction_output_sink.stop()
+    training_job_manager.stop()
+    model_registry.stop()
 
-app=FastAPI()
+app=FastAPI(lifespan=lifespan)
 origins=["*"]
 
 app.add_middleware(
@@ -42,40 +84,177 @@ app.add_middleware(
 
 templates=Jinja2Templates(directory="./templates")
 
+@app.middleware("http")
+async def request_timer_middleware(request: Request, call_next):
+    if not metrics_registry.enabled:
+        return await call_next(request)
+    start_time=time.perf_counter()
+    response=await call_next(request)
+    # Route template rather than the raw path keeps job ids out of the labels.
+    # Streaming responses are timed to their first byte
+    route=request.scope.get("route")
+    metrics_registry.observe("request", time.perf_counter()-start_time,
+                             route=getattr(route, "path", "unmatched"), method=request.method,
+                             status=response.status_code)
+    return response
+
 @app.get("/", tags=['authentication'])
 async def index():
     return RedirectResponse(url="/docs") 
 
-@app.get("/train")
-async def train_route():
+@app.get("/train", status_code=202)
+async def train_route(force: bool = False):
+    try:
+        # Training runs in a separate process, poll /train/jobs/{job_id} for progress
+        job=training_job_manager.submit(force=force)
+        return {"job_id": job.job_id, "status": job.status}
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+@app.get("/train/jobs")
+async def train_jobs_route():
     try:
-        train_pipeline=TrainingPipeline()
-        train_pipeline.run_pipeline()
-        return Response("Training is successful")
+        return [asdict(job) for job in training_job_manager.list_jobs()]
     except Exception as e:
         raise NetworkSecurityException(e, sys)
+
+@app.get("/train/jobs/{job_id}")
+async def train_job_route(job_id: str):
+    job=training_job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown training job: {job_id}")
+    return asdict(job)
     
 @app.post("/predict")
 async def predict_route(request: Request,file: UploadFile = File(...)):
     try:
-        df=pd.read_csv(file.file)
-        #print(df)
-        preprocesor=load_object("best_model/preprocessor.pkl")
-        final_model=load_object("best_model/model.pkl")
-        network_model = NetworkModel(preprocessor=preprocesor,model=final_model)
-        print(df.iloc[0])
-        y_pred = network_model.predict(df)
-        print(y_pred)
-        df['predicted_column'] = y_pred
-        print(df['predicted_column'])
+        with timer("csv_parse", route="/predict"):
+            df=pd.read_csv(file.file)
+        served_model=model_registry.get()
+        logging.info(f"Serving prediction with model version {served_model.version}")
+        with timer("predict", route="/predict"):
+            y_pred = get_predictor(served_model).predict(df)
+        df[PREDICTION_COLUMN_NAME] = y_pred
         #df['predicted_column'].replace(-1, 0)
         #return df.to_json()
-        df.to_csv('prediction_output/output.csv')
-        table_html = df.to_html(classes='table table-striped')
-        #print(table_html)
-        return templates.TemplateResponse("table.html", {"request": request, "table": table_html})
+        # Written by the output sink in the background, each request gets its own file
+        prediction_id=prediction_output_sink.new_prediction_id()
+        await prediction_output_sink.submit(df, prediction_id)
+        headers={"X-Model-Version": served_model.version, "X-Prediction-Id": prediction_id}
+        if served_model.drift_reference is not None:
+            with timer("drift_check", route="/predict"):
+                drift_status, drift_report=detect_drift_from_reference(served_model.drift_reference, df,
+                                                                       threshold=DATA_VALIDATION_DRIFT_THRESHOLD,
+                                                                       psi_threshold=DATA_VALIDATION_PSI_THRESHOLD)
+            drifted_columns=[column for column, column_report in drift_report.items() if column_report["drift_status"]]
+            if drifted_columns:
+                logging.info(f"Data drift detected in prediction batch for columns: {drifted_columns}")
+            headers["X-Data-Drift"]=str(not drift_status).lower()
+        # Large uploads should go through /predict/stream, the HTML table is only a preview
+        with timer("render_html", route="/predict"):
+            table_html = df.head(PREDICTION_PREVIEW_ROWS).to_html(classes='table table-striped')
+            return templates.TemplateResponse(request, "table.html", {"table": table_html}, headers=headers)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+@app.post("/predict/stream")
+async def predict_stream_route(file: UploadFile = File(...),
+                               output_format: str = "csv",
+                               chunk_size: int = Query(PREDICTION_STREAM_CHUNK_SIZE, ge=1, le=PREDICTION_STREAM_MAX_CHUNK_SIZE)):
+    try:
+        if output_format not in PREDICTION_STREAM_FORMATS:
+            raise Exception(f"Unsupported output format: {output_format}, expected one of {PREDICTION_STREAM_FORMATS}")
+        served_model=model_registry.get()
+        logging.info(f"Streaming prediction with model version {served_model.version}")
+        media_type="application/x-ndjson" if output_format=="ndjson" else "text/csv"
+        return StreamingResponse(
+            stream_predictions(file.file, get_predictor(served_model), chunk_size, output_format),
+            media_type=media_type,
+            headers={"X-Model-Version": served_model.version}
+        )
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+class PredictRecordsRequest(BaseModel):
+    # Each record must hold at least one feature, an empty list or record is rejected with a 422
+    records: List[Annotated[Dict[str, Optional[float]], Field(min_length=1)]]=Field(min_length=1)
+
+@app.post("/predict/records")
+async def predict_records_route(request: PredictRecordsRequest):
+    try:
+        served_model=model_registry.get()
+        columns=get_feature_columns(served_model.network_model)
+        missing_columns=sorted({column for record in request.records for column in columns if column not in record})
+        if missing_columns:
+            raise HTTPException(status_code=422, detail=f"Records are missing features: {missing_columns}")
+        # Concurrent requests are scored together, see PREDICTION_MICRO_BATCH_* for the batching knobs
+        predictions, version=await micro_batcher.predict(records_to_matrix(request.records, columns), columns)
+        return {"predictions": predictions, "model_version": version}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+@app.get("/model")
+async def model_route():
+    try:
+        served_model=model_registry.get()
+        return {
+            "version": served_model.version,
+            "loaded_at": served_model.loaded_at.isoformat(),
+            "load_duration_seconds": served_model.load_duration,
+            "model_dir": model_registry.model_dir
+        }
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+@app.get("/predict/cache")
+async def prediction_cache_route():
+    if prediction_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **prediction_cache.stats()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_route():
+    """
+        Prometheus text format: operation duration histograms plus the serving counters
+    """
+    try:
+        extra_metrics=[
+            ("micro_batches_total", "counter", "Micro-batches scored", micro_batcher.batches_processed, None),
+            ("micro_batch_rows_total", "counter", "Rows scored through micro-batches", micro_batcher.rows_processed, None),
+        ]
+        sink_stats=prediction_output_sink.stats()
+        extra_metrics+=[
+            ("prediction_outputs_written_total", "counter", "Prediction output files written", sink_stats["written"], None),
+            ("prediction_outputs_failed_total", "counter", "Prediction output files that failed to write", sink_stats["failed"], None),
+            ("prediction_outputs_pending", "gauge", "Prediction outputs waiting to be written", sink_stats["pending"], None),
+            ("prediction_outputs_pruned_total", "counter", "Prediction output files deleted by the retention limit", sink_stats["pruned"], None),
+        ]
+        if prediction_cache is not None:
+            cache_stats=prediction_cache.stats()
+            extra_metrics+=[
+                ("prediction_cache_hits_total", "counter", "Prediction cache hits", cache_stats["hits"], None),
+                ("prediction_cache_misses_total", "counter", "Prediction cache misses", cache_stats["misses"], None),
+                ("prediction_cache_evictions_total", "counter", "Prediction cache evictions", cache_stats["evictions"], None),
+                ("prediction_cache_entries", "gauge", "Rows held in the prediction cache", cache_stats["size"], None),
+            ]
+        served_model=model_registry.get()
+        extra_metrics.append(("model_info", "gauge", "Version of the served model", 1, {"version": served_model.version}))
+        # Every worker answers with its own counters, the pid tells the scraped workers apart
+        extra_metrics.append(("worker_info", "gauge", "Worker process that served this scrape", 1, {"pid": str(os.getpid())}))
+        return PlainTextResponse(metrics_registry.render_prometheus(extra_metrics),
+                                 media_type="text/plain; version=0.0.4")
     except Exception as e:
         raise NetworkSecurityException(e, sys)
     
 if __name__=="__main__":
-    app_run(app, host="0.0.0.0", port=8080)
\ No newline at end of file
+    parser=argparse.ArgumentParser(description="Serve the network security model")
+    parser.add_argument("--host", default=MODEL_SERVING_HOST)
+    parser.add_argument("--port", type=int, default=MODEL_SERVING_PORT)
+    parser.add_argument("--workers", type=int, default=MODEL_SERVING_WORKERS,
+                        help="worker processes, each maps the same best_model/network_model.joblib read-only "
+                             "and keeps its own prediction cache and /metrics counters")
+    args=parser.parse_args()
+    # Workers are started from the import string so every process builds its own app
+    app_run("app:app", host=args.host, port=args.port, workers=args.workers)
\ No newline at end of file
@@ -0,0 +1,98 @@
+"""
+Fit and predict time of the histogram boosting candidate against the existing ensembles
+
+    python -m benchmarks.boosting_benchmark --rows 10k 100k
+    python -m benchmarks.boosting_benchmark --rows 10k --search --n-jobs 1
+
+Every ensemble from ModelTrainer.get_search_space is fitted once with the
+configuration in BENCHMARK_PARAMS, on 80% of a synthetic copy of the data, and
+scored with F1 on the other 20%, so the timings are read at comparable F1.
+predict is one call on the whole test split, row_ms the median latency of a
+single-row predict. With --search the full grid of every model also goes
+through evaluate_models, the way ModelTrainer.train_model runs it
+"""
+import time
+import argparse
+import statistics
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import f1_score
+from src.constants import TARGET_COLUMN
+from src.components.model_trainer import ModelTrainer
+from src.utils.ml_utils.model.model_search import evaluate_models
+from benchmarks.synthetic_data import generate_synthetic_data, parse_rows
+
+# The largest configuration of each grid, Hist Gradient Boosting stops early on its own
+BENCHMARK_PARAMS={
+    "Random Forest": {"n_estimators": 128, "verbose": 0},
+    "Gradient Boosting": {"n_estimators": 256, "learning_rate": .1, "subsample": 0.85, "verbose": 0},
+    "AdaBoost": {"n_estimators": 256, "learning_rate": .1},
+    "Hist Gradient Boosting": {"model__learning_rate": .1, "model__max_leaf_nodes": 31},
+}
+SINGLE_ROW_PREDICTS=100
+
+def split_data(n_rows: int):
+    dataframe=generate_synthetic_data(n_rows)
+    x=dataframe.drop(columns=[TARGET_COLUMN]).to_numpy(dtype=np.float64)
+    y=dataframe[TARGET_COLUMN].replace(-1, 0).to_numpy()
+    n_train=int(n_rows*0.8)
+    return x[:n_train], y[:n_train], x[n_train:], y[n_train:]
+
+def time_candidates(x_train, y_train, x_test, y_test) -> dict:
+    models, _=ModelTrainer(None, None).get_search_space()
+    results={}
+    for model_name, params in BENCHMARK_PARAMS.items():
+        model=clone(models[model_name]).set_params(**params)
+        start_time=time.perf_counter()
+        model.fit(x_train, y_train)
+        fit_seconds=time.perf_counter()-start_time
+
+        start_time=time.perf_counter()
+        y_pred=model.predict(x_test)
+        predict_seconds=time.perf_counter()-start_time
+
+        row_timings=[]
+        for i in range(min(SINGLE_ROW_PREDICTS, len(x_test))):
+            start_time=time.perf_counter()
+            model.predict(x_test[i:i+1])
+            row_timings.append(time.perf_counter()-start_time)
+        results[model_name]={
+            "fit_seconds": fit_seconds,
+            "predict_seconds": predict_seconds,
+            "row_ms": statistics.median(row_timings)*1000,
+            "f1": f1_score(y_test, y_pred)
+        }
+    return results
+
+def time_search(x_train, y_train, x_test, y_test, n_jobs: int) -> dict:
+    models, params=ModelTrainer(None, None).get_search_space()
+    results={}
+    for model_name in BENCHMARK_PARAMS:
+        start_time=time.perf_counter()
+        report=evaluate_models(x_train, y_train, x_test, y_test, {model_name: models[model_name]},
+                               {model_name: params[model_name]}, n_jobs=n_jobs)
+        results[model_name]={
+            "search_seconds": time.perf_counter()-start_time,
+            "grid_points": len(report[model_name]["jobs"])//3,
+            "test_score": report[model_name]["test_score"]
+        }
+    return results
+
+if __name__=="__main__":
+    parser=argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=parse_rows, nargs="+", default=[parse_rows("10k"), parse_rows("100k")])
+    parser.add_argument("--search", action="store_true", help="also time the full grid search of every model")
+    parser.add_argument("--n-jobs", type=int, default=1)
+    args=parser.parse_args()
+
+    for n_rows in args.rows:
+        x_train, y_train, x_test, y_test=split_data(n_rows)
+        print(f"\n{n_rows} rows\n{'model':<26}{'fit s':>10}{'predict s':>12}{'row ms':>10}{'f1':>8}")
+        for model_name, result in time_candidates(x_train, y_train, x_test, y_test).items():
+            print(f"{model_name:<26}{result['fit_seconds']:>10.2f}{result['predict_seconds']:>12.3f}"
+                  f"{result['row_ms']:>10.2f}{result['f1']:>8.4f}", flush=True)
+        if args.search:
+            print(f"\n{'model':<26}{'grid points':>12}{'search s':>10}{'test r2':>9}")
+            for model_name, result in time_search(x_train, y_train, x_test, y_test, args.n_jobs).items():
+                print(f"{model_name:<26}{result['grid_points']:>12}{result['search_seconds']:>10.1f}"
+                      f"{result['test_score']:>9.3f}", flush=True)
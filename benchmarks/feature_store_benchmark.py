@@ -0,0 +1,86 @@
+"""
+End-to-end time and disk footprint of the pipeline artifacts per ARTIFACT_FILE_FORMAT
+
+    python -m benchmarks.feature_store_benchmark --scale 20
+
+Runs the feature store export and split of DataIngestion, DataValidation and
+DataTransformation on data/phisingData.csv repeated --scale times. Mongo is not involved
+"""
+import os
+import time
+import argparse
+import tempfile
+import importlib.util
+import pandas as pd
+from datetime import datetime
+from src import constants
+from src.entity.artifact_entity import DataIngestionArtifact
+from src.components.data_ingestion import DataIngestion
+from src.components.data_validation import DataValidation
+from src.components.data_transformation import DataTransformation
+from src.entity.config_entity import (
+    TrainingPipelineConfig,
+    DataIngestionConfig,
+    DataValidationConfig,
+    DataTransformationConfig
+)
+
+DATA_FILE_PATH="data/phisingData.csv"
+
+def directory_size(dir_path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, file_name))
+        for root, _, file_names in os.walk(dir_path) for file_name in file_names
+    )
+
+def run_format(file_format: str, dataframe: pd.DataFrame, artifact_dir: str) -> dict:
+    constants.ARTIFACT_FILE_FORMAT=file_format
+    training_pipeline_config=TrainingPipelineConfig(datetime.now())
+    training_pipeline_config.artifact_dir=os.path.join(artifact_dir, file_format)
+    timings={}
+
+    start_time=time.perf_counter()
+    data_ingestion_config=DataIngestionConfig(training_pipeline_config)
+    data_ingestion=DataIngestion(data_ingestion_config)
+    data_ingestion.export_data_into_feature_store(dataframe)
+    data_ingestion.split_data_into_train_test(dataframe)
+    data_ingestion_artifact=DataIngestionArtifact(trained_file_path=data_ingestion_config.training_file_path,
+                                                  test_file_path=data_ingestion_config.testing_file_path)
+    timings["ingestion"]=time.perf_counter()-start_time
+
+    start_time=time.perf_counter()
+    data_validation=DataValidation(data_ingestion_artifact, DataValidationConfig(training_pipeline_config))
+    data_validation_artifact=data_validation.initiate_data_validation()
+    timings["validation"]=time.perf_counter()-start_time
+
+    start_time=time.perf_counter()
+    data_transformation=DataTransformation(data_validation_artifact, DataTransformationConfig(training_pipeline_config))
+    data_transformation.initiate_data_transformation()
+    timings["transformation"]=time.perf_counter()-start_time
+
+    timings["total"]=sum(timings.values())
+    timings["ingestion_bytes"]=directory_size(data_ingestion_config.data_ingestion_dir)
+    timings["validation_bytes"]=directory_size(os.path.join(training_pipeline_config.artifact_dir,
+                                                            constants.DATA_VALIDATION_DIR_NAME,
+                                                            constants.DATA_VALIDATION_VALID_DIR))
+    return timings
+
+if __name__=="__main__":
+    parser=argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=20)
+    parser.add_argument("--formats", nargs="+", default=constants.ARTIFACT_FILE_FORMATS)
+    args=parser.parse_args()
+
+    dataframe=pd.concat([pd.read_csv(DATA_FILE_PATH)]*args.scale, ignore_index=True)
+    formats=args.formats
+    if "parquet" in formats and importlib.util.find_spec("pyarrow") is None and importlib.util.find_spec("fastparquet") is None:
+        print("parquet skipped, pyarrow is not installed")
+        formats=[file_format for file_format in formats if file_format!="parquet"]
+
+    print(f"rows: {len(dataframe)}")
+    print(f"{'format':<10}{'ingestion s':>13}{'validation s':>14}{'transform s':>13}{'total s':>10}{'ingested MB':>13}{'validated MB':>14}")
+    with tempfile.TemporaryDirectory() as artifact_dir:
+        for file_format in formats:
+            result=run_format(file_format, dataframe, artifact_dir)
+            print(f"{file_format:<10}{result['ingestion']:>13.2f}{result['validation']:>14.2f}{result['transformation']:>13.2f}"
+                  f"{result['total']:>10.2f}{result['ingestion_bytes']/2**20:>13.2f}{result['validation_bytes']/2**20:>14.2f}")
@@ -0,0 +1,100 @@
+"""
+Cold start of the serving app, measured with python -X importtime
+
+    python -m benchmarks.import_time_benchmark
+    python -m benchmarks.import_time_benchmark --update-baseline
+
+Imports app in a fresh interpreter several times and takes the median cumulative
+import time. Exits with status 1 when a training-only module is pulled in by the
+import or when the median is more than --tolerance times the recorded baseline,
+so it can run as a regression check next to the other benchmarks. The forbidden
+module check also runs with the tests, in tests/test_import_time.py
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+BASELINE_FILE_PATH=os.path.join(os.path.dirname(__file__), "import_time_baseline.json")
+
+# Modules the serving path must not import, they are only needed by /train
+FORBIDDEN_MODULES=[
+    "mlflow",
+    "dagshub",
+    "pymongo",
+    "scipy.stats",
+    "sklearn.ensemble",
+    "sklearn.model_selection",
+    "src.pipeline.training_pipeline",
+    "src.components.model_trainer",
+]
+
+def parse_importtime(stderr: str) -> dict:
+    """
+        Cumulative microseconds per module from the -X importtime report
+    """
+    cumulative={}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative_us, module=line[len("import time:"):].split("|")
+        if cumulative_us.strip().isdigit():
+            cumulative[module.strip()]=int(cumulative_us)
+    return cumulative
+
+def measure(module: str) -> dict:
+    result=subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"})
+    if result.returncode!=0:
+        raise Exception(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+def run(module: str, repeats: int, tolerance: float, update_baseline: bool) -> int:
+    # First run warms the bytecode and OS file caches
+    measure(module)
+    runs=[measure(module) for _ in range(repeats)]
+    seconds=statistics.median(report[module] for report in runs)/1e6
+
+    top=sorted(runs[-1].items(), key=lambda item: item[1], reverse=True)
+    top_level=[(name, us) for name, us in top if "." not in name and name!=module][:10]
+    print(f"import {module}: {seconds:.3f} s (median of {repeats})")
+    print(f"\n{'top-level package':<30}{'cumulative s':>14}")
+    for name, us in top_level:
+        print(f"{name:<30}{us/1e6:>14.3f}")
+
+    forbidden=[name for name in FORBIDDEN_MODULES if name in runs[-1]]
+    if forbidden:
+        print(f"\nFAIL: import {module} pulled in {', '.join(forbidden)}")
+        return 1
+
+    if update_baseline:
+        with open(BASELINE_FILE_PATH, "w") as f:
+            json.dump({module: round(seconds, 3)}, f, indent=4)
+            f.write("\n")
+        print(f"\nbaseline written to {BASELINE_FILE_PATH}")
+        return 0
+
+    if not os.path.exists(BASELINE_FILE_PATH):
+        print("\nno baseline recorded, run with --update-baseline")
+        return 0
+    with open(BASELINE_FILE_PATH) as f:
+        baseline=json.load(f).get(module)
+    if baseline is None:
+        print(f"\nno baseline recorded for {module}")
+        return 0
+    print(f"\nbaseline: {baseline:.3f} s, limit: {baseline*tolerance:.3f} s")
+    if seconds>baseline*tolerance:
+        print(f"FAIL: import {module} is {seconds/baseline:.2f}x the baseline")
+        return 1
+    return 0
+
+if __name__=="__main__":
+    parser=argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=1.5)
+    parser.add_argument("--update-baseline", action="store_true")
+    args=parser.parse_args()
+    sys.exit(run(args.module, args.repeats, args.tolerance, args.update_baseline))
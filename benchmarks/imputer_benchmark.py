@@ -0,0 +1,79 @@
+"""
+Compare the imputer engines on data/phisingData.csv
+
+    python -m benchmarks.imputer_benchmark --missing-fraction 0.02
+
+fast_path must reproduce knn exactly, most_frequent is reported with its
+agreement rate against knn on the imputed cells
+"""
+import sys
+import time
+import pickle
+import argparse
+import numpy as np
+import pandas as pd
+from src.constants import TARGET_COLUMN
+from src.constants import DATA_TRANSFORMATION_IMPUTER_PARAMS
+from src.constants import DATA_TRANSFORMATION_IMPUTER_ENGINES
+from src.utils.ml_utils.preprocessing.imputer import build_imputer
+
+DATA_FILE_PATH="data/phisingData.csv"
+
+def time_transform(imputer, x, repeats):
+    timings=[]
+    for _ in range(repeats):
+        start_time=time.perf_counter()
+        imputer.transform(x)
+        timings.append(time.perf_counter()-start_time)
+    return min(timings)
+
+def inject_missing_values(x: pd.DataFrame, missing_fraction: float, seed: int=42) -> pd.DataFrame:
+    random_state=np.random.RandomState(seed)
+    mask=random_state.rand(*x.shape)<missing_fraction
+    return x.astype(np.float64).mask(mask)
+
+def run(missing_fraction: float, repeats: int) -> bool:
+    df=pd.read_csv(DATA_FILE_PATH)
+    x=df.drop(columns=[TARGET_COLUMN])
+    x_train=x.sample(frac=0.8, random_state=42)
+    x_complete=x.drop(index=x_train.index)
+    x_missing=inject_missing_values(x_complete, missing_fraction)
+    missing_cells=x_missing.isna().to_numpy()
+
+    results={}
+    for engine in DATA_TRANSFORMATION_IMPUTER_ENGINES:
+        imputer=build_imputer(engine, DATA_TRANSFORMATION_IMPUTER_PARAMS).fit(x_train)
+        results[engine]={
+            "imputer": imputer,
+            "pickle_bytes": len(pickle.dumps(imputer)),
+            "complete_seconds": time_transform(imputer, x_complete, repeats),
+            "missing_seconds": time_transform(imputer, x_missing, 1),
+            "complete_output": imputer.transform(x_complete),
+            "missing_output": imputer.transform(x_missing),
+        }
+
+    reference=results["knn"]
+    equivalent=True
+    print(f"rows: {len(x_complete)}, missing cells: {missing_cells.sum()} ({missing_fraction:.1%})")
+    print(f"{'engine':<14}{'pickle KB':>10}{'complete rows/s':>18}{'missing rows/s':>16}{'match knn':>12}")
+    for engine, result in results.items():
+        complete_match=np.array_equal(result["complete_output"], reference["complete_output"])
+        imputed_match=np.isclose(result["missing_output"][missing_cells],
+                                 reference["missing_output"][missing_cells]).mean() if missing_cells.any() else 1.0
+        if engine=="fast_path" and not (complete_match and imputed_match==1.0):
+            equivalent=False
+        print(f"{engine:<14}"
+              f"{result['pickle_bytes']/1024:>10.1f}"
+              f"{len(x_complete)/result['complete_seconds']:>18,.0f}"
+              f"{len(x_missing)/result['missing_seconds']:>16,.0f}"
+              f"{imputed_match:>12.1%}")
+    return equivalent
+
+if __name__=="__main__":
+    parser=argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--missing-fraction", type=float, default=0.02)
+    parser.add_argument("--repeats", type=int, default=20)
+    args=parser.parse_args()
+    if not run(args.missing_fraction, args.repeats):
+        print("fast_path output differs from knn")
+        sys.exit(1)
@@ -0,0 +1,62 @@
+"""
+Offline throughput of the MongoDB ingestion path against the mongomock stand-in
+
+    python -m benchmarks.mongo_ingestion_benchmark --scale 10 --batch-sizes 1000 5000 20000
+
+Loads data/phisingData.csv repeated --scale times through MongoDBDataLoading into a
+mongomock:// connection, then times DataIngestion.export_collection_as_dataframe per
+cursor batch size. Both go through the shared pooled connection, so no server is needed.
+mongomock is far slower than a real server, compare batch sizes and code changes, not
+absolute numbers
+"""
+import os
+import time
+import argparse
+import tempfile
+from datetime import datetime
+from load_data import MongoDBDataLoading
+from src.constants import DATA_INGESTION_DATABASE_NAME, DATA_INGESTION_COLLECTION_NAME
+from src.components.data_ingestion import DataIngestion
+from src.entity.config_entity import TrainingPipelineConfig, DataIngestionConfig
+from src.config.mongo_db_connection import MongoDBConnection, get_mongo_connection, set_mongo_connection
+
+DATA_FILE_PATH="data/phisingData.csv"
+
+def run(scale: int, batch_sizes: list):
+    set_mongo_connection(MongoDBConnection(url="mongomock://benchmark"))
+    data_loading=MongoDBDataLoading()
+    records=data_loading.convert_csv_to_json(DATA_FILE_PATH)
+    start_time=time.perf_counter()
+    for _ in range(scale):
+        # insert_many adds _id to the dicts it is given, every copy needs fresh ones
+        data_loading.insert_data_mongodb([dict(record) for record in records],
+                                         DATA_INGESTION_DATABASE_NAME, DATA_INGESTION_COLLECTION_NAME)
+    load_seconds=time.perf_counter()-start_time
+    n_documents=len(records)*scale
+    print(f"loaded {n_documents} documents in {load_seconds:.2f} s ({n_documents/load_seconds:,.0f} docs/s)")
+
+    print(f"\n{'batch size':>12}{'export s':>10}{'docs/s':>12}{'rows':>10}")
+    with tempfile.TemporaryDirectory() as artifact_dir:
+        training_pipeline_config=TrainingPipelineConfig(datetime.now())
+        training_pipeline_config.artifact_name=artifact_dir
+        training_pipeline_config.artifact_dir=os.path.join(artifact_dir, training_pipeline_config.timestamp)
+        for batch_size in batch_sizes:
+            data_ingestion_config=DataIngestionConfig(training_pipeline_config)
+            data_ingestion_config.batch_size=batch_size
+            data_ingestion_config.incremental=False
+            data_ingestion=DataIngestion(data_ingestion_config)
+            start_time=time.perf_counter()
+            dataframe, _=data_ingestion.export_collection_as_dataframe()
+            seconds=time.perf_counter()-start_time
+            print(f"{batch_size:>12}{seconds:>10.2f}{n_documents/seconds:>12,.0f}{len(dataframe):>10}")
+
+    client=get_mongo_connection().get_client()
+    reused=all(DataIngestion(data_ingestion_config).get_collection().database.client is client for _ in range(3))
+    print(f"\nclient reused across components: {reused}")
+
+if __name__=="__main__":
+    parser=argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=10)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    args=parser.parse_args()
+    run(args.scale, args.batch_sizes)
@@ -0,0 +1,198 @@
+"""
+Peak resident memory of the in-memory and out-of-core training paths
+
+    python -m benchmarks.out_of_core_memory_benchmark --rows 100k 1M 5M
+    python -m benchmarks.out_of_core_memory_benchmark --rows 1M --chunk-size 20000 --epochs 2
+
+For every row count a synthetic valid train/test split is written chunk by chunk to npy
+files, then each path runs in a fresh subprocess that reports its own memory peaks:
+
+    in_memory    the whole split loaded, imputed and fitted with SGDClassifier.fit
+    out_of_core  DataTransformation streaming the split through the preprocessor, then
+                 SGDClassifier.partial_fit over the memory-mapped transformed arrays
+
+Memory is read from /proc/self/status, so the benchmark runs on Linux only. peak_rss_mb
+is VmHWM, it includes the pages of the memory-mapped arrays, which are page cache the
+kernel reclaims under pressure. peak_anon_mb samples RssAnon, the memory the process
+itself allocated, every few milliseconds. The out-of-core peak_anon_mb should stay flat
+as the row count grows while the in-memory one grows with it. import_anon_mb is the
+process after its imports, before any data is read
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import tempfile
+import subprocess
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from src.constants import (
+    TARGET_COLUMN,
+    SCHEMA_FILE_PATH,
+    DATA_TRANSFORMATION_CHUNK_SIZE,
+    MODEL_TRAINER_OUT_OF_CORE_CHUNK_SIZE
+)
+from src.utils.main_utils.utils import get_schema_dtype_plan
+from benchmarks.synthetic_data import DATA_FILE_PATH, iter_synthetic_chunks, parse_rows
+
+TRAIN_FILE_NAME="train.npy"
+TEST_FILE_NAME="test.npy"
+TEST_FRACTION=0.2
+
+MEMORY_SAMPLE_INTERVAL_SECONDS=0.005
+
+def read_memory_status() -> dict:
+    status={}
+    with open("/proc/self/status") as f:
+        for line in f:
+            name, value=line.split(":", 1)
+            if name in ("VmHWM", "RssAnon"):
+                status[name]=int(value.split()[0])/1024
+    return status
+
+class AnonymousMemorySampler:
+    """
+        Background thread keeping the largest RssAnon seen while the context is open
+    """
+    def __init__(self, interval: float=MEMORY_SAMPLE_INTERVAL_SECONDS):
+        self.interval=interval
+        self.peak_anon_mb=0.0
+        self._stop=threading.Event()
+        self._thread=threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while True:
+            self.peak_anon_mb=max(self.peak_anon_mb, read_memory_status()["RssAnon"])
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+def write_valid_split(file_path: str, n_rows: int, source: pd.DataFrame, random_state: int):
+    """
+        Valid split in the npy artifact format, one int8 field per column, written through a memory map
+    """
+    dtype_plan=get_schema_dtype_plan(SCHEMA_FILE_PATH)
+    dtype=[(column, dtype_plan.get(column, "float64")) for column in source.columns]
+    records=np.lib.format.open_memmap(file_path, mode="w+", dtype=dtype, shape=(n_rows,))
+    start=0
+    for chunk in iter_synthetic_chunks(n_rows, source, random_state=random_state):
+        for column in source.columns:
+            records[column][start:start+len(chunk)]=chunk[column].to_numpy()
+        start+=len(chunk)
+    records.flush()
+    del records
+
+def run_in_memory(work_dir: str, chunk_size: int, epochs: int) -> dict:
+    from sklearn.linear_model import SGDClassifier
+    from sklearn.metrics import r2_score
+    from src.components.data_transformation import DataTransformation
+    from src.utils.main_utils.utils import load_dataframe
+    import_anon_mb=read_memory_status()["RssAnon"]
+
+    train_df=load_dataframe(os.path.join(work_dir, TRAIN_FILE_NAME))
+    test_df=load_dataframe(os.path.join(work_dir, TEST_FILE_NAME))
+    preprocessor=DataTransformation(None, None).get_data_transformer_object()
+    x_train=preprocessor.fit_transform(train_df.drop(columns=[TARGET_COLUMN]))
+    x_test=preprocessor.transform(test_df.drop(columns=[TARGET_COLUMN]))
+    y_train=train_df[TARGET_COLUMN].replace(-1, 0).to_numpy()
+    y_test=test_df[TARGET_COLUMN].replace(-1, 0).to_numpy()
+    model=SGDClassifier(loss="log_loss", max_iter=epochs, tol=None, random_state=42).fit(x_train, y_train)
+    return {"import_anon_mb": import_anon_mb, "test_score": float(r2_score(y_test, model.predict(x_test)))}
+
+def run_out_of_core(work_dir: str, chunk_size: int, epochs: int) -> dict:
+    from sklearn.linear_model import SGDClassifier
+    from src.components.data_transformation import DataTransformation
+    from src.entity.artifact_entity import DataValidationArtifact
+    from src.entity.config_entity import TrainingPipelineConfig, DataTransformationConfig
+    from src.utils.main_utils.utils import load_numpy_array_data
+    from src.utils.ml_utils.model.out_of_core import evaluate_out_of_core_models
+    import_anon_mb=read_memory_status()["RssAnon"]
+
+    training_pipeline_config=TrainingPipelineConfig(datetime.now())
+    training_pipeline_config.artifact_dir=os.path.join(work_dir, "artifacts")
+    data_transformation_config=DataTransformationConfig(training_pipeline_config)
+    data_validation_artifact=DataValidationArtifact(
+        validation_status=True,
+        valid_train_file_path=os.path.join(work_dir, TRAIN_FILE_NAME),
+        valid_test_file_path=os.path.join(work_dir, TEST_FILE_NAME),
+        invalid_train_file_path=None,
+        invalid_test_file_path=None,
+        drift_report_file_path=None,
+        drift_reference_file_path=None
+    )
+    data_transformation_artifact=DataTransformation(data_validation_artifact, data_transformation_config).initiate_data_transformation()
+    train_arr=load_numpy_array_data(data_transformation_artifact.transformed_train_file_path, mmap=True)
+    test_arr=load_numpy_array_data(data_transformation_artifact.transformed_test_file_path, mmap=True)
+    models={"SGD Logistic Regression": SGDClassifier(loss="log_loss", random_state=42)}
+    report=evaluate_out_of_core_models(train_arr[:, :-1], train_arr[:, -1], test_arr[:, :-1], test_arr[:, -1],
+                                       models, chunk_size=chunk_size, epochs=epochs)
+    return {"import_anon_mb": import_anon_mb, "test_score": report["SGD Logistic Regression"]["test_score"]}
+
+TRAINING_PATHS={"in_memory": run_in_memory, "out_of_core": run_out_of_core}
+
+def measure(training_path: str, work_dir: str, chunk_size: int, epochs: int) -> dict:
+    """
+        Run one training path in a fresh interpreter, so its memory peaks are not inherited from this one
+    """
+    command=[sys.executable, "-m", "benchmarks.out_of_core_memory_benchmark", "--child", training_path,
+             "--work-dir", work_dir, "--chunk-size", str(chunk_size), "--epochs", str(epochs)]
+    completed=subprocess.run(command, capture_output=True, text=True)
+    if completed.returncode!=0:
+        return {"error": completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else f"exit {completed.returncode}"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def run(row_counts: list, training_paths: list, chunk_size: int, epochs: int) -> dict:
+    source=pd.read_csv(DATA_FILE_PATH)
+    results={}
+    print(f"{'rows':>10}{'path':>14}{'import anon MB':>16}{'peak anon MB':>14}{'peak rss MB':>13}{'seconds':>10}{'test r2':>9}")
+    for n_rows in row_counts:
+        with tempfile.TemporaryDirectory() as work_dir:
+            n_test=int(n_rows*TEST_FRACTION)
+            write_valid_split(os.path.join(work_dir, TRAIN_FILE_NAME), n_rows-n_test, source, random_state=42)
+            write_valid_split(os.path.join(work_dir, TEST_FILE_NAME), n_test, source, random_state=43)
+            for training_path in training_paths:
+                result=measure(training_path, work_dir, chunk_size, epochs)
+                results[f"{training_path}@{n_rows}"]=result
+                if "error" in result:
+                    print(f"{n_rows:>10}{training_path:>14}  failed: {result['error']}")
+                    continue
+                print(f"{n_rows:>10}{training_path:>14}{result['import_anon_mb']:>16.1f}{result['peak_anon_mb']:>14.1f}"
+                      f"{result['peak_rss_mb']:>13.1f}{result['seconds']:>10.2f}{result['test_score']:>9.3f}", flush=True)
+    return results
+
+if __name__=="__main__":
+    parser=argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=parse_rows, nargs="+", default=[parse_rows("100k"), parse_rows("1M")])
+    parser.add_argument("--paths", nargs="+", choices=list(TRAINING_PATHS), default=list(TRAINING_PATHS))
+    parser.add_argument("--chunk-size", type=int, default=MODEL_TRAINER_OUT_OF_CORE_CHUNK_SIZE,
+                        help=f"training chunk rows, the transformation uses DATA_TRANSFORMATION_CHUNK_SIZE={DATA_TRANSFORMATION_CHUNK_SIZE}")
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    parser.add_argument("--child", choices=list(TRAINING_PATHS), help=argparse.SUPPRESS)
+    parser.add_argument("--work-dir", help=argparse.SUPPRESS)
+    args=parser.parse_args()
+
+    if args.child:
+        start_time=time.perf_counter()
+        with AnonymousMemorySampler() as sampler:
+            result=TRAINING_PATHS[args.child](args.work_dir, args.chunk_size, args.epochs)
+        result.update({"peak_anon_mb": sampler.peak_anon_mb, "peak_rss_mb": read_memory_status()["VmHWM"],
+                       "seconds": time.perf_counter()-start_time})
+        print(json.dumps(result))
+        sys.exit(0)
+
+    results=run(args.rows, args.paths, args.chunk_size, args.epochs)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
@@ -0,0 +1,248 @@
+"""
+Benchmark suite for every pipeline stage and the scoring path, on synthetic data
+
+    python -m benchmarks.suite --rows 10k
+    python -m benchmarks.suite --rows 10k 1M --benchmarks network_model_predict detect_data_drift
+    python -m benchmarks.suite --rows 10k --update-baseline
+
+Each benchmark prepares its inputs untimed, runs once to warm up, then reports
+the median of --repeats timed runs. Results are compared with
+benchmarks/suite_baseline.json and the run exits with status 1 when any median
+is more than --tolerance times its baseline. Baselines are machine specific,
+record them on the machine that runs the comparison. Benchmarks that would take
+minutes at a row count (MongoDB ingestion runs against mongomock) are skipped
+above their max_rows
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import statistics
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from dataclasses import dataclass
+from sklearn.tree import DecisionTreeClassifier
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from src.constants import (
+    TARGET_COLUMN,
+    SCHEMA_FILE_PATH,
+    DATA_INGESTION_DATABASE_NAME,
+    DATA_INGESTION_COLLECTION_NAME
+)
+from src.components.data_ingestion import DataIngestion
+from src.components.data_validation import DataValidation
+from src.components.data_transformation import DataTransformation
+from src.entity.artifact_entity import DataValidationArtifact
+from src.utils.main_utils.utils import save_dataframe, get_schema_dtype_plan
+from src.utils.ml_utils.model.estimator import NetworkModel
+from src.utils.ml_utils.model.model_search import evaluate_models
+from src.config.mongo_db_connection import MongoDBConnection, set_mongo_connection
+from src.entity.config_entity import (
+    TrainingPipelineConfig,
+    DataIngestionConfig,
+    DataValidationConfig,
+    DataTransformationConfig
+)
+from benchmarks.synthetic_data import generate_synthetic_data, parse_rows
+
+BASELINE_FILE_PATH=os.path.join(os.path.dirname(__file__), "suite_baseline.json")
+
+@dataclass
+class Benchmark:
+    name: str
+    setup: object
+    max_rows: int=None
+
+def get_training_pipeline_config(work_dir: str) -> TrainingPipelineConfig:
+    training_pipeline_config=TrainingPipelineConfig(datetime.now())
+    training_pipeline_config.artifact_name=work_dir
+    training_pipeline_config.artifact_dir=os.path.join(work_dir, training_pipeline_config.timestamp)
+    return training_pipeline_config
+
+def split_features(dataframe: pd.DataFrame):
+    return dataframe.drop(columns=[TARGET_COLUMN]), dataframe[TARGET_COLUMN].replace(-1, 0).to_numpy()
+
+def setup_data_ingestion(dataframe: pd.DataFrame, work_dir: str):
+    collection=set_mongo_connection(MongoDBConnection(url="mongomock://suite")).get_collection(
+        DATA_INGESTION_DATABASE_NAME, DATA_INGESTION_COLLECTION_NAME)
+    collection.drop()
+    collection.insert_many(dataframe.to_dict(orient="records"))
+    data_ingestion_config=DataIngestionConfig(get_training_pipeline_config(work_dir))
+    data_ingestion_config.incremental=False
+
+    def run():
+        DataIngestion(data_ingestion_config).initiate_data_ingestion()
+    return run
+
+def setup_detect_data_drift(dataframe: pd.DataFrame, work_dir: str):
+    data_validation=DataValidation(None, DataValidationConfig(get_training_pipeline_config(work_dir)))
+    base_df=dataframe.iloc[:len(dataframe)//2]
+    current_df=dataframe.iloc[len(dataframe)//2:]
+
+    def run():
+        data_validation.detect_data_drift(base_df, current_df)
+    return run
+
+def setup_data_transformation(dataframe: pd.DataFrame, work_dir: str):
+    training_pipeline_config=get_training_pipeline_config(work_dir)
+    data_validation_config=DataValidationConfig(training_pipeline_config)
+    dtype_plan=get_schema_dtype_plan(SCHEMA_FILE_PATH)
+    n_train=int(len(dataframe)*0.8)
+    save_dataframe(data_validation_config.valid_train_file_path, dataframe.iloc[:n_train], dtype_plan)
+    save_dataframe(data_validation_config.valid_test_file_path, dataframe.iloc[n_train:], dtype_plan)
+    data_validation_artifact=DataValidationArtifact(
+        validation_status=True,
+        valid_train_file_path=data_validation_config.valid_train_file_path,
+        valid_test_file_path=data_validation_config.valid_test_file_path,
+        invalid_train_file_path=None,
+        invalid_test_file_path=None,
+        drift_report_file_path=None,
+        drift_reference_file_path=None
+    )
+    data_transformation_config=DataTransformationConfig(training_pipeline_config)
+
+    def run():
+        DataTransformation(data_validation_artifact, data_transformation_config).initiate_data_transformation()
+    return run
+
+def setup_evaluate_models(dataframe: pd.DataFrame, work_dir: str):
+    x, y=split_features(dataframe)
+    x=x.to_numpy(dtype=np.float64)
+    n_train=int(len(dataframe)*0.8)
+    # A fixed, small search space so the timing tracks the search machinery rather than the grid
+    params={
+        "Decision Tree": {"criterion": ["gini", "entropy"]},
+        "Random Forest": {"n_estimators": [8, 16]},
+        "Logistic Regression": {}
+    }
+
+    def run():
+        models={
+            "Decision Tree": DecisionTreeClassifier(random_state=42),
+            "Random Forest": RandomForestClassifier(random_state=42),
+            "Logistic Regression": LogisticRegression(max_iter=200)
+        }
+        evaluate_models(x[:n_train], y[:n_train], x[n_train:], y[n_train:], models, params, n_jobs=1, cv=3)
+    return run
+
+def fit_network_model(dataframe: pd.DataFrame) -> NetworkModel:
+    x, y=split_features(dataframe.iloc[:100_000])
+    preprocessor=DataTransformation(None, None).get_data_transformer_object().fit(x)
+    model=RandomForestClassifier(n_estimators=32, max_depth=12, random_state=42).fit(preprocessor.transform(x), y)
+    return NetworkModel(preprocessor, model)
+
+def setup_network_model_predict(dataframe: pd.DataFrame, work_dir: str):
+    network_model=fit_network_model(dataframe)
+    x, _=split_features(dataframe)
+
+    def run():
+        network_model.predict(x)
+    return run
+
+def setup_network_model_predict_single_row(dataframe: pd.DataFrame, work_dir: str):
+    network_model=fit_network_model(dataframe)
+    x, _=split_features(dataframe)
+    rows=[x.iloc[[i]] for i in range(min(200, len(x)))]
+
+    def run():
+        for row in rows:
+            network_model.predict(row)
+    return run
+
+BENCHMARKS=[
+    Benchmark("data_ingestion", setup_data_ingestion, max_rows=50_000),
+    Benchmark("detect_data_drift", setup_detect_data_drift),
+    Benchmark("data_transformation", setup_data_transformation),
+    Benchmark("evaluate_models", setup_evaluate_models, max_rows=1_000_000),
+    Benchmark("network_model_predict", setup_network_model_predict),
+    # 200 single-row calls, the per-request latency of /predict/records
+    Benchmark("network_model_predict_single_row", setup_network_model_predict_single_row),
+]
+
+def time_benchmark(run, repeats: int) -> float:
+    run()
+    timings=[]
+    for _ in range(repeats):
+        start_time=time.perf_counter()
+        run()
+        timings.append(time.perf_counter()-start_time)
+    return statistics.median(timings)
+
+def run_suite(row_counts: list, benchmark_names: list, repeats: int) -> dict:
+    results={}
+    for n_rows in row_counts:
+        dataframe=generate_synthetic_data(n_rows)
+        for benchmark in BENCHMARKS:
+            if benchmark_names and benchmark.name not in benchmark_names:
+                continue
+            key=f"{benchmark.name}@{n_rows}"
+            if benchmark.max_rows is not None and n_rows>benchmark.max_rows:
+                print(f"{key:<48}{'skipped':>12}")
+                continue
+            with tempfile.TemporaryDirectory() as work_dir:
+                seconds=time_benchmark(benchmark.setup(dataframe, work_dir), repeats)
+            results[key]=seconds
+            print(f"{key:<48}{seconds:>12.4f}", flush=True)
+    return results
+
+def compare_with_baseline(results: dict, tolerance: float) -> int:
+    if not os.path.exists(BASELINE_FILE_PATH):
+        print("\nno baseline recorded, run with --update-baseline")
+        return 0
+    with open(BASELINE_FILE_PATH) as f:
+        baseline=json.load(f)["results"]
+    regressions=[]
+    print(f"\n{'benchmark':<48}{'baseline s':>12}{'now s':>12}{'ratio':>8}")
+    for key, seconds in results.items():
+        if key not in baseline:
+            print(f"{key:<48}{'new':>12}{seconds:>12.4f}")
+            continue
+        ratio=seconds/baseline[key]
+        flag=" REGRESSION" if ratio>tolerance else ""
+        print(f"{key:<48}{baseline[key]:>12.4f}{seconds:>12.4f}{ratio:>8.2f}{flag}")
+        if ratio>tolerance:
+            regressions.append(key)
+    if regressions:
+        print(f"\nFAIL: {len(regressions)} benchmarks slower than {tolerance}x their baseline")
+        return 1
+    return 0
+
+def update_baseline(results: dict):
+    baseline={"environment": {}, "results": {}}
+    if os.path.exists(BASELINE_FILE_PATH):
+        with open(BASELINE_FILE_PATH) as f:
+            baseline=json.load(f)
+    baseline["environment"]={
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count()
+    }
+    baseline["results"].update({key: round(seconds, 4) for key, seconds in results.items()})
+    with open(BASELINE_FILE_PATH, "w") as f:
+        json.dump(baseline, f, indent=4, sort_keys=True)
+        f.write("\n")
+    print(f"\nbaseline written to {BASELINE_FILE_PATH}")
+
+if __name__=="__main__":
+    parser=argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=parse_rows, nargs="+", default=[parse_rows("10k")])
+    parser.add_argument("--benchmarks", nargs="+", choices=[benchmark.name for benchmark in BENCHMARKS])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=1.5)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args=parser.parse_args()
+
+    results=run_suite(args.rows, args.benchmarks, args.repeats)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
+    if args.update_baseline:
+        update_baseline(results)
+        sys.exit(0)
+    sys.exit(compare_with_baseline(results, args.tolerance))
@@ -0,0 +1,81 @@
+"""
+Synthetic copies of data/phisingData.csv at any row count
+
+    python -m benchmarks.synthetic_data --rows 1M --output synthetic.csv
+
+Rows are drawn with replacement from the source, then each feature cell is
+replaced with probability --noise by a draw from that column's own values.
+Both steps keep every column's value distribution, the resampling keeps the
+feature/target relationships and the noise creates rows that are not in the
+source. Rows are generated in chunks so 10M rows fit in memory as int8
+"""
+import argparse
+import numpy as np
+import pandas as pd
+from src.constants import TARGET_COLUMN
+
+DATA_FILE_PATH="data/phisingData.csv"
+GENERATION_CHUNK_SIZE=1_000_000
+
+def parse_rows(value: str) -> int:
+    """
+        10000, 10k, 1M or 10M
+    """
+    value=str(value).strip().lower().replace("_", "")
+    multiplier={"k": 1_000, "m": 1_000_000}.get(value[-1:], 1)
+    return int(float(value.rstrip("km"))*multiplier)
+
+def iter_synthetic_chunks(n_rows: int, source: pd.DataFrame, noise: float=0.02, missing_fraction: float=0.0,
+                          random_state: int=42, chunk_size: int=GENERATION_CHUNK_SIZE):
+    values=source.to_numpy(dtype=np.int8)
+    n_source, n_columns=values.shape
+    feature_columns=[j for j, column in enumerate(source.columns) if column!=TARGET_COLUMN]
+    rng=np.random.default_rng(random_state)
+    for start in range(0, n_rows, chunk_size):
+        rows=values[rng.integers(0, n_source, min(chunk_size, n_rows-start))]
+        for j in feature_columns:
+            replaced=np.flatnonzero(rng.random(len(rows))<noise)
+            rows[replaced, j]=values[rng.integers(0, n_source, len(replaced)), j]
+        chunk=pd.DataFrame(rows, columns=source.columns)
+        if missing_fraction>0:
+            chunk=chunk.astype(np.float64)
+            for j in feature_columns:
+                chunk.iloc[np.flatnonzero(rng.random(len(chunk))<missing_fraction), j]=np.nan
+        yield chunk
+
+def generate_synthetic_data(n_rows: int, source_file_path: str=DATA_FILE_PATH, noise: float=0.02,
+                            missing_fraction: float=0.0, random_state: int=42) -> pd.DataFrame:
+    source=pd.read_csv(source_file_path)
+    chunks=list(iter_synthetic_chunks(n_rows, source, noise, missing_fraction, random_state))
+    return pd.concat(chunks, ignore_index=True) if len(chunks)>1 else chunks[0]
+
+def max_frequency_difference(source: pd.DataFrame, synthetic: pd.DataFrame) -> pd.Series:
+    """
+        Largest absolute difference between the source and synthetic value frequencies, per column
+    """
+    return pd.Series({
+        column: (source[column].value_counts(normalize=True)
+                 .sub(synthetic[column].value_counts(normalize=True), fill_value=0).abs().max())
+        for column in source.columns
+    })
+
+if __name__=="__main__":
+    parser=argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=parse_rows, default=parse_rows("10k"))
+    parser.add_argument("--noise", type=float, default=0.02)
+    parser.add_argument("--missing-fraction", type=float, default=0.0)
+    parser.add_argument("--random-state", type=int, default=42)
+    parser.add_argument("--output", help="CSV written chunk by chunk, only the distribution check runs without it")
+    args=parser.parse_args()
+
+    source=pd.read_csv(DATA_FILE_PATH)
+    chunks=iter_synthetic_chunks(args.rows, source, args.noise, args.missing_fraction, args.random_state)
+    sample=None
+    for chunk_index, chunk in enumerate(chunks):
+        if sample is None:
+            sample=chunk
+        if args.output:
+            chunk.to_csv(args.output, mode="w" if chunk_index==0 else "a", header=chunk_index==0, index=False)
+    difference=max_frequency_difference(source, sample)
+    print(f"rows: {args.rows}, max value frequency difference on the first chunk: "
+          f"{difference.max():.4f} ({difference.idxmax()})")
@@ -0,0 +1,66 @@
+"""
+Memory footprint and throughput of the ternary feature encodings on data/phisingData.csv
+
+    python -m benchmarks.ternary_codec_benchmark --scale 100
+
+Compares the int64 frame read from CSV with float64, int8 and 2-bit packed matrices,
+times packing and unpacking, and writes and reads the frame in each artifact format
+"""
+import os
+import time
+import argparse
+import tempfile
+import importlib.util
+import numpy as np
+import pandas as pd
+from src.constants import ARTIFACT_FILE_FORMATS
+from src.utils.main_utils.utils import save_dataframe, load_dataframe
+from src.utils.main_utils.ternary_codec import pack_ternary, unpack_ternary, compact_array
+
+DATA_FILE_PATH="data/phisingData.csv"
+
+def timed(fn, *args):
+    start_time=time.perf_counter()
+    result=fn(*args)
+    return result, time.perf_counter()-start_time
+
+def run(scale: int, formats: list):
+    dataframe=pd.concat([pd.read_csv(DATA_FILE_PATH)]*scale, ignore_index=True)
+    n_rows, n_columns=dataframe.shape
+    print(f"rows: {n_rows}, columns: {n_columns}")
+
+    matrix=dataframe.to_numpy(dtype=np.float64)
+    int8_matrix, int8_seconds=timed(compact_array, matrix)
+    (packed, valid), pack_seconds=timed(pack_ternary, int8_matrix)
+    unpacked, unpack_seconds=timed(unpack_ternary, packed, n_columns, [-1, 0, 1], np.int8)
+    if not (valid.all() and np.array_equal(unpacked, int8_matrix)):
+        raise Exception("packed round trip does not match the input")
+
+    print(f"\n{'in memory':<22}{'MB':>10}{'bytes/row':>12}{'encode rows/s':>16}")
+    print(f"{'int64 DataFrame':<22}{dataframe.memory_usage(index=False).sum()/2**20:>10.1f}"
+          f"{dataframe.memory_usage(index=False).sum()/n_rows:>12.1f}{'':>16}")
+    print(f"{'float64 matrix':<22}{matrix.nbytes/2**20:>10.1f}{matrix.nbytes/n_rows:>12.1f}{'':>16}")
+    print(f"{'int8 matrix':<22}{int8_matrix.nbytes/2**20:>10.1f}{int8_matrix.nbytes/n_rows:>12.1f}{n_rows/int8_seconds:>16,.0f}")
+    print(f"{'2-bit packed':<22}{packed.nbytes/2**20:>10.1f}{packed.nbytes/n_rows:>12.1f}{n_rows/pack_seconds:>16,.0f}")
+    print(f"unpack to int8: {n_rows/unpack_seconds:,.0f} rows/s")
+
+    print(f"\n{'format':<10}{'file MB':>10}{'write s':>10}{'read s':>10}{'read MB':>10}")
+    with tempfile.TemporaryDirectory() as artifact_dir:
+        for file_format in formats:
+            file_path=os.path.join(artifact_dir, f"feature_store.{file_format}")
+            _, write_seconds=timed(save_dataframe, file_path, dataframe, {column: "int8" for column in dataframe.columns})
+            loaded, read_seconds=timed(load_dataframe, file_path)
+            print(f"{file_format:<10}{os.path.getsize(file_path)/2**20:>10.1f}{write_seconds:>10.2f}{read_seconds:>10.2f}"
+                  f"{loaded.memory_usage(index=False).sum()/2**20:>10.1f}")
+
+if __name__=="__main__":
+    parser=argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=100)
+    parser.add_argument("--formats", nargs="+", default=ARTIFACT_FILE_FORMATS)
+    args=parser.parse_args()
+
+    formats=args.formats
+    if "parquet" in formats and importlib.util.find_spec("pyarrow") is None and importlib.util.find_spec("fastparquet") is None:
+        print("parquet skipped, pyarrow is not installed")
+        formats=[file_format for file_format in formats if file_format!="parquet"]
+    run(args.scale, formats)
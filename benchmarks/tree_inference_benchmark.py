@@ -0,0 +1,79 @@
+"""
+Compare sklearn predict with the compiled tree inference backend on data/phisingData.csv
+
+    python -m benchmarks.tree_inference_benchmark --batch-sizes 1 100 100000
+
+Each tree candidate of ModelTrainer is fitted once, compiled predictions must
+match sklearn on the original rows and on noisy copies of them, then the
+latency of both backends is reported per batch size. NetworkModel only routes
+batches up to MODEL_INFERENCE_COMPILED_MAX_ROWS to the compiled backend, use
+this benchmark to pick that cutoff
+"""
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from sklearn.tree import DecisionTreeClassifier
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, AdaBoostClassifier
+from src.constants import TARGET_COLUMN
+from src.utils.ml_utils.model.tree_compiler import compile_tree_ensemble
+
+DATA_FILE_PATH="data/phisingData.csv"
+
+def get_models() -> dict:
+    return {
+        "Decision Tree": DecisionTreeClassifier(random_state=42),
+        "Random Forest": RandomForestClassifier(n_estimators=128, random_state=42),
+        "Gradient Boosting": GradientBoostingClassifier(n_estimators=128, subsample=0.85, random_state=42),
+        "AdaBoost": AdaBoostClassifier(n_estimators=64, learning_rate=0.1, random_state=42),
+    }
+
+def time_predict(predict, x, min_seconds: float) -> float:
+    """
+        Best per-call latency over repeated calls for at least min_seconds
+    """
+    best=float("inf")
+    deadline=time.perf_counter()+min_seconds
+    while True:
+        start_time=time.perf_counter()
+        predict(x)
+        best=min(best, time.perf_counter()-start_time)
+        if time.perf_counter()>deadline:
+            return best
+
+def run(batch_sizes: list, min_seconds: float) -> bool:
+    df=pd.read_csv(DATA_FILE_PATH)
+    x=df.drop(columns=[TARGET_COLUMN]).to_numpy(dtype=np.float64)
+    y=df[TARGET_COLUMN].to_numpy()
+    random_state=np.random.RandomState(42)
+    x_noisy=x+random_state.normal(0, 0.3, size=x.shape)
+
+    equivalent=True
+    print(f"{'model':<20}{'batch':>8}{'sklearn ms':>14}{'compiled ms':>14}{'speedup':>10}")
+    for name, model in get_models().items():
+        model.fit(x, y)
+        compiled_model=compile_tree_ensemble(model)
+        mismatches=sum(int((model.predict(data)!=compiled_model.predict(data)).sum()) for data in (x, x_noisy))
+        if mismatches:
+            equivalent=False
+            print(f"{name}: {mismatches} predictions differ from sklearn")
+
+        for batch_size in batch_sizes:
+            batch=x[random_state.randint(0, len(x), size=batch_size)]
+            sklearn_seconds=time_predict(model.predict, batch, min_seconds)
+            compiled_seconds=time_predict(compiled_model.predict, batch, min_seconds)
+            print(f"{name:<20}{batch_size:>8}"
+                  f"{sklearn_seconds*1000:>14.3f}"
+                  f"{compiled_seconds*1000:>14.3f}"
+                  f"{sklearn_seconds/compiled_seconds:>9.1f}x")
+    return equivalent
+
+if __name__=="__main__":
+    parser=argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 100, 100000])
+    parser.add_argument("--min-seconds", type=float, default=1.0)
+    args=parser.parse_args()
+    if not run(args.batch_sizes, args.min_seconds):
+        print("compiled predictions differ from sklearn")
+        sys.exit(1)
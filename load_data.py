@@ -1,23 +1,38 @@
 import os
 import sys
 import json
-import certifi
-import pymongo
+import time
+import argparse
 import pandas as pd
 import numpy as np
-from dotenv import load_dotenv
+from pymongo.errors import BulkWriteError
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from src.logging.logger import logging
 from src.exception.exception import NetworkSecurityException
+from src.utils.main_utils.utils import read_yaml_file, write_yaml_file
+from src.config.mongo_db_connection import get_mongo_connection, close_mongo_connection
+from src.constants import (
+    DATA_INGESTION_DATABASE_NAME,
+    DATA_INGESTION_COLLECTION_NAME,
+    DATA_LOADING_CHUNK_SIZE,
+    DATA_LOADING_MAX_WORKERS,
+    DATA_LOADING_ROW_HASH_FIELD,
+    DATA_LOADING_ROW_OCCURRENCE_FIELD,
+    DATA_LOADING_CHECKPOINT_DIR
+)
 
-load_dotenv()
-MONGO_DB_URL=os.getenv("MONGO_DB_URL")
-
-ca=certifi.where()
+# Error code MongoDB reports for a unique index violation
+DUPLICATE_KEY_ERROR_CODE=11000
 
 class MongoDBDataLoading():
-    def __init__(self):
+    def __init__(self,
+                 chunk_size: int=DATA_LOADING_CHUNK_SIZE,
+                 max_workers: int=DATA_LOADING_MAX_WORKERS,
+                 checkpoint_dir: str=DATA_LOADING_CHECKPOINT_DIR):
         try:
-            pass
+            self.chunk_size=chunk_size
+            self.max_workers=max_workers
+            self.checkpoint_dir=checkpoint_dir
         except Exception as e:
             raise NetworkSecurityException(e, sys)
         
@@ -34,12 +49,9 @@ class MongoDBDataLoading():
         try:
             self.records=records
             self.database=database
-            self.collection=collection
 
-            # Instantiate MongoClient to connect to database
-            self.mongo_client=pymongo.MongoClient(MONGO_DB_URL)
-            self.database=self.mongo_client[self.database]
-            self.collection=self.database[self.collection]
+            # Pooled client shared with the rest of the process
+            self.collection=get_mongo_connection().get_collection(database, collection)
             
             # Insert data
             self.collection.insert_many(self.records)
@@ -47,12 +59,182 @@ class MongoDBDataLoading():
         except Exception as e:
             raise NetworkSecurityException(e, sys)
         
+    def get_checkpoint_file_path(self, file_path: str, database: str, collection: str) -> str:
+        return os.path.join(self.checkpoint_dir, f"{database}.{collection}.{os.path.basename(file_path)}.yaml")
+
+    def get_file_identity(self, file_path: str) -> dict:
+        """
+            A checkpoint is only resumed for the same file, unchanged, read with the same chunk size
+        """
+        try:
+            stat=os.stat(file_path)
+            return {
+                "file_path": os.path.abspath(file_path),
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "chunk_size": self.chunk_size
+            }
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def read_checkpoint(self, checkpoint_file_path: str, identity: dict) -> set:
+        """
+            Indices of the chunks already loaded, empty when there is no usable checkpoint
+        """
+        try:
+            if not os.path.exists(checkpoint_file_path):
+                return set()
+            checkpoint=read_yaml_file(checkpoint_file_path) or {}
+            if checkpoint.get("identity")!=identity or not isinstance(checkpoint.get("chunks_done"), list):
+                return set()
+            return set(checkpoint["chunks_done"])
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def write_checkpoint(self, checkpoint_file_path: str, identity: dict, chunks_done: set, rows_done: int) -> None:
+        try:
+            # Replaced in one step so an interrupted write never leaves a truncated checkpoint
+            temp_file_path=f"{checkpoint_file_path}.tmp"
+            write_yaml_file(temp_file_path, {"identity": identity, "chunks_done": sorted(chunks_done), "rows_done": rows_done})
+            os.replace(temp_file_path, checkpoint_file_path)
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def get_row_keys(self, chunk: pd.DataFrame, occurrences: dict):
+        """
+            Hash of each row's values and how many identical rows came before it in the file.
+            Identical rows are legitimate in the feed, the occurrence number keeps them apart
+        """
+        try:
+            # Hashed as float64 so a column read as int in one chunk and float in another hashes the same
+            hashes=pd.util.hash_pandas_object(chunk.astype(np.float64), index=False).to_numpy()
+            row_hashes=[]
+            row_occurrences=[]
+            for row_hash in hashes.tolist():
+                occurrence=occurrences.get(row_hash, 0)
+                occurrences[row_hash]=occurrence+1
+                row_hashes.append(f"{row_hash:016x}")
+                row_occurrences.append(occurrence)
+            return row_hashes, row_occurrences
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def get_documents(self, chunk: pd.DataFrame, row_hashes: list, row_occurrences: list) -> list:
+        try:
+            documents=chunk.to_dict(orient="records")
+            # _id is left to insert_many, chunks commit out of file order and ingestion does not rely on it
+            for document, row_hash, occurrence in zip(documents, row_hashes, row_occurrences):
+                document[DATA_LOADING_ROW_HASH_FIELD]=row_hash
+                document[DATA_LOADING_ROW_OCCURRENCE_FIELD]=occurrence
+            return documents
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def insert_documents(self, collection, documents: list):
+        """
+            Unordered insert_many, rows already in the collection are counted as duplicates.
+            Returns (inserted, duplicates)
+        """
+        try:
+            try:
+                result=collection.insert_many(documents, ordered=False)
+                return len(result.inserted_ids), 0
+            except BulkWriteError as e:
+                write_errors=e.details.get("writeErrors", [])
+                if any(error.get("code")!=DUPLICATE_KEY_ERROR_CODE for error in write_errors):
+                    raise
+                return e.details.get("nInserted", len(documents)-len(write_errors)), len(write_errors)
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def load_csv(self, file_path: str, database: str, collection: str, resume: bool=True) -> dict:
+        """
+            Stream the CSV in chunks into the collection from a pool of workers. The checkpoint is
+            the set of chunks finished so far, whatever order the workers finish them in, an
+            interrupted load only sends the others and rows sent twice are rejected by the row key index
+        """
+        try:
+            start_time=time.perf_counter()
+            mongo_collection=get_mongo_connection().get_collection(database, collection)
+            # Sparse so documents loaded without row keys do not collide on a missing key
+            mongo_collection.create_index([(DATA_LOADING_ROW_HASH_FIELD, 1), (DATA_LOADING_ROW_OCCURRENCE_FIELD, 1)],
+                                          unique=True, sparse=True, name="row_key")
+
+            identity=self.get_file_identity(file_path)
+            checkpoint_file_path=self.get_checkpoint_file_path(file_path, database, collection)
+            os.makedirs(self.checkpoint_dir, exist_ok=True)
+            chunks_done=self.read_checkpoint(checkpoint_file_path, identity) if resume else set()
+            if chunks_done:
+                logging.info(f"Resuming load of {file_path}, {len(chunks_done)} chunks already loaded")
+
+            occurrences={}
+            pending={}
+            chunk_rows={}
+            summary={"chunks": 0, "rows_read": 0, "inserted": 0, "duplicates": 0, "resumed_chunks": len(chunks_done)}
+            progress={"rows_done": 0}
+
+            def collect(futures):
+                error=None
+                advanced=False
+                for future in futures:
+                    chunk_index=pending.pop(future)
+                    if future.exception() is not None:
+                        error=error or future.exception()
+                        continue
+                    inserted, duplicates=future.result()
+                    summary["inserted"]+=inserted
+                    summary["duplicates"]+=duplicates
+                    chunks_done.add(chunk_index)
+                    progress["rows_done"]+=chunk_rows.pop(chunk_index)
+                    advanced=True
+                if advanced:
+                    self.write_checkpoint(checkpoint_file_path, identity, chunks_done, progress["rows_done"])
+                if error is not None:
+                    # Chunks already sent are allowed to finish so the checkpoint covers them
+                    if pending:
+                        try:
+                            collect(wait(pending)[0])
+                        except Exception:
+                            pass
+                    raise error
+
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for chunk_index, chunk in enumerate(pd.read_csv(file_path, chunksize=self.chunk_size)):
+                    summary["chunks"]+=1
+                    summary["rows_read"]+=len(chunk)
+                    # Skipped chunks are still hashed so occurrence numbers match the first run
+                    row_hashes, row_occurrences=self.get_row_keys(chunk, occurrences)
+                    if chunk_index in chunks_done:
+                        progress["rows_done"]+=len(chunk)
+                        continue
+                    documents=self.get_documents(chunk, row_hashes, row_occurrences)
+                    chunk_rows[chunk_index]=len(chunk)
+                    pending[executor.submit(self.insert_documents, mongo_collection, documents)]=chunk_index
+                    # Bounded number of chunks in flight keeps memory flat on large files
+                    if len(pending)>=2*self.max_workers:
+                        done, _=wait(pending, return_when=FIRST_COMPLETED)
+                        collect(done)
+                done, _=wait(pending)
+                collect(done)
+
+            summary["file_path"]=file_path
+            summary["seconds"]=round(time.perf_counter()-start_time, 3)
+            logging.info(f"Loaded {file_path} into {database}.{collection}: {summary}")
+            return summary
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
 if __name__=="__main__":
-    FILE_PATH="data/phisingData.csv"
-    DATABASE="NETWORKSECURITY"
-    COLLECTION="PhisingData"
-    data_loading_Obj=MongoDBDataLoading()
-    records=data_loading_Obj.convert_csv_to_json(file_path=FILE_PATH)
-    print(records)
-    no_of_records_inserted=data_loading_Obj.insert_data_mongodb(records, DATABASE,COLLECTION)
-    print(no_of_records_inserted)
\ No newline at end of file
+    parser=argparse.ArgumentParser(description="Load a CSV feed into MongoDB")
+    parser.add_argument("--file-path", default="data/phisingData.csv")
+    parser.add_argument("--database", default=DATA_INGESTION_DATABASE_NAME)
+    parser.add_argument("--collection", default=DATA_INGESTION_COLLECTION_NAME)
+    parser.add_argument("--chunk-size", type=int, default=DATA_LOADING_CHUNK_SIZE)
+    parser.add_argument("--max-workers", type=int, default=DATA_LOADING_MAX_WORKERS)
+    parser.add_argument("--no-resume", action="store_true", help="ignore the checkpoint and send every chunk again")
+    args=parser.parse_args()
+
+    data_loading_Obj=MongoDBDataLoading(chunk_size=args.chunk_size, max_workers=args.max_workers)
+    summary=data_loading_Obj.load_csv(args.file_path, args.database, args.collection, resume=not args.no_resume)
+    print(summary)
+    close_mongo_connection()
@@ -1,43 +1,20 @@
 import sys
+import argparse
 from src.logging.logger import logging
-from src.components.model_trainer import ModelTrainer
-from src.components.data_ingestion import DataIngestion
-from src.entity.config_entity import ModelTrainerConfig
-from src.entity.config_entity import DataIngestionConfig
-from src.components.data_validation import DataValidation
-from src.entity.config_entity import DataValidationConfig
-from src.entity.config_entity import TrainingPipelineConfig
 from src.exception.exception import NetworkSecurityException
-from src.entity.config_entity import DataTransformationConfig
-from src.components.data_transformation import DataTransformation
+from src.pipeline.training_pipeline import TrainingPipeline
 
 if __name__=="__main__":
     try:
-        training_pipeline_config=TrainingPipelineConfig()
+        parser=argparse.ArgumentParser(description="Run ingestion, validation, transformation and model training")
+        parser.add_argument("--force", action="store_true", help="rerun every stage even when its cached artifact is valid")
+        args=parser.parse_args()
 
-        logging.info("Initiating Data Ingestion")
-        data_ingestion_config=DataIngestionConfig(training_pipeline_config)
-        data_ingestion=DataIngestion(data_ingestion_config)
-        data_ingestion_artifact=data_ingestion.initiate_data_ingestion()
-        logging.info("Data Ingestion Initiation Completed")
-
-        logging.info("Initiating Data Validation")
-        data_validation_config=DataValidationConfig(training_pipeline_config)
-        data_validation=DataValidation(data_ingestion_artifact, data_validation_config)
-        data_validation_artifact=data_validation.initiate_data_validation()
-        logging.info("Data Validation Initiation completed")
-
-        logging.info("Initiating Data Transformation")
-        data_transformation_config=DataTransformationConfig(training_pipeline_config)
-        data_transformation=DataTransformation(data_validation_artifact, data_transformation_config)
-        data_transformation_artifact=data_transformation.initiate_data_transformation()
-        logging.info("Data Transformation Initiation Completed")
-
-        logging.info("Initiating Model Training")
-        model_trainer_config=ModelTrainerConfig(training_pipeline_config)
-        model_trainer=ModelTrainer(data_transformation_artifact, model_trainer_config)
-        model_trainer_artifact=model_trainer.initiate_model_trainer()
-        logging.info("Model Training Initiation Completed")
+        logging.info("Initiating Training Pipeline")
+        training_pipeline=TrainingPipeline(force=args.force)
+        model_trainer_artifact=training_pipeline.run_training_stages()
+        training_pipeline.publish_serving_bundle()
+        logging.info(f"Training Pipeline Completed and Artifact: {model_trainer_artifact}")
 
     except Exception as e:
-        raise NetworkSecurityException(e, sys)
\ No newline at end of file
+        raise NetworkSecurityException(e, sys)
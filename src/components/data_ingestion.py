@@ -1,79 +1,333 @@
 import os
 import sys
 import pymongo
+import itertools
 import numpy as np
 import pandas as pd
 from typing import List
-from dotenv import load_dotenv
+from bson import ObjectId
 from src.logging.logger import logging
+from fractions import Fraction
+from collections import deque
+from datetime import timedelta
+from src.constants import SCHEMA_FILE_PATH, TARGET_COLUMN, DATA_INGESTION_SPLIT_MODES
+from src.constants import DATA_LOADING_ROW_HASH_FIELD, DATA_LOADING_ROW_OCCURRENCE_FIELD
+from src.config.mongo_db_connection import get_mongo_connection
 from sklearn.model_selection import train_test_split
 from src.entity.config_entity import DataIngestionConfig
 from src.entity.artifact_entity import DataIngestionArtifact
 from src.exception.exception import NetworkSecurityException
-
-# Configuration of Data Ingetion Config
-load_dotenv()
-MONGO_DB_URL=os.getenv("MONGO_DB_URL")
+from src.utils.main_utils.utils import read_yaml_file, write_yaml_file
+from src.utils.main_utils.utils import save_dataframe, load_dataframe, append_dataframe, get_schema_dtype_plan
+from src.utils.main_utils.utils import iter_dataframe_chunks, save_dataframe_chunks
+from src.utils.main_utils.ternary_codec import compact_array
 
 class DataIngestion:
     def __init__(self, data_ingestion_config:DataIngestionConfig):
         try:
             self.data_ingestion_config=data_ingestion_config
+            self._dtype_plan=get_schema_dtype_plan(SCHEMA_FILE_PATH)
         except Exception as e:
             raise NetworkSecurityException(e, sys)
         
-    def export_collection_as_dataframe(self):
+    def get_collection(self):
+        try:
+            database_name=self.data_ingestion_config.database_name
+            collection_name=self.data_ingestion_config.collection_name
+            # Pooled client shared with the rest of the process, not closed per call
+            return get_mongo_connection().get_collection(database_name, collection_name)
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def get_data_fingerprint(self) -> dict:
+        """
+            Identity of the collection contents used to key the stage cache. The digest is the
+            wrapping sum of the hashes of every row key, so it changes when a document is
+            added, deleted or replaced whatever the insertion order, and only the key fields are
+            read. Documents without a row key count by _id, an in-place update of their values
+            keeps the digest
+        """
+        try:
+            collection=self.get_collection()
+            batch_size=self.data_ingestion_config.batch_size
+            projection={"_id": 1, DATA_LOADING_ROW_HASH_FIELD: 1, DATA_LOADING_ROW_OCCURRENCE_FIELD: 1}
+            cursor=collection.find({}, projection=projection, batch_size=batch_size)
+            digest=0
+            num_of_documents=0
+            while True:
+                documents=list(itertools.islice(cursor, batch_size))
+                if not documents:
+                    break
+                row_keys=np.array([self.get_row_key(document) for document in documents], dtype=object)
+                digest=(digest+int(pd.util.hash_array(row_keys).sum(dtype=np.uint64)))%2**64
+                num_of_documents+=len(documents)
+            return {
+                "database_name": self.data_ingestion_config.database_name,
+                "collection_name": self.data_ingestion_config.collection_name,
+                "num_of_documents": num_of_documents,
+                "row_key_digest": f"{digest:016x}"
+            }
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def get_row_key(self, document: dict) -> str:
+        """
+            Identity of a document across runs, the row key written by the data loader or its _id
+        """
+        row_hash=document.get(DATA_LOADING_ROW_HASH_FIELD)
+        if row_hash is None:
+            return f"_id:{document['_id']}"
+        return f"{row_hash}:{document.get(DATA_LOADING_ROW_OCCURRENCE_FIELD, 0)}"
+
+    def read_watermark(self):
         """
-            Read data from MongoDB
+            State of the previous incremental run, None when there is no usable previous state.
+            window_start is the _id from which documents are read again, window_documents the
+            row keys already ingested from there on, settled_count the documents before it
+        """
+        try:
+            watermark_file_path=self.data_ingestion_config.watermark_file_path
+            feature_store_file_path=self.data_ingestion_config.incremental_feature_store_file_path
+            if not self.data_ingestion_config.incremental:
+                return None
+            if not (os.path.exists(watermark_file_path) and os.path.exists(feature_store_file_path)):
+                return None
+            watermark=read_yaml_file(watermark_file_path)
+            if (watermark.get("database_name")!=self.data_ingestion_config.database_name or
+                    watermark.get("collection_name")!=self.data_ingestion_config.collection_name or
+                    "window_start" not in watermark):
+                return None
+            return {
+                "window_start": ObjectId(watermark["window_start"]),
+                "window_documents": {key: ObjectId(object_id) for key, object_id in watermark["window_documents"].items()},
+                "settled_count": watermark["settled_count"],
+                "num_of_rows": watermark["num_of_rows"]
+            }
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def is_watermark_valid(self, collection, watermark: dict) -> bool:
+        """
+            Documents before the window are never read again, a different count means some were
+            deleted or committed later than the safety window allows, and only a full reload is
+            exact. In-place updates of a document's values are not detected
+        """
+        try:
+            settled_count=collection.count_documents({"_id": {"$lt": watermark["window_start"]}})
+            if settled_count!=watermark["settled_count"]:
+                logging.info(f"{settled_count} documents before the watermark window, {watermark['settled_count']} ingested, "
+                             f"reloading the whole collection")
+                return False
+            return True
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def export_collection_as_dataframe(self, watermark: dict=None):
+        """
+            Read data from MongoDB in cursor batches. With a watermark only the documents from its
+            window on are read and those already ingested are skipped by row key. Returns the new
+            rows and the watermark to write, None when documents of the previous window are gone
         """
         try:
             database_name=self.data_ingestion_config.database_name
             collection_name=self.data_ingestion_config.collection_name
-            self.mongo_client=pymongo.MongoClient(MONGO_DB_URL)
-            collection=self.mongo_client[database_name][collection_name]
-            df=pd.DataFrame(list(collection.find()))
+            batch_size=self.data_ingestion_config.batch_size
+            columns=[list(column.keys())[0] for column in read_yaml_file(SCHEMA_FILE_PATH)["columns"]]
+
+            collection=self.get_collection()
+
+            query={"_id": {"$gte": watermark["window_start"]}} if watermark is not None else {}
+            known_keys=set(watermark["window_documents"]) if watermark is not None else set()
+            missing_keys=set(known_keys)
+            # _id and the row key identify documents, every other field outside the schema is projected out
+            projection={column: 1 for column in columns}
+            projection.update({DATA_LOADING_ROW_HASH_FIELD: 1, DATA_LOADING_ROW_OCCURRENCE_FIELD: 1})
+            cursor=collection.find(query, projection=projection, batch_size=batch_size).sort("_id", pymongo.ASCENDING)
+
+            column_batches={column: [] for column in columns}
+            # (_id, row key) of the documents inside the safety window of the newest one, in _id order
+            window=deque()
+            num_of_documents=0
+            while True:
+                documents=list(itertools.islice(cursor, batch_size))
+                if not documents:
+                    break
+                new_documents=[]
+                for document in documents:
+                    row_key=self.get_row_key(document)
+                    window.append((document["_id"], row_key))
+                    if row_key in known_keys:
+                        missing_keys.discard(row_key)
+                    else:
+                        new_documents.append(document)
+                window_start=ObjectId.from_datetime(
+                    documents[-1]["_id"].generation_time-timedelta(seconds=self.data_ingestion_config.watermark_safety_window))
+                while window[0][0]<window_start:
+                    window.popleft()
+                if not new_documents:
+                    continue
+                for column in columns:
+                    # Batches without missing values are held as int8 until the final concatenate
+                    column_batches[column].append(compact_array(np.fromiter(
+                        (document.get(column, np.nan) for document in new_documents),
+                        dtype=np.float64, count=len(new_documents)
+                    )))
+                num_of_documents+=len(new_documents)
+            logging.info(f"Fetched {num_of_documents} new documents from {database_name}.{collection_name} "
+                         f"from {query or 'the start'}")
 
-            if "_id" in df.columns.to_list():
-                df=df.drop(columns=["_id"])
+            if missing_keys:
+                logging.info(f"{len(missing_keys)} documents ingested by the previous run are gone, reloading the whole collection")
+                return None, None
 
-            return df
+            data={}
+            for column in columns:
+                values=np.concatenate(column_batches[column]) if column_batches[column] else np.empty(0)
+                # Schema columns hold {-1, 0, 1}, keep float only where values are missing
+                data[column]=compact_array(values)
+            df=pd.DataFrame(data, columns=columns)
+
+            num_of_rows=len(df)+(watermark["num_of_rows"] if watermark is not None else 0)
+            if not window:
+                return df, None
+            return df, {
+                "window_start": window_start,
+                "window_documents": {row_key: object_id for object_id, row_key in window},
+                "settled_count": num_of_rows-len(window),
+                "num_of_rows": num_of_rows
+            }
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def write_watermark(self, watermark: dict):
+        try:
+            write_yaml_file(self.data_ingestion_config.watermark_file_path, {
+                "database_name": self.data_ingestion_config.database_name,
+                "collection_name": self.data_ingestion_config.collection_name,
+                "window_start": str(watermark["window_start"]),
+                "window_documents": {key: str(object_id) for key, object_id in watermark["window_documents"].items()},
+                "settled_count": watermark["settled_count"],
+                "num_of_rows": watermark["num_of_rows"]
+            })
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def merge_with_previous_feature_store(self, new_dataframe: pd.DataFrame, watermark: dict, has_previous: bool) -> pd.DataFrame:
+        """
+            Append the new rows to the persistent feature store, or replace it after a full
+            reload, advance the watermark and return the full history
+        """
+        try:
+            feature_store_file_path=self.data_ingestion_config.incremental_feature_store_file_path
+            os.makedirs(os.path.dirname(feature_store_file_path), exist_ok=True)
+
+            if not has_previous:
+                save_dataframe(feature_store_file_path, new_dataframe, self._dtype_plan)
+            elif len(new_dataframe):
+                append_dataframe(feature_store_file_path, new_dataframe, self._dtype_plan)
+
+            # Written after the feature store, a run interrupted in between reloads instead of skipping rows
+            if watermark is not None:
+                self.write_watermark(watermark)
+            elif os.path.exists(self.data_ingestion_config.watermark_file_path):
+                os.remove(self.data_ingestion_config.watermark_file_path)
+
+            if not has_previous:
+                return new_dataframe
+            dataframe=load_dataframe(feature_store_file_path)
+            logging.info(f"Merged {len(new_dataframe)} new rows into feature store of {len(dataframe)} rows")
+            return dataframe
         except Exception as e:
             raise NetworkSecurityException(e, sys)
         
     def export_data_into_feature_store(self, dataframe: pd.DataFrame):
         try:
             feature_store_file_path=self.data_ingestion_config.feature_store_file_path
-            dir_path=os.path.dirname(feature_store_file_path)
-            os.makedirs(dir_path, exist_ok=True)
-            dataframe.to_csv(feature_store_file_path, index=False, header=True)
+            save_dataframe(feature_store_file_path, dataframe, self._dtype_plan)
 
             return dataframe
         except Exception as e:
             raise NetworkSecurityException(e, sys)
         
+    def get_test_mask(self, chunk: pd.DataFrame, class_counts: dict) -> np.ndarray:
+        """
+            Rows of the chunk that belong to the test split. By default a row is in the test split
+            when the hash of its values falls below the split ratio, so the same row always lands
+            on the same side and identical rows never straddle the split. Stratified, the k-th row
+            of a class is in the test split when floor((k+1)*ratio) moves past floor(k*ratio),
+            class_counts carries k between chunks. Incremental runs only append to the feature
+            store, so the rows already in it keep their side
+        """
+        try:
+            train_test_split_ratio=self.data_ingestion_config.train_test_split_ratio
+            if self.data_ingestion_config.split_stratify:
+                # Exact integer arithmetic, 0.2*5 is not 1.0 in floating point
+                ratio=Fraction(train_test_split_ratio).limit_denominator(1_000_000)
+                test_mask=np.zeros(len(chunk), dtype=bool)
+                labels=chunk[TARGET_COLUMN].to_numpy()
+                for label in pd.unique(labels):
+                    rows=np.flatnonzero(labels==label)
+                    ranks=class_counts.get(label, 0)+np.arange(len(rows), dtype=np.int64)
+                    test_mask[rows]=(ranks+1)*ratio.numerator//ratio.denominator>ranks*ratio.numerator//ratio.denominator
+                    class_counts[label]=class_counts.get(label, 0)+len(rows)
+                return test_mask
+            # Hashed as float64 so a column stored as int8 in one file and float32 in another hashes the same
+            row_hashes=pd.util.hash_pandas_object(chunk.astype(np.float64), index=False).to_numpy()
+            return row_hashes<np.uint64(min(int(train_test_split_ratio*2**64), 2**64-1))
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def iter_split_chunks(self, file_path: str, test: bool):
+        class_counts={}
+        for chunk in iter_dataframe_chunks(file_path, self.data_ingestion_config.split_chunk_size):
+            test_mask=self.get_test_mask(chunk, class_counts)
+            yield chunk[test_mask] if test else chunk[~test_mask]
+
     def split_data_into_train_test(self, dataframe: pd.DataFrame):
         try:
+            split_mode=self.data_ingestion_config.split_mode
+            if split_mode not in DATA_INGESTION_SPLIT_MODES:
+                raise Exception(f"Unknown split mode: {split_mode}, expected one of {DATA_INGESTION_SPLIT_MODES}")
+            training_file_path=self.data_ingestion_config.training_file_path
+            testing_file_path=self.data_ingestion_config.testing_file_path
+
+            if split_mode=="hash":
+                # Streamed from the feature store file chunk by chunk, dataframe is not split in memory
+                feature_store_file_path=self.data_ingestion_config.feature_store_file_path
+                logging.info("Exporting hash split train and test data.")
+                save_dataframe_chunks(training_file_path,
+                                      lambda: self.iter_split_chunks(feature_store_file_path, test=False),
+                                      self._dtype_plan)
+                save_dataframe_chunks(testing_file_path,
+                                      lambda: self.iter_split_chunks(feature_store_file_path, test=True),
+                                      self._dtype_plan)
+                logging.info("Exported train and test data.")
+                return
+
             train_test_split_ratio=self.data_ingestion_config.train_test_split_ratio
             train_df, test_df = train_test_split(dataframe, 
                                                  test_size=train_test_split_ratio, 
                                                  random_state=42)
             logging.info("Performed train test split on the dataframe")
-            
-            training_file_path=self.data_ingestion_config.training_file_path
-            testing_file_path=self.data_ingestion_config.testing_file_path
-            training_dir=os.path.dirname(training_file_path)
-            os.makedirs(training_dir, exist_ok=True)
 
             logging.info("Exporting train and test data.")
-            train_df.to_csv(training_file_path, index=False, header=True)
-            test_df.to_csv(testing_file_path, index=False, header=True)
+            save_dataframe(training_file_path, train_df, self._dtype_plan)
+            save_dataframe(testing_file_path, test_df, self._dtype_plan)
             logging.info("Exported train and test data.")
         except Exception as e:
             raise NetworkSecurityException(e, sys)
         
     def initiate_data_ingestion(self):
         try:
-            dataframe=self.export_collection_as_dataframe()
+            watermark=self.read_watermark()
+            if watermark is not None and not self.is_watermark_valid(self.get_collection(), watermark):
+                watermark=None
+            dataframe, next_watermark=self.export_collection_as_dataframe(watermark)
+            if dataframe is None:
+                watermark=None
+                dataframe, next_watermark=self.export_collection_as_dataframe()
+            if self.data_ingestion_config.incremental:
+                dataframe=self.merge_with_previous_feature_store(dataframe, next_watermark, has_previous=watermark is not None)
             dataframe=self.export_data_into_feature_store(dataframe)
             self.split_data_into_train_test(dataframe)
             data_ingestion_artifact=DataIngestionArtifact(trained_file_path=self.data_ingestion_config.training_file_path,
@@ -2,14 +2,16 @@ import os
 import sys
 import numpy as np
 import pandas as pd
-from sklearn.impute import KNNImputer
 from sklearn.pipeline import Pipeline
 from src.logging.logger import logging
 from src.constants import TARGET_COLUMN
 from src.constants import DATA_TRANSFORMATION_IMPUTER_PARAMS
+from src.constants import DATA_TRANSFORMATION_IMPUTER_ENGINE
+from src.utils.ml_utils.preprocessing.imputer import build_imputer
 from src.entity.config_entity import DataTransformationConfig
 from src.exception.exception import NetworkSecurityException
-from src.utils.main_utils.utils import save_numpy_array_data, save_object
+from src.utils.main_utils.utils import save_object, load_dataframe
+from src.utils.main_utils.utils import iter_dataframe_chunks, count_dataframe_rows, save_numpy_array_chunks
 from src.entity.artifact_entity import DataTransformationArtifact, DataValidationArtifact
 
 class DataTransformation:
@@ -25,53 +27,73 @@ class DataTransformation:
     @staticmethod
     def read_data(file_path: str) -> pd.DataFrame:
         try:
-            return pd.read_csv(file_path)
+            return load_dataframe(file_path)
         except Exception as e:
             raise NetworkSecurityException(e, sys)
         
     def get_data_transformer_object(cls) -> Pipeline:
         logging.info("Entered get_data_transformer_object method of DataTransformation Class")
         try:
-            imputer=KNNImputer(**DATA_TRANSFORMATION_IMPUTER_PARAMS)
-            logging.info(f"Initialise KNNImputer with {DATA_TRANSFORMATION_IMPUTER_PARAMS}")
+            imputer=build_imputer(DATA_TRANSFORMATION_IMPUTER_ENGINE, DATA_TRANSFORMATION_IMPUTER_PARAMS)
+            logging.info(f"Initialise {DATA_TRANSFORMATION_IMPUTER_ENGINE} imputer with {DATA_TRANSFORMATION_IMPUTER_PARAMS}")
             processor=Pipeline([('imputer', imputer)])
             return processor
         except Exception as e:
             raise NetworkSecurityException(e, sys)
         
+    def get_fit_sample(self, file_path: str) -> pd.DataFrame:
+        """
+            At most fit_sample_rows rows taken at an even stride through the train split, so the
+            sample covers the whole file whether or not the split shuffled it. Every row is used
+            when the split is smaller
+        """
+        try:
+            step=max(1, -(-count_dataframe_rows(file_path)//self.data_transformation_config.fit_sample_rows))
+            chunks=[]
+            n_rows=0
+            for chunk in iter_dataframe_chunks(file_path, self.data_transformation_config.chunk_size):
+                # Position of the next sampled row inside this chunk
+                chunks.append(chunk.iloc[-n_rows%step::step])
+                n_rows+=len(chunk)
+            return pd.concat(chunks) if len(chunks)>1 else chunks[0]
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def transform_file(self, preprocessor: Pipeline, file_path: str, transformed_file_path: str) -> None:
+        """
+            Impute one split chunk by chunk and write the features with the 0/1 target as the last column
+        """
+        try:
+            def transformed_chunks():
+                for chunk in iter_dataframe_chunks(file_path, self.data_transformation_config.chunk_size):
+                    # Seperate Feature-Label
+                    input_feature_df=chunk.drop(columns=[TARGET_COLUMN])
+                    target_feature_df=chunk[TARGET_COLUMN].replace(-1, 0)
+                    yield np.c_[preprocessor.transform(input_feature_df), np.array(target_feature_df)]
+
+            # Imputed features and the 0/1 target are whole numbers unless KNN averaged a missing value
+            save_numpy_array_chunks(transformed_file_path, transformed_chunks(), count_dataframe_rows(file_path))
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
     def initiate_data_transformation(self) -> DataTransformationArtifact:
         logging.info("Entered initiate_data_transformation method of DataTransformation class")
         try:
             logging.info("Starting Data Transformation")
-            train_df=DataTransformation.read_data(self.data_validation_artifact.valid_train_file_path)
-            test_df=DataTransformation.read_data(self.data_validation_artifact.valid_test_file_path)
+            train_file_path=self.data_validation_artifact.valid_train_file_path
+            test_file_path=self.data_validation_artifact.valid_test_file_path
 
-            # Seperate Feature-Label for Train Data
-            input_feature_train_df=train_df.drop(columns=[TARGET_COLUMN], axis=1)
-            target_feature_train_df=train_df[TARGET_COLUMN]
-            target_feature_train_df=target_feature_train_df.replace(-1, 0)
-            # Seperate Feature-Label for Test Data
-            input_feature_test_df=test_df.drop(columns=[TARGET_COLUMN], axis=1)
-            target_feature_test_df=test_df[TARGET_COLUMN]
-            target_feature_test_df=target_feature_test_df.replace(-1, 0)
-
-            # Perform tranformation using KNN Imputer
+            # Fit the configured imputer on a bounded sample, then stream both splits through it
+            fit_sample_df=self.get_fit_sample(train_file_path)
             preprocessor=self.get_data_transformer_object()
-            preprocessor_object=preprocessor.fit(input_feature_train_df)
-            tranformed_input_train_feature=preprocessor_object.transform(input_feature_train_df)
-            tranformed_input_test_feature=preprocessor_object.transform(input_feature_test_df)
-            
-            # Combine Feature-Lable for Train & Test Data in numpy array
-            train_arr=np.c_[tranformed_input_train_feature, np.array(target_feature_train_df)]
-            test_arr=np.c_[tranformed_input_test_feature, np.array(target_feature_test_df)]
+            preprocessor_object=preprocessor.fit(fit_sample_df.drop(columns=[TARGET_COLUMN]))
+            logging.info(f"Fitted the preprocessor on {len(fit_sample_df)} rows")
+            del fit_sample_df
 
-            # Save numpy array data
-            save_numpy_array_data(self.data_transformation_config.transformed_train_file_path, train_arr)
-            save_numpy_array_data(self.data_transformation_config.transformed_test_file_path, test_arr)
+            self.transform_file(preprocessor_object, train_file_path, self.data_transformation_config.transformed_train_file_path)
+            self.transform_file(preprocessor_object, test_file_path, self.data_transformation_config.transformed_test_file_path)
             save_object(self.data_transformation_config.transformed_object_file_path, preprocessor_object)
 
-            save_object("best_model/preprocessor.pkl", preprocessor_object)
-
             # Prepare artifact
             data_transformation_artifact=DataTransformationArtifact(
                 transformed_object_file_path=self.data_transformation_config.transformed_object_file_path,
@@ -1,14 +1,16 @@
 import os
 import sys
 import pandas as pd
-from scipy.stats import ks_2samp
 from src.logging.logger import logging
-from src.constants import SCHEMA_FILE_PATH
+from src.constants import SCHEMA_FILE_PATH, TARGET_COLUMN
+from src.constants import DATA_VALIDATION_FEATURE_VALUES
 from src.entity.config_entity import DataValidationConfig
 from src.utils.main_utils.utils import read_yaml_file, write_yaml_file
+from src.utils.main_utils.utils import save_dataframe, load_dataframe, get_schema_dtype_plan
 from src.entity.artifact_entity import DataIngestionArtifact
 from src.exception.exception import NetworkSecurityException
 from src.entity.artifact_entity import DataValidationArtifact
+from src.utils.ml_utils.metric.drift_metric import build_drift_reference, detect_drift_from_reference
 
 class DataValidation:
     def __init__(self, 
@@ -18,19 +20,20 @@ class DataValidation:
             self.data_ingestion_artifact=data_ingestion_artifact
             self.data_validation_config=data_validation_config
             self._schema_config=read_yaml_file(SCHEMA_FILE_PATH)
+            self._dtype_plan=get_schema_dtype_plan(SCHEMA_FILE_PATH)
         except Exception as e:
             raise NetworkSecurityException(e, sys)
         
     @staticmethod
     def read_data(file_path: str) -> pd.DataFrame:
         try:
-            return pd.read_csv(file_path)
+            return load_dataframe(file_path)
         except Exception as e:
             raise NetworkSecurityException(e, sys)
         
     def validate_num_of_columns(self, dataframe: pd.DataFrame) -> bool:
         try:
-            num_of_schema_columns=len(self._schema_config)
+            num_of_schema_columns=len(self._schema_config["columns"])
             num_of_dataframe_columns=len(dataframe.columns)
             logging.info(f"Required number of columns: {num_of_schema_columns}")
             logging.info(f"Number of columns in Dataframe: {num_of_dataframe_columns}")
@@ -40,31 +43,28 @@ class DataValidation:
         except Exception as e:
             raise NetworkSecurityException(e, sys)
         
-    def detect_data_drift(self, base_df, current_df, threshold=0.05) -> bool:
+    def detect_data_drift(self, base_df, current_df, threshold=None) -> bool:
+        """
+            Histograms of the base_df features are stored as the drift reference, current_df is
+            checked against them with KS, chi-square and PSI. The target is left out, incoming
+            prediction batches do not carry it and a label shift is not feature drift
+        """
         try:
-            status=True
-            report={}
-            for column in base_df.columns:
-                d1=base_df[column]
-                d2=current_df[column]
-                is_same_dist=ks_2samp(d1, d2)
-                if threshold <= is_same_dist.pvalue:
-                    is_found=False
-                else:
-                    is_found=True
-                    status=False
-                report.update({
-                    column: {
-                        "p_value": float(is_same_dist.pvalue),
-                        "drift_status":is_found
-                    }
-                })
+            if threshold is None:
+                threshold=self.data_validation_config.drift_threshold
+            columns=[column for column in base_df.columns if column!=TARGET_COLUMN]
+            drift_reference=build_drift_reference(base_df, columns, DATA_VALIDATION_FEATURE_VALUES)
+            write_yaml_file(file_path=self.data_validation_config.drift_reference_file_path, content=drift_reference)
+
+            status, report=detect_drift_from_reference(drift_reference, current_df, threshold=threshold,
+                                                       psi_threshold=self.data_validation_config.psi_threshold)
             drift_report_file_path=self.data_validation_config.drift_report_file_path
 
             # Create directory
             dir_path=os.path.dirname(drift_report_file_path)
             os.makedirs(dir_path, exist_ok=True)
             write_yaml_file(file_path=drift_report_file_path, content=report)
+            return status
         except Exception as e:
             raise NetworkSecurityException(e, sys)
         
@@ -87,11 +87,8 @@ class DataValidation:
 
             # Check Data drift and save data under validated dir
             status=self.detect_data_drift(base_df=train_df, current_df=test_df)
-            dir_path=os.path.dirname(self.data_validation_config.valid_train_file_path)
-            os.makedirs(dir_path, exist_ok=True)
-
-            train_df.to_csv(self.data_validation_config.valid_train_file_path, index=False, header=True)
-            test_df.to_csv(self.data_validation_config.valid_test_file_path, index=False, header=True)
+            save_dataframe(self.data_validation_config.valid_train_file_path, train_df, self._dtype_plan)
+            save_dataframe(self.data_validation_config.valid_test_file_path, test_df, self._dtype_plan)
 
             data_validation_artifact=DataValidationArtifact(
                 validation_status=status,
@@ -99,7 +96,8 @@ class DataValidation:
                 valid_test_file_path=self.data_validation_config.valid_test_file_path,
                 invalid_train_file_path=None,
                 invalid_test_file_path=None,
-                drift_report_file_path=self.data_validation_config.drift_report_file_path
+                drift_report_file_path=self.data_validation_config.drift_report_file_path,
+                drift_reference_file_path=self.data_validation_config.drift_reference_file_path
             )
 
             return data_validation_artifact
@@ -5,20 +5,27 @@ import numpy as np
 from dotenv import load_dotenv
 from src.logging.logger import logging
 from mlflow.models import infer_signature
-from sklearn.linear_model import LogisticRegression
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.neural_network import MLPClassifier
 from sklearn.neighbors import KNeighborsClassifier
 from sklearn.tree import DecisionTreeClassifier
+from sklearn.pipeline import Pipeline
 from sklearn.ensemble import (
     AdaBoostClassifier, 
     GradientBoostingClassifier,
+    HistGradientBoostingClassifier,
     RandomForestClassifier
 )
+from src.constants import MODEL_TRAINER_TRAINING_MODES
 from src.entity.config_entity import ModelTrainerConfig
 from src.utils.ml_utils.model.estimator import NetworkModel
+from src.utils.ml_utils.preprocessing.binning import FeatureBinner
 from src.exception.exception import NetworkSecurityException
 from src.utils.ml_utils.metric.classification_metric import get_classification_score
 from src.entity.artifact_entity import DataTransformationArtifact, ModelTrainerArtifact
-from src.utils.main_utils.utils import save_object, load_object, load_numpy_array_data, evaluate_models
+from src.utils.main_utils.utils import save_object, load_object, load_numpy_array_data, write_yaml_file
+from src.utils.ml_utils.model.model_search import evaluate_models
+from src.utils.ml_utils.model.out_of_core import evaluate_out_of_core_models, predict_in_chunks
 
 load_dotenv()
 if os.getenv("ENABLE_DAGSHUB", "False") == "True":
@@ -49,14 +56,22 @@ class ModelTrainer:
         except Exception as e:
             raise NetworkSecurityException(e, sys)
 
-    def train_model(self, x_train: np.array, y_train: np.array, x_test: np.array, y_test: np.array):
+    def get_search_space(self):
+        """
+            Candidate models and their hyperparameter grids
+        """
         try:
             models = {
                 "Random Forest": RandomForestClassifier(verbose=1),
                 "Decision Tree": DecisionTreeClassifier(),
                 "Gradient Boosting": GradientBoostingClassifier(verbose=1),
                 "Logistic Regression": LogisticRegression(verbose=1),
-                "AdaBoost": AdaBoostClassifier()
+                "AdaBoost": AdaBoostClassifier(),
+                # uint8 bin codes of the ternary features, boosting stops once the internal validation score stalls
+                "Hist Gradient Boosting": Pipeline([
+                    ("binner", FeatureBinner()),
+                    ("model", HistGradientBoostingClassifier(max_iter=500, early_stopping=True, random_state=42))
+                ])
             }
             params={
                 "Decision Tree": {
@@ -82,25 +97,67 @@ class ModelTrainer:
                 "AdaBoost":{
                     'learning_rate':[.1,.01,.001],
                     'n_estimators': [8,16,32,64,128,256]
-                }  
+                },
+                "Hist Gradient Boosting":{
+                    'model__learning_rate':[.05,.1,.2],
+                    'model__max_leaf_nodes':[15,31]
+                }
+            }
+
+            return models, params
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def get_out_of_core_models(self):
+        """
+            Candidates trained with partial_fit on one chunk at a time, their memory does not grow with the data
+        """
+        try:
+            models = {
+                "SGD Logistic Regression": SGDClassifier(loss="log_loss", random_state=42),
+                "SGD Linear SVM": SGDClassifier(loss="hinge", random_state=42),
+                "Incremental MLP": MLPClassifier(hidden_layer_sizes=(32,), random_state=42)
             }
+            return models
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
 
-            model_report:dict=evaluate_models(x_train, y_train, x_test, y_test, models, params)
+    def train_model(self, x_train: np.array, y_train: np.array, x_test: np.array, y_test: np.array):
+        try:
+            training_mode=self.model_trainer_config.training_mode
+            if training_mode not in MODEL_TRAINER_TRAINING_MODES:
+                raise Exception(f"Unknown training mode: {training_mode}, expected one of {MODEL_TRAINER_TRAINING_MODES}")
+            chunk_size=self.model_trainer_config.out_of_core_chunk_size
+
+            models, model_report={}, {}
+            if training_mode in ("in_memory", "both"):
+                models, params=self.get_search_space()
+                model_report.update(evaluate_models(x_train, y_train, x_test, y_test, models, params,
+                                                    n_jobs=self.model_trainer_config.n_jobs,
+                                                    search_mode=self.model_trainer_config.search_mode,
+                                                    time_budget=self.model_trainer_config.search_time_budget,
+                                                    halving_factor=self.model_trainer_config.halving_factor))
+            if training_mode in ("out_of_core", "both"):
+                out_of_core_models=self.get_out_of_core_models()
+                model_report.update(evaluate_out_of_core_models(x_train, y_train, x_test, y_test, out_of_core_models,
+                                                                chunk_size=chunk_size,
+                                                                epochs=self.model_trainer_config.out_of_core_epochs))
+                models.update(out_of_core_models)
+            write_yaml_file(self.model_trainer_config.search_report_file_path, model_report)
 
             # Get best model score and best model name
-            best_model_score=max(sorted(model_report.values()))
-            best_model_name=list(model_report.keys())[
-                list(model_report.values()).index(best_model_score)
-            ]
+            best_model_name=max(model_report, key=lambda model_name: model_report[model_name]["test_score"])
             best_model=models[best_model_name]
+            logging.info(f"Best model: {best_model_name} with test score {model_report[best_model_name]['test_score']}")
             
-            y_train_pred=best_model.predict(x_train)
+            # Predicted in chunks so the memory-mapped arrays are never copied whole
+            y_train_pred=predict_in_chunks(best_model, x_train, chunk_size)
             classification_train_metric=get_classification_score(y_train, y_train_pred)
             
             # Track the experiments with mlflow for training data
             self.track_mlflow(best_model, classification_train_metric, x_train, y_train)
 
-            y_test_pred=best_model.predict(x_test)
+            y_test_pred=predict_in_chunks(best_model, x_test, chunk_size)
             classification_test_metric=get_classification_score(y_test, y_test_pred)
 
             # Track the experiments with mlflow for test data
@@ -111,9 +168,7 @@ class ModelTrainer:
             os.makedirs(model_dir_path, exist_ok=True)
 
             network_model=NetworkModel(preprocessor, best_model)
-            save_object(self.model_trainer_config.trained_model_file_path, obj=NetworkModel)
-
-            save_object("best_model/model.pkl", best_model)
+            save_object(self.model_trainer_config.trained_model_file_path, obj=network_model)
             
             # Create model trainer artifact
             model_trainer_artifact=ModelTrainerArtifact(
@@ -133,9 +188,9 @@ class ModelTrainer:
             train_file_path=self.data_transformation_artifact.transformed_train_file_path
             test_file_path=self.data_transformation_artifact.transformed_test_file_path
 
-            # Loading training array and testing array
-            train_arr=load_numpy_array_data(train_file_path)
-            test_arr=load_numpy_array_data(test_file_path)
+            # Loading training array and testing array memory-mapped, the search workers reopen the same files
+            train_arr=load_numpy_array_data(train_file_path, mmap=True)
+            test_arr=load_numpy_array_data(test_file_path, mmap=True)
 
             # Feature-label split
             x_train, y_train, x_test, y_test=(
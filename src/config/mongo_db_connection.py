@@ -0,0 +1,153 @@
+import os
+import sys
+import certifi
+import threading
+from dotenv import load_dotenv
+from src.logging.logger import logging
+from src.exception.exception import NetworkSecurityException
+from src.constants import (
+    MONGO_DB_URL_ENV_KEY,
+    MONGO_DB_MOCK_URL_SCHEME,
+    MONGO_DB_MAX_POOL_SIZE,
+    MONGO_DB_MIN_POOL_SIZE,
+    MONGO_DB_MAX_IDLE_TIME_MS,
+    MONGO_DB_CONNECT_TIMEOUT_MS,
+    MONGO_DB_SERVER_SELECTION_TIMEOUT_MS,
+    MONGO_DB_SOCKET_TIMEOUT_MS,
+    MONGO_DB_SERVER_API_VERSION
+)
+
+class MongoDBConnection:
+    """
+        Lazily created MongoClient. pymongo pools connections inside the client,
+        so one instance per process serves every component. A mongomock:// URL
+        gives an in-process stand-in that needs no server
+    """
+    def __init__(self,
+                 url: str=None,
+                 max_pool_size: int=MONGO_DB_MAX_POOL_SIZE,
+                 min_pool_size: int=MONGO_DB_MIN_POOL_SIZE,
+                 max_idle_time_ms: int=MONGO_DB_MAX_IDLE_TIME_MS,
+                 connect_timeout_ms: int=MONGO_DB_CONNECT_TIMEOUT_MS,
+                 server_selection_timeout_ms: int=MONGO_DB_SERVER_SELECTION_TIMEOUT_MS,
+                 socket_timeout_ms: int=MONGO_DB_SOCKET_TIMEOUT_MS,
+                 server_api_version: str=MONGO_DB_SERVER_API_VERSION):
+        try:
+            if url is None:
+                load_dotenv()
+                url=os.getenv(MONGO_DB_URL_ENV_KEY)
+            if not url:
+                raise Exception(f"{MONGO_DB_URL_ENV_KEY} is not set")
+            self.url=url
+            self.max_pool_size=max_pool_size
+            self.min_pool_size=min_pool_size
+            self.max_idle_time_ms=max_idle_time_ms
+            self.connect_timeout_ms=connect_timeout_ms
+            self.server_selection_timeout_ms=server_selection_timeout_ms
+            self.socket_timeout_ms=socket_timeout_ms
+            self.server_api_version=server_api_version
+            self._client=None
+            self._pid=None
+            self._lock=threading.Lock()
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    @property
+    def is_mock(self) -> bool:
+        return self.url.startswith(MONGO_DB_MOCK_URL_SCHEME)
+
+    def _create_client(self):
+        if self.is_mock:
+            try:
+                import mongomock
+            except ImportError:
+                raise Exception(f"{MONGO_DB_MOCK_URL_SCHEME} URLs need mongomock, pip install mongomock")
+            return mongomock.MongoClient()
+
+        import pymongo
+        options={}
+        if self.url.startswith("mongodb+srv://"):
+            # Atlas clusters use TLS, verify them against the certifi bundle
+            options["tlsCAFile"]=certifi.where()
+        if self.server_api_version is not None:
+            from pymongo.server_api import ServerApi
+            options["server_api"]=ServerApi(self.server_api_version)
+        return pymongo.MongoClient(self.url,
+                                   maxPoolSize=self.max_pool_size,
+                                   minPoolSize=self.min_pool_size,
+                                   maxIdleTimeMS=self.max_idle_time_ms,
+                                   connectTimeoutMS=self.connect_timeout_ms,
+                                   serverSelectionTimeoutMS=self.server_selection_timeout_ms,
+                                   socketTimeoutMS=self.socket_timeout_ms,
+                                   **options)
+
+    def get_client(self):
+        try:
+            with self._lock:
+                # MongoClient is not fork safe, a forked child opens its own pool
+                if self._client is None or self._pid!=os.getpid():
+                    self._client=self._create_client()
+                    self._pid=os.getpid()
+                    logging.info(f"Created {'mongomock' if self.is_mock else 'MongoDB'} client "
+                                 f"with max pool size {self.max_pool_size}")
+                return self._client
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def get_collection(self, database_name: str, collection_name: str):
+        try:
+            return self.get_client()[database_name][collection_name]
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def close(self):
+        try:
+            with self._lock:
+                if self._client is not None:
+                    # The mock client has no connections and closing it would drop its data
+                    if not self.is_mock and self._pid==os.getpid():
+                        self._client.close()
+                    self._client=None
+                    self._pid=None
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+_connection=None
+_connection_lock=threading.Lock()
+
+def get_mongo_connection() -> MongoDBConnection:
+    """
+        Connection shared by every component of the process, configured from MONGO_DB_URL
+    """
+    global _connection
+    try:
+        with _connection_lock:
+            if _connection is None:
+                _connection=MongoDBConnection()
+            return _connection
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+def set_mongo_connection(connection: MongoDBConnection) -> MongoDBConnection:
+    """
+        Replace the shared connection, e.g. with a mongomock:// one for offline runs
+    """
+    global _connection
+    try:
+        with _connection_lock:
+            if _connection is not None and _connection is not connection:
+                _connection.close()
+            _connection=connection
+            return _connection
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+def close_mongo_connection():
+    global _connection
+    try:
+        with _connection_lock:
+            if _connection is not None:
+                _connection.close()
+                _connection=None
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
@@ -17,6 +17,17 @@ TEST_FILE_NAME: str = "test.csv"
 SCHEMA_FILE_PATH = os.path.join("data_schema", "schema.yaml")
 MODEL_FILE_NAME = "model.pkl"
 
+## format of the dataframes passed between pipeline stages: csv, npy (memory-mappable int8 columns), parquet or
+## packed (2 bits per {-1, 0, 1} value). parquet and packed files are loaded and rewritten whole when appended to
+## or written in chunks, large and incrementally grown artifacts should stay csv or npy
+ARTIFACT_FILE_FORMATS: list = ["csv", "npy", "parquet", "packed"]
+ARTIFACT_FILE_FORMAT: str = "npy"
+
+## stage artifacts are reused across runs when the hash of their inputs is unchanged
+STAGE_CACHE_DIR_NAME: str = "stage_cache"
+STAGE_CACHE_ENABLED: bool = True
+PIPELINE_SUMMARY_FILE_NAME: str = "pipeline_summary.yaml"
+
 """
 Data Ingestion related constant start with DATA_INGESTION VAR NAME
 """
@@ -26,6 +37,51 @@ DATA_INGESTION_DIR_NAME: str = "data_ingestion"
 DATA_INGESTION_FEATURE_STORE_DIR: str = "feature_store"
 DATA_INGESTION_INGESTED_DIR: str = "ingested"
 DATA_INGESTION_TRAIN_TEST_SPLIT_RATIO: float = 0.2
+## documents fetched per cursor round trip and converted to numpy per batch
+DATA_INGESTION_BATCH_SIZE: int = 5000
+## only pull documents newer than the watermark and merge them with the previous feature store
+DATA_INGESTION_INCREMENTAL: bool = True
+DATA_INGESTION_WATERMARK_FILE_NAME: str = "watermark.yaml"
+## loaders insert in parallel, so a document can commit after others with a larger _id. Every run reads
+## again the documents created this many seconds before the newest ingested one and skips those it
+## already holds by row key, it must exceed the longest a chunk insert takes
+DATA_INGESTION_WATERMARK_SAFETY_WINDOW_SECONDS: float = 600.0
+## random: train_test_split on the whole dataframe, hash: each row assigned by the hash
+## of its values while the feature store is streamed, stable across incremental runs
+DATA_INGESTION_SPLIT_MODES: list = ["random", "hash"]
+DATA_INGESTION_SPLIT_MODE: str = "random"
+## hash mode only: assign each class by its rows' rank in ingestion order instead of the
+## hash, every class then gets the split ratio to within one row
+DATA_INGESTION_SPLIT_STRATIFY: bool = False
+DATA_INGESTION_SPLIT_CHUNK_SIZE: int = 100_000
+
+"""
+MongoDB connection related constant start with MONGO_DB VAR NAME
+"""
+MONGO_DB_URL_ENV_KEY: str = "MONGO_DB_URL"
+## URLs with this scheme are served by an in-process mongomock client, for offline runs and benchmarks
+MONGO_DB_MOCK_URL_SCHEME: str = "mongomock://"
+## one pooled client per process, shared by ingestion and the data loader
+MONGO_DB_MAX_POOL_SIZE: int = 20
+MONGO_DB_MIN_POOL_SIZE: int = 0
+MONGO_DB_MAX_IDLE_TIME_MS: int = 60000
+MONGO_DB_CONNECT_TIMEOUT_MS: int = 10000
+MONGO_DB_SERVER_SELECTION_TIMEOUT_MS: int = 30000
+MONGO_DB_SOCKET_TIMEOUT_MS: int = 120000
+## Stable API version declared to the server, as the original connection check did. None leaves it undeclared
+MONGO_DB_SERVER_API_VERSION: str = "1"
+
+"""
+Data Loading related constant start with DATA_LOADING VAR NAME
+"""
+## CSV rows read, hashed and sent per unordered insert_many
+DATA_LOADING_CHUNK_SIZE: int = 5000
+DATA_LOADING_MAX_WORKERS: int = 4
+## documents carry the hash of their values and its occurrence number in the file,
+## a unique index on the pair makes re-running a load idempotent
+DATA_LOADING_ROW_HASH_FIELD: str = "row_hash"
+DATA_LOADING_ROW_OCCURRENCE_FIELD: str = "row_occurrence"
+DATA_LOADING_CHECKPOINT_DIR: str = os.path.join(ARTIFACT_DIR, "data_loading")
 
 """
 Data Validation related constant start with DATA_VALIDATION VAR NAME
@@ -35,6 +91,11 @@ DATA_VALIDATION_VALID_DIR: str = "validated"
 DATA_VALIDATION_INVALID_DIR: str = "invalid"
 DATA_VALIDATION_DRIFT_REPORT_DIR: str = "drift_report"
 DATA_VALIDATION_DRIFT_REPORT_FILE_NAME: str = "report.yaml"
+## value histograms of the training data that drift checks run against
+DATA_VALIDATION_DRIFT_REFERENCE_FILE_NAME: str = "reference.yaml"
+DATA_VALIDATION_FEATURE_VALUES: list = [-1, 0, 1]
+DATA_VALIDATION_DRIFT_THRESHOLD: float = 0.05
+DATA_VALIDATION_PSI_THRESHOLD: float = 0.2
 PREPROCESSING_OBJECT_FILE_NAME = "preprocessing.pkl"
 
 """
@@ -50,6 +111,14 @@ DATA_TRANSFORMATION_IMPUTER_PARAMS: dict = {
     "n_neighbors": 3,
     "weights": "uniform",
 }
+## knn: plain KNNImputer, fast_path: exact KNN that skips complete rows,
+## most_frequent: per-column lookup that does not keep the training matrix
+DATA_TRANSFORMATION_IMPUTER_ENGINES: list = ["knn", "fast_path", "most_frequent"]
+DATA_TRANSFORMATION_IMPUTER_ENGINE: str = "fast_path"
+## rows read, imputed and written per chunk, the valid data is never loaded whole
+DATA_TRANSFORMATION_CHUNK_SIZE: int = 100_000
+## the imputer is fitted on rows taken at an even stride through the train split, KNN keeps them in memory
+DATA_TRANSFORMATION_FIT_SAMPLE_ROWS: int = 250_000
 DATA_TRANSFORMATION_TRAIN_FILE_PATH: str = "train.npy"
 
 DATA_TRANSFORMATION_TEST_FILE_PATH: str = "test.npy"
@@ -64,5 +133,106 @@ MODEL_TRAINER_TRAINED_MODEL_DIR: str = "trained_model"
 MODEL_TRAINER_TRAINED_MODEL_NAME: str = "model.pkl"
 MODEL_TRAINER_EXPECTED_SCORE: float = 0.6
 MODEL_TRAINER_OVER_FIITING_UNDER_FITTING_THRESHOLD: float = 0.05
+MODEL_TRAINER_SEARCH_REPORT_FILE_NAME: str = "search_report.yaml"
+## the serving files of a run are built here and only published to MODEL_SERVING_DIR once training succeeded
+MODEL_TRAINER_SERVING_BUNDLE_DIR: str = "serving_bundle"
+## number of worker processes for the model search, -1 uses every core
+MODEL_TRAINER_N_JOBS: int = -1
+## grid: exhaustive search, halving: successive halving over the training sample size
+MODEL_TRAINER_SEARCH_MODE: str = "grid"
+MODEL_TRAINER_HALVING_FACTOR: int = 3
+## wall-clock budget in seconds for the halving search, None runs every round
+MODEL_TRAINER_SEARCH_TIME_BUDGET: float = 120.0
+## in_memory: grid search only, out_of_core: partial_fit candidates streamed from the
+## memory-mapped arrays only, both: the streamed candidates compete with the grid.
+## out_of_core and both are opt-in for data that outgrows the in-memory search
+MODEL_TRAINER_TRAINING_MODES: list = ["in_memory", "out_of_core", "both"]
+MODEL_TRAINER_TRAINING_MODE: str = "in_memory"
+MODEL_TRAINER_OUT_OF_CORE_CHUNK_SIZE: int = 50_000
+## passes over the training array, chunks are visited in a new random order on every pass
+MODEL_TRAINER_OUT_OF_CORE_EPOCHS: int = 20
+
+TRAINING_BUCKET_NAME = "075318387084networksecurity"
+
+"""
+Model Serving related constant start with MODEL_SERVING VAR NAME
+"""
+MODEL_SERVING_DIR: str = "best_model"
+MODEL_SERVING_PREPROCESSOR_FILE_NAME: str = "preprocessor.pkl"
+MODEL_SERVING_MODEL_FILE_NAME: str = "model.pkl"
+MODEL_SERVING_DRIFT_REFERENCE_FILE_NAME: str = "drift_reference.yaml"
+MODEL_SERVING_RELOAD_INTERVAL_SECONDS: float = 5.0
+MODEL_SERVING_BUNDLE_FILE_NAME: str = "network_model.joblib"
+## published bundles live in MODEL_SERVING_DIR/releases/<name>, CURRENT holds the name of the served one
+MODEL_SERVING_RELEASES_DIR: str = "releases"
+MODEL_SERVING_CURRENT_FILE_NAME: str = "CURRENT"
+## releases kept besides the served one, older ones are deleted when a new bundle is published
+MODEL_SERVING_RELEASE_HISTORY: int = 3
+MODEL_SERVING_MMAP_MODE: str = "r"
+MODEL_SERVING_HOST: str = "0.0.0.0"
+MODEL_SERVING_PORT: int = 8080
+## every worker holds its own prediction cache, micro-batcher, output sink and /metrics counters
+MODEL_SERVING_WORKERS: int = 1
+
+"""
+Model Inference related constant start with MODEL_INFERENCE VAR NAME
+"""
+## compiled is opt-in: tree ensembles are flattened into node arrays and walked vectorized
+MODEL_INFERENCE_BACKENDS: list = ["sklearn", "compiled"]
+MODEL_INFERENCE_BACKEND: str = "sklearn"
+MODEL_INFERENCE_BLOCK_SIZE: int = 1 << 16
+## batches above this size go through sklearn predict even with the compiled backend
+MODEL_INFERENCE_COMPILED_MAX_ROWS: int = 256
 
-TRAINING_BUCKET_NAME = "075318387084networksecurity"
\ No newline at end of file
+"""
+Training Job related constant start with TRAINING_JOB VAR NAME
+"""
+TRAINING_JOB_HISTORY_SIZE: int = 100
+TRAINING_JOB_POLL_INTERVAL_SECONDS: float = 0.5
+## one JSON file per job, shared by the app workers, training only starts while holding the lock file
+TRAINING_JOB_STORE_DIR: str = os.path.join(ARTIFACT_DIR, "training_jobs")
+TRAINING_JOB_LOCK_FILE_NAME: str = "training.lock"
+
+"""
+Prediction related constant start with PREDICTION VAR NAME
+"""
+PREDICTION_OUTPUT_DIR: str = "prediction_output"
+PREDICTION_OUTPUT_QUEUE_SIZE: int = 64
+## prediction files kept in PREDICTION_OUTPUT_DIR, the oldest are deleted after each write, None keeps all
+PREDICTION_OUTPUT_MAX_FILES: int = 1000
+PREDICTION_COLUMN_NAME: str = "predicted_column"
+PREDICTION_STREAM_CHUNK_SIZE: int = 10000
+## upper bound of the chunk_size query parameter, larger chunks would undo the streaming
+PREDICTION_STREAM_MAX_CHUNK_SIZE: int = 100000
+PREDICTION_STREAM_FORMATS: list = ["csv", "ndjson"]
+PREDICTION_PREVIEW_ROWS: int = 100
+PREDICTION_MICRO_BATCH_MAX_SIZE: int = 256
+PREDICTION_MICRO_BATCH_MAX_WAIT_SECONDS: float = 0.005
+PREDICTION_CACHE_ENABLED: bool = True
+PREDICTION_CACHE_MAX_SIZE: int = 100000
+PREDICTION_CACHE_TTL_SECONDS: float = 3600.0
+
+"""
+Instrumentation related constant start with INSTRUMENTATION VAR NAME
+"""
+## timers become no-ops when disabled, /metrics then only reports the serving counters
+INSTRUMENTATION_ENABLED: bool = True
+INSTRUMENTATION_METRIC_PREFIX: str = "network_security"
+## histogram upper bounds in seconds, from single-row predictions up to full training stages
+INSTRUMENTATION_HISTOGRAM_BUCKETS: list = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                                           1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0]
+
+"""
+Load Test related constant start with LOAD_TEST VAR NAME
+"""
+LOAD_TEST_DATA_FILE_PATH: str = os.path.join("data", "phisingData.csv")
+LOAD_TEST_ENDPOINT: str = "/predict/records"
+## csv uploads a file, records posts {"records": [...]}, none sends a GET
+LOAD_TEST_PAYLOAD_KINDS: list = ["csv", "records", "none"]
+LOAD_TEST_CONCURRENCY: int = 8
+LOAD_TEST_ROWS_PER_REQUEST: int = 1
+LOAD_TEST_DURATION_SECONDS: float = 10.0
+LOAD_TEST_WARMUP_SECONDS: float = 1.0
+LOAD_TEST_TIMEOUT_SECONDS: float = 30.0
+## distinct request bodies built up front and sent round robin
+LOAD_TEST_PAYLOAD_POOL_SIZE: int = 64
@@ -13,6 +13,7 @@ class DataValidationArtifact:
     invalid_train_file_path: str
     invalid_test_file_path: str
     drift_report_file_path: str
+    drift_reference_file_path: str
 
 @dataclass
 class DataTransformationArtifact:
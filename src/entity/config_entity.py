@@ -2,6 +2,12 @@ import os
 from src import constants
 from datetime import datetime
 
+def get_artifact_file_name(file_name: str) -> str:
+    """
+        Swap the extension of a dataframe artifact for the configured ARTIFACT_FILE_FORMAT
+    """
+    return f"{os.path.splitext(file_name)[0]}.{constants.ARTIFACT_FILE_FORMAT}"
+
 class TrainingPipelineConfig:
     def __init__(self, timestamp=datetime.now()):
         timestamp=timestamp.strftime("%m_%d_%Y_%H_%M_%S")
@@ -9,6 +15,8 @@ class TrainingPipelineConfig:
         self.artifact_name=constants.ARTIFACT_DIR
         self.artifact_dir=os.path.join(self.artifact_name,timestamp)
         self.model_dir=os.path.join("best_model")
+        self.stage_cache_dir=os.path.join(self.artifact_name, constants.STAGE_CACHE_DIR_NAME)
+        self.pipeline_summary_file_path=os.path.join(self.artifact_dir, constants.PIPELINE_SUMMARY_FILE_NAME)
         self.timestamp:str=timestamp
 
 class DataIngestionConfig:
@@ -20,19 +28,36 @@ class DataIngestionConfig:
         self.feature_store_file_path: str = os.path.join(
             self.data_ingestion_dir, 
             constants.DATA_INGESTION_FEATURE_STORE_DIR, 
-            constants.FILE_NAME
+            get_artifact_file_name(constants.FILE_NAME)
         )
         self.training_file_path: str = os.path.join(
             self.data_ingestion_dir, 
             constants.DATA_INGESTION_INGESTED_DIR, 
-            constants.TRAIN_FILE_NAME
+            get_artifact_file_name(constants.TRAIN_FILE_NAME)
         )
         self.testing_file_path: str = os.path.join(
             self.data_ingestion_dir, 
             constants.DATA_INGESTION_INGESTED_DIR, 
-            constants.TEST_FILE_NAME
+            get_artifact_file_name(constants.TEST_FILE_NAME)
+        )
+        # Incremental state lives outside the timestamped run directory so it survives between runs
+        self.incremental_feature_store_file_path: str = os.path.join(
+            training_pipeline_config.artifact_name,
+            constants.DATA_INGESTION_FEATURE_STORE_DIR,
+            get_artifact_file_name(constants.FILE_NAME)
+        )
+        self.watermark_file_path: str = os.path.join(
+            training_pipeline_config.artifact_name,
+            constants.DATA_INGESTION_FEATURE_STORE_DIR,
+            constants.DATA_INGESTION_WATERMARK_FILE_NAME
         )
         self.train_test_split_ratio: float = constants.DATA_INGESTION_TRAIN_TEST_SPLIT_RATIO
+        self.split_mode: str = constants.DATA_INGESTION_SPLIT_MODE
+        self.split_stratify: bool = constants.DATA_INGESTION_SPLIT_STRATIFY
+        self.split_chunk_size: int = constants.DATA_INGESTION_SPLIT_CHUNK_SIZE
+        self.batch_size: int = constants.DATA_INGESTION_BATCH_SIZE
+        self.incremental: bool = constants.DATA_INGESTION_INCREMENTAL
+        self.watermark_safety_window: float = constants.DATA_INGESTION_WATERMARK_SAFETY_WINDOW_SECONDS
         self.collection_name: str = constants.DATA_INGESTION_COLLECTION_NAME
         self.database_name: str = constants.DATA_INGESTION_DATABASE_NAME
     
@@ -49,21 +74,28 @@ class DataValidationConfig:
             constants.DATA_VALIDATION_INVALID_DIR)
         self.valid_train_file_path: str = os.path.join(
             self.valid_data_dir, 
-            constants.TRAIN_FILE_NAME)
+            get_artifact_file_name(constants.TRAIN_FILE_NAME))
         self.valid_test_file_path: str = os.path.join(
             self.valid_data_dir, 
-            constants.TEST_FILE_NAME)
+            get_artifact_file_name(constants.TEST_FILE_NAME))
         self.invalid_train_file_path: str = os.path.join(
             self.invalid_data_dir, 
-            constants.TRAIN_FILE_NAME)
+            get_artifact_file_name(constants.TRAIN_FILE_NAME))
         self.invalid_test_file_path: str = os.path.join(
             self.invalid_data_dir, 
-            constants.TEST_FILE_NAME)
+            get_artifact_file_name(constants.TEST_FILE_NAME))
         self.drift_report_file_path: str = os.path.join(
             self.data_validation_dir,
             constants.DATA_VALIDATION_DRIFT_REPORT_DIR,
             constants.DATA_VALIDATION_DRIFT_REPORT_FILE_NAME,
         )
+        self.drift_reference_file_path: str = os.path.join(
+            self.data_validation_dir,
+            constants.DATA_VALIDATION_DRIFT_REPORT_DIR,
+            constants.DATA_VALIDATION_DRIFT_REFERENCE_FILE_NAME,
+        )
+        self.drift_threshold: float = constants.DATA_VALIDATION_DRIFT_THRESHOLD
+        self.psi_threshold: float = constants.DATA_VALIDATION_PSI_THRESHOLD
 
 class DataTransformationConfig:
      def __init__(self,training_pipeline_config:TrainingPipelineConfig):
@@ -82,6 +114,8 @@ class DataTransformationConfig:
             self.data_transformation_dir, 
             constants.DATA_TRANSFORMATION_TRANSFORMED_OBJECT_DIR,
             constants.PREPROCESSING_OBJECT_FILE_NAME)
+        self.chunk_size: int = constants.DATA_TRANSFORMATION_CHUNK_SIZE
+        self.fit_sample_rows: int = constants.DATA_TRANSFORMATION_FIT_SAMPLE_ROWS
         
 class ModelTrainerConfig:
     def __init__(self,training_pipeline_config:TrainingPipelineConfig):
@@ -94,5 +128,36 @@ class ModelTrainerConfig:
             constants.MODEL_TRAINER_TRAINED_MODEL_DIR, 
             constants.MODEL_FILE_NAME
         )
+        self.serving_bundle_dir: str = os.path.join(
+            self.model_trainer_dir,
+            constants.MODEL_TRAINER_SERVING_BUNDLE_DIR
+        )
+        self.served_model_file_path: str = os.path.join(
+            self.serving_bundle_dir,
+            constants.MODEL_SERVING_MODEL_FILE_NAME
+        )
+        self.served_preprocessor_file_path: str = os.path.join(
+            self.serving_bundle_dir,
+            constants.MODEL_SERVING_PREPROCESSOR_FILE_NAME
+        )
+        self.served_bundle_file_path: str = os.path.join(
+            self.serving_bundle_dir,
+            constants.MODEL_SERVING_BUNDLE_FILE_NAME
+        )
+        self.served_drift_reference_file_path: str = os.path.join(
+            self.serving_bundle_dir,
+            constants.MODEL_SERVING_DRIFT_REFERENCE_FILE_NAME
+        )
+        self.search_report_file_path: str = os.path.join(
+            self.model_trainer_dir,
+            constants.MODEL_TRAINER_SEARCH_REPORT_FILE_NAME
+        )
         self.expected_accuracy: float = constants.MODEL_TRAINER_EXPECTED_SCORE
-        self.overfitting_underfitting_threshold = constants.MODEL_TRAINER_OVER_FIITING_UNDER_FITTING_THRESHOLD
\ No newline at end of file
+        self.overfitting_underfitting_threshold = constants.MODEL_TRAINER_OVER_FIITING_UNDER_FITTING_THRESHOLD
+        self.n_jobs: int = constants.MODEL_TRAINER_N_JOBS
+        self.search_mode: str = constants.MODEL_TRAINER_SEARCH_MODE
+        self.halving_factor: int = constants.MODEL_TRAINER_HALVING_FACTOR
+        self.search_time_budget: float = constants.MODEL_TRAINER_SEARCH_TIME_BUDGET
+        self.training_mode: str = constants.MODEL_TRAINER_TRAINING_MODE
+        self.out_of_core_chunk_size: int = constants.MODEL_TRAINER_OUT_OF_CORE_CHUNK_SIZE
+        self.out_of_core_epochs: int = constants.MODEL_TRAINER_OUT_OF_CORE_EPOCHS
\ No newline at end of file
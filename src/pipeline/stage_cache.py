@@ -0,0 +1,88 @@
+import os
+import sys
+import json
+import hashlib
+from datetime import datetime
+from dataclasses import fields, is_dataclass
+from src.logging.logger import logging
+from src.exception.exception import NetworkSecurityException
+from src.utils.main_utils.utils import save_object, load_object
+
+def compute_cache_key(*parts) -> str:
+    """
+        Content hash of the inputs of a stage, parts must be JSON serializable or have a stable str()
+    """
+    try:
+        payload=json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+def get_config_values(config) -> dict:
+    """
+        Settings of a stage config, without the artifact paths that change with every run
+    """
+    return {name: value for name, value in vars(config).items() if not name.endswith(("_path", "_dir"))}
+
+def compute_file_hash(file_path: str) -> str:
+    try:
+        checksum=hashlib.sha256()
+        with open(file_path, "rb") as file_obj:
+            for block in iter(lambda: file_obj.read(1<<20), b""):
+                checksum.update(block)
+        return checksum.hexdigest()
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+class StageCache:
+    """
+        Index of stage artifacts by the hash of their inputs. Entries point at the
+        artifact directories of the run that produced them
+    """
+    def __init__(self, cache_dir: str):
+        try:
+            self.cache_dir=cache_dir
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def _entry_file_path(self, stage_name: str, key: str) -> str:
+        return os.path.join(self.cache_dir, stage_name, f"{key}.pkl")
+
+    @staticmethod
+    def _artifact_files_exist(artifact) -> bool:
+        if not is_dataclass(artifact):
+            return True
+        for artifact_field in fields(artifact):
+            # Entries pickled before a field was added to the artifact are stale
+            if not hasattr(artifact, artifact_field.name):
+                return False
+            value=getattr(artifact, artifact_field.name)
+            if isinstance(value, str) and artifact_field.name.endswith("file_path") and not os.path.exists(value):
+                return False
+        return True
+
+    def get(self, stage_name: str, key: str):
+        """
+            Cached entry with "artifact" and "duration", None on a miss or when its files are gone
+        """
+        try:
+            entry_file_path=self._entry_file_path(stage_name, key)
+            if not os.path.exists(entry_file_path):
+                return None
+            entry=load_object(entry_file_path)
+            if not self._artifact_files_exist(entry["artifact"]):
+                logging.info(f"Cached {stage_name} artifact {key} is incomplete, ignoring it")
+                return None
+            return entry
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def put(self, stage_name: str, key: str, artifact, duration: float) -> None:
+        try:
+            save_object(self._entry_file_path(stage_name, key), {
+                "artifact": artifact,
+                "duration": duration,
+                "created_at": datetime.now()
+            })
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
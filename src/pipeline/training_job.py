@@ -0,0 +1,241 @@
+import os
+import sys
+import json
+import uuid
+import fcntl
+import queue
+import threading
+import multiprocessing
+from datetime import datetime
+from typing import Optional
+from collections import OrderedDict
+from dataclasses import dataclass, field, asdict
+from src.logging.logger import logging
+from src.exception.exception import NetworkSecurityException
+from src.utils.main_utils.instrumentation import metrics_registry
+from src.serving.model_registry import publish_model_bundle
+from src.constants import (
+    TRAINING_JOB_HISTORY_SIZE,
+    TRAINING_JOB_POLL_INTERVAL_SECONDS,
+    TRAINING_JOB_STORE_DIR,
+    TRAINING_JOB_LOCK_FILE_NAME
+)
+
+@dataclass
+class TrainingJob:
+    job_id: str
+    status: str
+    submitted_at: datetime
+    force: bool=False
+    started_at: Optional[datetime]=None
+    finished_at: Optional[datetime]=None
+    stages: dict=field(default_factory=dict)
+    error: Optional[str]=None
+
+    def to_json(self) -> dict:
+        job=asdict(self)
+        for key in ("submitted_at", "started_at", "finished_at"):
+            if job[key] is not None:
+                job[key]=job[key].isoformat()
+        return job
+
+    @classmethod
+    def from_json(cls, job: dict) -> "TrainingJob":
+        for key in ("submitted_at", "started_at", "finished_at"):
+            if job[key] is not None:
+                job[key]=datetime.fromisoformat(job[key])
+        return cls(**job)
+
+def _run_training_job(events, force: bool=False):
+    """
+        Entry point of the worker process, training modules are only imported here
+    """
+    try:
+        from src.pipeline.training_pipeline import TrainingPipeline
+
+        def stage_callback(stage_name, status, duration):
+            events.put(("stage", stage_name, status, duration))
+
+        training_pipeline=TrainingPipeline(stage_callback=stage_callback, force=force)
+        training_pipeline.run_pipeline()
+        # The bundle is published by the job manager, so a job that did not report success never replaces the served model
+        events.put(("succeeded", training_pipeline.serving_bundle_dir, training_pipeline.training_pipeline_config.model_dir))
+    except Exception as e:
+        events.put(("failed", str(e)))
+        sys.exit(1)
+
+class TrainingJobManager:
+    """
+        Runs TrainingPipeline in a separate process, one job at a time, in submission order.
+        The serving bundle of a job is published once it succeeded, then on_success is called.
+        Every app worker has its own manager, they share the jobs through one JSON file per job
+        in store_dir, so any worker answers for any job, and a job only starts once its manager
+        holds the lock file of store_dir, so jobs submitted to different workers never train
+        at the same time
+    """
+    def __init__(self, on_success=None, history_size: int=TRAINING_JOB_HISTORY_SIZE,
+                 store_dir: str=TRAINING_JOB_STORE_DIR):
+        try:
+            self.on_success=on_success
+            self.history_size=history_size
+            self.store_dir=store_dir
+            self._jobs=OrderedDict()
+            self._pending=queue.Queue()
+            self._lock=threading.Lock()
+            self._dispatcher=None
+            self._process=None
+            self._stopped=False
+            self._context=multiprocessing.get_context("spawn")
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def submit(self, force: bool=False) -> TrainingJob:
+        try:
+            job=TrainingJob(job_id=uuid.uuid4().hex, status="queued", submitted_at=datetime.now(), force=force)
+            with self._lock:
+                self._jobs[job.job_id]=job
+                self._save(job)
+                # Forget the oldest finished jobs
+                while len(self._jobs)>self.history_size:
+                    oldest_job_id=next(iter(self._jobs))
+                    if self._jobs[oldest_job_id].status in ("queued", "running"):
+                        break
+                    self._jobs.pop(oldest_job_id)
+                    self._remove(oldest_job_id)
+                if self._dispatcher is None:
+                    self._dispatcher=threading.Thread(target=self._dispatch, name="training-job-dispatcher", daemon=True)
+                    self._dispatcher.start()
+            self._pending.put(job.job_id)
+            logging.info(f"Queued training job {job.job_id}")
+            return job
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def get(self, job_id: str) -> Optional[TrainingJob]:
+        """
+            Job submitted to this manager or, through the store, to the manager of another worker
+        """
+        with self._lock:
+            job=self._jobs.get(job_id)
+        if job is not None:
+            return job
+        return self._load(self._get_job_file_path(job_id))
+
+    def list_jobs(self) -> list:
+        """
+            Jobs of every manager sharing the store, in submission order
+        """
+        try:
+            with self._lock:
+                jobs={job.job_id: job for job in self._jobs.values()}
+            if os.path.isdir(self.store_dir):
+                for file_name in os.listdir(self.store_dir):
+                    job_id, extension=os.path.splitext(file_name)
+                    if extension==".json" and job_id not in jobs:
+                        job=self._load(os.path.join(self.store_dir, file_name))
+                        if job is not None:
+                            jobs[job_id]=job
+            return sorted(jobs.values(), key=lambda job: job.submitted_at)
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def _get_job_file_path(self, job_id: str) -> str:
+        return os.path.join(self.store_dir, f"{os.path.basename(job_id)}.json")
+
+    def _save(self, job: TrainingJob):
+        # Written to a temporary file first, readers in other workers never see a partial job
+        os.makedirs(self.store_dir, exist_ok=True)
+        file_path=self._get_job_file_path(job.job_id)
+        with open(f"{file_path}.tmp", "w") as file_obj:
+            json.dump(job.to_json(), file_obj)
+        os.replace(f"{file_path}.tmp", file_path)
+
+    def _remove(self, job_id: str):
+        try:
+            os.remove(self._get_job_file_path(job_id))
+        except FileNotFoundError:
+            pass
+
+    def _load(self, file_path: str) -> Optional[TrainingJob]:
+        try:
+            with open(file_path) as file_obj:
+                return TrainingJob.from_json(json.load(file_obj))
+        except FileNotFoundError:
+            return None
+
+    def _dispatch(self):
+        while not self._stopped:
+            job_id=self._pending.get()
+            if job_id is None:
+                break
+            with self._lock:
+                job=self._jobs.get(job_id)
+            if job is None:
+                continue
+            try:
+                os.makedirs(self.store_dir, exist_ok=True)
+                with open(os.path.join(self.store_dir, TRAINING_JOB_LOCK_FILE_NAME), "w") as lock_file:
+                    # Blocks while a job of another worker is training, the lock is released with the file
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                    if not self._stopped:
+                        self._run(job)
+            except Exception as e:
+                job.status, job.error, job.finished_at="failed", str(e), datetime.now()
+                self._save(job)
+                logging.info(f"Training job {job.job_id} failed: {e}")
+
+    def _run(self, job: TrainingJob):
+        events=self._context.Queue()
+        self._process=self._context.Process(target=_run_training_job, args=(events, job.force), name=f"training-job-{job.job_id}")
+        job.status, job.started_at="running", datetime.now()
+        self._save(job)
+        logging.info(f"Started training job {job.job_id}")
+        self._process.start()
+
+        outcome=None
+        while outcome is None:
+            try:
+                event=events.get(timeout=TRAINING_JOB_POLL_INTERVAL_SECONDS)
+            except queue.Empty:
+                if not self._process.is_alive():
+                    break
+                continue
+            if event[0]=="stage":
+                _, stage_name, status, duration=event
+                job.stages[stage_name]={"status": status, "duration": duration}
+                self._save(job)
+                # Stages run in the worker process, their timings are recorded here for /metrics
+                if status in ("completed", "failed"):
+                    metrics_registry.observe("pipeline_stage", duration, stage=stage_name, status=status)
+            else:
+                outcome=event
+        self._process.join()
+
+        if outcome is None:
+            outcome=("failed", f"Training process exited with code {self._process.exitcode}")
+        if outcome[0]=="succeeded":
+            try:
+                publish_model_bundle(outcome[1], outcome[2])
+            except Exception as e:
+                outcome=("failed", f"Publishing the serving bundle failed: {e}")
+        job.finished_at=datetime.now()
+        if outcome[0]=="failed":
+            job.error=outcome[1]
+        job.status=outcome[0]
+        self._save(job)
+        logging.info(f"Training job {job.job_id} {job.status}")
+
+        if job.status=="succeeded" and self.on_success is not None:
+            try:
+                self.on_success()
+            except Exception as e:
+                logging.info(f"Post-training callback of job {job.job_id} failed: {e}")
+
+    def stop(self):
+        try:
+            self._stopped=True
+            self._pending.put(None)
+            if self._process is not None and self._process.is_alive():
+                self._process.terminate()
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
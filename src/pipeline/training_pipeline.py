@@ -1,5 +1,8 @@
 import os
 import sys
+import time
+import shutil
+from src import constants
 from src.cloud.s3_syncer import S3Sync
 from src.logging.logger import logging
 from src.constants import TRAINING_BUCKET_NAME
@@ -8,6 +11,10 @@ from src.components.data_ingestion import DataIngestion
 from src.components.data_validation import DataValidation
 from src.exception.exception import NetworkSecurityException
 from src.components.data_transformation import DataTransformation
+from src.utils.main_utils.utils import load_object, save_object, save_mmap_object, write_yaml_file
+from src.utils.main_utils.instrumentation import metrics_registry
+from src.pipeline.stage_cache import StageCache, compute_cache_key, compute_file_hash, get_config_values
+from src.serving.model_registry import publish_model_bundle
 from src.entity.config_entity import (
     TrainingPipelineConfig,
     DataIngestionConfig,
@@ -23,9 +30,139 @@ from src.entity.artifact_entity import (
 )
 
 class TrainingPipeline:
-    def __init__(self):
+    def __init__(self, stage_callback=None, force: bool=False):
+        """
+            stage_callback(stage_name, status, duration) is notified when a stage starts, completes, fails or is cached.
+            force reruns every stage even when its cached artifact is still valid
+        """
         self.training_pipeline_config=TrainingPipelineConfig()
         self.s3_sync=S3Sync()
+        self.stage_callback=stage_callback
+        self.force=force
+        self.stage_cache=StageCache(self.training_pipeline_config.stage_cache_dir)
+        self.stage_summary={}
+
+    def _notify_stage(self, stage_name: str, status: str, duration: float=None):
+        if self.stage_callback is not None:
+            self.stage_callback(stage_name, status, duration)
+
+    def _run_stage(self, stage_name: str, stage_function, cache_key: str=None, **kwargs):
+        use_cache=cache_key is not None and constants.STAGE_CACHE_ENABLED
+        if use_cache and not self.force:
+            cached_entry=self.stage_cache.get(stage_name, cache_key)
+            if cached_entry is not None:
+                logging.info(f"Reusing cached {stage_name} artifact {cache_key}, saved {cached_entry['duration']:.1f}s")
+                self.stage_summary[stage_name]={"cache": "hit", "key": cache_key,
+                                                "duration": 0.0, "saved": cached_entry["duration"]}
+                self._notify_stage(stage_name, "cached", 0.0)
+                return cached_entry["artifact"]
+
+        self._notify_stage(stage_name, "running")
+        start_time=time.perf_counter()
+        try:
+            artifact=stage_function(**kwargs)
+        except Exception:
+            duration=time.perf_counter()-start_time
+            metrics_registry.observe("pipeline_stage", duration, stage=stage_name, status="failed")
+            self._notify_stage(stage_name, "failed", duration)
+            raise
+        duration=time.perf_counter()-start_time
+        metrics_registry.observe("pipeline_stage", duration, stage=stage_name, status="completed")
+        if use_cache:
+            self.stage_cache.put(stage_name, cache_key, artifact, duration)
+        self.stage_summary[stage_name]={"cache": "miss" if use_cache else "disabled", "key": cache_key,
+                                        "duration": duration, "saved": 0.0}
+        self._notify_stage(stage_name, "completed", duration)
+        return artifact
+
+    def get_stage_cache_keys(self) -> dict:
+        """
+            Each key hashes the key of the previous stage with the inputs of the stage itself,
+            the settings of its config and every constant it reads
+        """
+        try:
+            schema_hash=compute_file_hash(constants.SCHEMA_FILE_PATH)
+            data_ingestion_config=DataIngestionConfig(self.training_pipeline_config)
+            data_ingestion=DataIngestion(data_ingestion_config)
+            data_ingestion_key=compute_cache_key(
+                "data_ingestion", data_ingestion.get_data_fingerprint(), schema_hash,
+                get_config_values(data_ingestion_config), constants.ARTIFACT_FILE_FORMAT, constants.TARGET_COLUMN
+            )
+            data_validation_key=compute_cache_key(
+                "data_validation", data_ingestion_key,
+                get_config_values(DataValidationConfig(self.training_pipeline_config)),
+                constants.DATA_VALIDATION_FEATURE_VALUES
+            )
+            data_transformation_key=compute_cache_key(
+                "data_transformation", data_validation_key,
+                get_config_values(DataTransformationConfig(self.training_pipeline_config)),
+                constants.DATA_TRANSFORMATION_IMPUTER_PARAMS, constants.DATA_TRANSFORMATION_IMPUTER_ENGINE
+            )
+            model_trainer_config=ModelTrainerConfig(self.training_pipeline_config)
+            model_trainer=ModelTrainer(None, model_trainer_config)
+            models, params=model_trainer.get_search_space()
+            out_of_core_models=model_trainer.get_out_of_core_models()
+            model_trainer_key=compute_cache_key(
+                "model_trainer", data_transformation_key,
+                {model_name: model.get_params() for model_name, model in models.items()}, params,
+                {model_name: model.get_params() for model_name, model in out_of_core_models.items()},
+                get_config_values(model_trainer_config), constants.MODEL_INFERENCE_BACKEND
+            )
+            return {
+                "data_ingestion": data_ingestion_key,
+                "data_validation": data_validation_key,
+                "data_transformation": data_transformation_key,
+                "model_trainer": model_trainer_key
+            }
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    @property
+    def serving_bundle_dir(self) -> str:
+        return ModelTrainerConfig(self.training_pipeline_config).serving_bundle_dir
+
+    def stage_serving_bundle(self, model_trainer_artifact: ModelTrainerArtifact,
+                             data_validation_artifact: DataValidationArtifact):
+        """
+            Build every file served for this run in its serving bundle dir, the model and the training
+            data histograms used for drift checks on incoming batches. Nothing is served from it until
+            publish_serving_bundle swaps it in
+        """
+        try:
+            model_trainer_config=ModelTrainerConfig(self.training_pipeline_config)
+            network_model=load_object(model_trainer_artifact.trainer_model_file_path)
+            save_object(model_trainer_config.served_preprocessor_file_path, network_model.preprocessor)
+            save_object(model_trainer_config.served_model_file_path, network_model.model)
+            save_mmap_object(model_trainer_config.served_bundle_file_path, network_model)
+            shutil.copyfile(data_validation_artifact.drift_reference_file_path,
+                            model_trainer_config.served_drift_reference_file_path)
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def publish_serving_bundle(self) -> str:
+        """
+            Serve the staged bundle, called once the run succeeded
+        """
+        try:
+            return publish_model_bundle(self.serving_bundle_dir, self.training_pipeline_config.model_dir)
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def write_stage_summary(self):
+        try:
+            cache_hits=[stage_name for stage_name, stage in self.stage_summary.items() if stage["cache"]=="hit"]
+            time_saved=sum(stage["saved"] for stage in self.stage_summary.values())
+            write_yaml_file(self.training_pipeline_config.pipeline_summary_file_path, {
+                "force": self.force,
+                "stages": self.stage_summary,
+                "cache_hits": cache_hits,
+                "time_saved": time_saved,
+                # Every instrumented operation of this process, stages and the work timed inside them
+                "timings": metrics_registry.summary()
+            })
+            logging.info(f"Stage cache hits: {cache_hits or 'none'}, time saved: {time_saved:.1f}s")
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
     
     def start_data_ingestion(self):
         try:
@@ -79,22 +216,39 @@ class TrainingPipeline:
         except Exception as e:
             raise NetworkSecurityException(e,sys)
         
-    ## local best model is uploaded to s3 bucket
+    ## serving bundle of this run is uploaded to s3 bucket
     def sync_saved_model_dir_to_s3(self):
         try:
             aws_bucket_url = f"s3://{TRAINING_BUCKET_NAME}/best_model/{self.training_pipeline_config.timestamp}"
-            self.s3_sync.sync_folder_to_s3(folder = self.training_pipeline_config.model_dir,aws_bucket_url=aws_bucket_url)
+            self.s3_sync.sync_folder_to_s3(folder = self.serving_bundle_dir,aws_bucket_url=aws_bucket_url)
         except Exception as e:
             raise NetworkSecurityException(e,sys)
         
+    def run_training_stages(self) -> ModelTrainerArtifact:
+        try:
+            cache_keys=self.get_stage_cache_keys() if constants.STAGE_CACHE_ENABLED else {}
+            data_ingestion_artifact=self._run_stage("data_ingestion", self.start_data_ingestion,
+                                                    cache_key=cache_keys.get("data_ingestion"))
+            data_validation_artifact=self._run_stage("data_validation", self.start_data_validation,
+                                                     cache_key=cache_keys.get("data_validation"),
+                                                     data_ingestion_artifact=data_ingestion_artifact)
+            data_transformation_artifact=self._run_stage("data_transformation", self.start_data_transformation,
+                                                         cache_key=cache_keys.get("data_transformation"),
+                                                         data_validation_artifact=data_validation_artifact)
+            model_trainer_artifact=self._run_stage("model_trainer", self.start_model_trainer,
+                                                   cache_key=cache_keys.get("model_trainer"),
+                                                   data_transformation_artifact=data_transformation_artifact)
+            self.stage_serving_bundle(model_trainer_artifact, data_validation_artifact)
+            self.write_stage_summary()
+            return model_trainer_artifact
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
     def run_pipeline(self):
         try:
-            data_ingestion_artifact=self.start_data_ingestion()
-            data_validation_artifact=self.start_data_validation(data_ingestion_artifact=data_ingestion_artifact)
-            data_transformation_artifact=self.start_data_transformation(data_validation_artifact=data_validation_artifact)
-            model_trainer_artifact=self.start_model_trainer(data_transformation_artifact=data_transformation_artifact)
-            self.sync_artifact_dir_to_s3()
-            self.sync_saved_model_dir_to_s3()
+            model_trainer_artifact=self.run_training_stages()
+            self._run_stage("sync_artifact_dir_to_s3", self.sync_artifact_dir_to_s3)
+            self._run_stage("sync_saved_model_dir_to_s3", self.sync_saved_model_dir_to_s3)
             return model_trainer_artifact
         except Exception as e:
             raise NetworkSecurityException(e, sys)
\ No newline at end of file
@@ -0,0 +1,207 @@
+"""
+HTTP load generator for the serving app
+
+    python -m src.serving.load_test --endpoint /predict/records --concurrency 16 --duration 30
+    python -m src.serving.load_test --url http://localhost:8080 --endpoint /predict --rows-per-request 100
+    python -m src.serving.load_test --output report.json --compare previous_report.json
+
+Without --url the app is driven in-process through its ASGI interface, client and
+server then share one event loop and CPU. Each of --concurrency workers sends its
+next request as soon as the previous one returns, for --duration seconds after a
+--warmup period whose requests are not counted. The JSON report holds throughput,
+latency percentiles and error rates so runs can be compared between releases
+"""
+import io
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from collections import Counter
+from dataclasses import dataclass, asdict
+from src.exception.exception import NetworkSecurityException
+from src.constants import (
+    TARGET_COLUMN,
+    LOAD_TEST_DATA_FILE_PATH,
+    LOAD_TEST_ENDPOINT,
+    LOAD_TEST_PAYLOAD_KINDS,
+    LOAD_TEST_CONCURRENCY,
+    LOAD_TEST_ROWS_PER_REQUEST,
+    LOAD_TEST_DURATION_SECONDS,
+    LOAD_TEST_WARMUP_SECONDS,
+    LOAD_TEST_TIMEOUT_SECONDS,
+    LOAD_TEST_PAYLOAD_POOL_SIZE
+)
+
+# Payload sent to each known endpoint when --payload-kind is not given
+ENDPOINT_PAYLOAD_KINDS={
+    "/predict": "csv",
+    "/predict/stream": "csv",
+    "/predict/records": "records",
+}
+
+@dataclass
+class LoadTestConfig:
+    endpoint: str=LOAD_TEST_ENDPOINT
+    payload_kind: str=None
+    url: str=None
+    concurrency: int=LOAD_TEST_CONCURRENCY
+    rows_per_request: int=LOAD_TEST_ROWS_PER_REQUEST
+    duration: float=LOAD_TEST_DURATION_SECONDS
+    warmup: float=LOAD_TEST_WARMUP_SECONDS
+    timeout: float=LOAD_TEST_TIMEOUT_SECONDS
+    data_file_path: str=LOAD_TEST_DATA_FILE_PATH
+    payload_pool_size: int=LOAD_TEST_PAYLOAD_POOL_SIZE
+    random_state: int=42
+
+    def __post_init__(self):
+        if self.payload_kind is None:
+            self.payload_kind=ENDPOINT_PAYLOAD_KINDS.get(self.endpoint, "none")
+        if self.payload_kind not in LOAD_TEST_PAYLOAD_KINDS:
+            raise Exception(f"Unsupported payload kind: {self.payload_kind}, expected one of {LOAD_TEST_PAYLOAD_KINDS}")
+
+def build_payloads(config: LoadTestConfig) -> list:
+    """
+        httpx request arguments for payload_pool_size requests of rows_per_request rows
+        sampled from the data file, built before the clock starts
+    """
+    try:
+        if config.payload_kind=="none":
+            return [{}]
+        dataframe=pd.read_csv(config.data_file_path)
+        dataframe=dataframe.drop(columns=[TARGET_COLUMN], errors="ignore")
+        rng=np.random.default_rng(config.random_state)
+        payloads=[]
+        for _ in range(config.payload_pool_size):
+            rows=dataframe.iloc[rng.integers(0, len(dataframe), config.rows_per_request)]
+            if config.payload_kind=="csv":
+                buffer=io.BytesIO()
+                rows.to_csv(buffer, index=False)
+                payloads.append({"files": {"file": ("load_test.csv", buffer.getvalue(), "text/csv")}})
+            else:
+                # NaN is not valid JSON, missing features are sent as null
+                records=rows.astype(object).where(rows.notna(), None).to_dict(orient="records")
+                payloads.append({"json": {"records": records}})
+        return payloads
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+async def _worker(client, config: LoadTestConfig, payloads: list, worker_index: int,
+                  measure_start: float, deadline: float, samples: list):
+    method="GET" if config.payload_kind=="none" else "POST"
+    request_index=worker_index
+    while time.perf_counter()<deadline:
+        payload=payloads[request_index%len(payloads)]
+        request_index+=config.concurrency
+        start_time=time.perf_counter()
+        try:
+            response=await client.request(method, config.endpoint, **payload)
+            await response.aread()
+            status, error=response.status_code, None if response.status_code<400 else f"HTTP {response.status_code}"
+        except Exception as e:
+            status, error=None, type(e).__name__
+        end_time=time.perf_counter()
+        # Requests started during the warmup, or finished after the deadline, are not counted
+        if start_time>=measure_start and end_time<=deadline:
+            samples.append((end_time-start_time, status, error))
+
+def summarize(config: LoadTestConfig, samples: list, elapsed: float) -> dict:
+    latencies=np.array([sample[0] for sample in samples], dtype=np.float64)*1000
+    errors=Counter(sample[2] for sample in samples if sample[2] is not None)
+    n_requests=len(samples)
+    n_errors=sum(errors.values())
+    percentiles=np.percentile(latencies, [50, 95, 99]) if n_requests else [0.0, 0.0, 0.0]
+    return {
+        "config": asdict(config),
+        "mode": "url" if config.url else "in_process",
+        "environment": {"python": platform.python_version(), "machine": platform.machine()},
+        "finished_at": datetime.now().isoformat(),
+        "elapsed_seconds": elapsed,
+        "requests": n_requests,
+        "errors": n_errors,
+        "error_rate": n_errors/n_requests if n_requests else 0.0,
+        "error_counts": dict(errors),
+        "status_counts": {str(status): count for status, count in Counter(sample[1] for sample in samples).items()},
+        "throughput_rps": n_requests/elapsed if elapsed else 0.0,
+        "rows_per_second": (n_requests-n_errors)*config.rows_per_request/elapsed if elapsed and config.payload_kind!="none" else 0.0,
+        "latency_ms": {
+            "mean": float(latencies.mean()) if n_requests else 0.0,
+            "p50": float(percentiles[0]),
+            "p95": float(percentiles[1]),
+            "p99": float(percentiles[2]),
+            "max": float(latencies.max()) if n_requests else 0.0
+        }
+    }
+
+async def _drive(client, config: LoadTestConfig, payloads: list) -> dict:
+    samples=[]
+    measure_start=time.perf_counter()+config.warmup
+    deadline=measure_start+config.duration
+    await asyncio.gather(*[
+        _worker(client, config, payloads, worker_index, measure_start, deadline, samples)
+        for worker_index in range(config.concurrency)
+    ])
+    return summarize(config, samples, config.duration)
+
+async def run_load_test(config: LoadTestConfig) -> dict:
+    try:
+        import httpx
+        payloads=build_payloads(config)
+        timeout=httpx.Timeout(config.timeout)
+        if config.url:
+            limits=httpx.Limits(max_connections=config.concurrency, max_keepalive_connections=config.concurrency)
+            async with httpx.AsyncClient(base_url=config.url, timeout=timeout, limits=limits) as client:
+                return await _drive(client, config, payloads)
+
+        # Imported here so a run against --url does not load the model in this process
+        import app as service
+        async with service.lifespan(service.app):
+            transport=httpx.ASGITransport(app=service.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=timeout) as client:
+                return await _drive(client, config, payloads)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+def compare_reports(previous: dict, current: dict) -> str:
+    lines=[f"{'metric':<18}{'previous':>12}{'current':>12}{'ratio':>8}"]
+    metrics=[("throughput_rps", previous["throughput_rps"], current["throughput_rps"]),
+             ("error_rate", previous["error_rate"], current["error_rate"])]
+    metrics+=[(f"{name} ms", previous["latency_ms"][name], current["latency_ms"][name]) for name in ("p50", "p95", "p99")]
+    for name, before, after in metrics:
+        ratio=f"{after/before:>8.2f}" if before else f"{'-':>8}"
+        lines.append(f"{name:<18}{before:>12.3f}{after:>12.3f}{ratio}")
+    return "\n".join(lines)
+
+if __name__=="__main__":
+    parser=argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoint", default=LOAD_TEST_ENDPOINT)
+    parser.add_argument("--payload-kind", choices=LOAD_TEST_PAYLOAD_KINDS,
+                        help=f"defaults by endpoint: {ENDPOINT_PAYLOAD_KINDS}, none otherwise")
+    parser.add_argument("--url", help="base URL of a running server, e.g. http://localhost:8080")
+    parser.add_argument("--concurrency", type=int, default=LOAD_TEST_CONCURRENCY)
+    parser.add_argument("--rows-per-request", type=int, default=LOAD_TEST_ROWS_PER_REQUEST)
+    parser.add_argument("--duration", type=float, default=LOAD_TEST_DURATION_SECONDS)
+    parser.add_argument("--warmup", type=float, default=LOAD_TEST_WARMUP_SECONDS)
+    parser.add_argument("--timeout", type=float, default=LOAD_TEST_TIMEOUT_SECONDS)
+    parser.add_argument("--data-file-path", default=LOAD_TEST_DATA_FILE_PATH)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--compare", help="JSON report of a previous run to compare against")
+    args=parser.parse_args()
+
+    config=LoadTestConfig(endpoint=args.endpoint, payload_kind=args.payload_kind, url=args.url,
+                          concurrency=args.concurrency, rows_per_request=args.rows_per_request,
+                          duration=args.duration, warmup=args.warmup, timeout=args.timeout,
+                          data_file_path=args.data_file_path)
+    report=asyncio.run(run_load_test(config))
+    print(json.dumps({key: report[key] for key in ("mode", "requests", "error_rate", "throughput_rps",
+                                                   "rows_per_second", "latency_ms")}, indent=4))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+    if args.compare:
+        with open(args.compare) as f:
+            print(compare_reports(json.load(f), report))
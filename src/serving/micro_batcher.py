@@ -0,0 +1,157 @@
+import sys
+import asyncio
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from src.logging.logger import logging
+from src.serving.model_registry import ModelRegistry
+from src.serving.prediction_cache import PredictionCache, CachedNetworkModel
+from src.utils.ml_utils.model.estimator import NetworkModel
+from src.exception.exception import NetworkSecurityException
+from src.utils.main_utils.instrumentation import timer
+from src.constants import (
+    PREDICTION_MICRO_BATCH_MAX_SIZE,
+    PREDICTION_MICRO_BATCH_MAX_WAIT_SECONDS
+)
+
+def get_feature_columns(network_model: NetworkModel) -> list:
+    """
+        Feature names in the order the preprocessor was fitted on
+    """
+    try:
+        return list(network_model.preprocessor.feature_names_in_)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+def records_to_matrix(records: list, columns: list) -> np.ndarray:
+    """
+        One row per record in column order, null values become NaN for the imputer
+    """
+    try:
+        return np.array([[np.nan if record[column] is None else record[column] for column in columns]
+                         for record in records], dtype=np.float64).reshape(len(records), len(columns))
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+@dataclass
+class _PendingRequest:
+    matrix: np.ndarray
+    columns: list
+    future: asyncio.Future
+
+class MicroBatcher:
+    """
+        Coalesces concurrent scoring requests into one NetworkModel.predict call.
+        A batch is sent once it holds max_batch_size rows or max_wait seconds
+        after its first request arrived, whichever comes first
+    """
+    def __init__(self,
+                 model_registry: ModelRegistry,
+                 max_batch_size: int=PREDICTION_MICRO_BATCH_MAX_SIZE,
+                 max_wait: float=PREDICTION_MICRO_BATCH_MAX_WAIT_SECONDS,
+                 prediction_cache: PredictionCache=None):
+        try:
+            self.model_registry=model_registry
+            self.prediction_cache=prediction_cache
+            self.max_batch_size=max_batch_size
+            self.max_wait=max_wait
+            self.batches_processed=0
+            self.rows_processed=0
+            self._queue=None
+            self._worker=None
+            self._carry=None
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    async def start(self):
+        try:
+            if self._worker is None:
+                self._queue=asyncio.Queue()
+                self._worker=asyncio.create_task(self._run())
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    async def stop(self):
+        try:
+            if self._worker is not None:
+                self._worker.cancel()
+                try:
+                    await self._worker
+                except asyncio.CancelledError:
+                    pass
+                self._worker=None
+
+            pending=[self._carry] if self._carry is not None else []
+            while self._queue is not None and not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+            for request in pending:
+                if not request.future.done():
+                    request.future.set_exception(Exception("Micro-batcher stopped before the request was scored"))
+            self._carry=None
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    async def predict(self, matrix: np.ndarray, columns: list):
+        """
+            Queue the rows for the next batch and wait for (predictions, model_version)
+        """
+        try:
+            if self._worker is None:
+                raise Exception("Micro-batcher is not running")
+            future=asyncio.get_running_loop().create_future()
+            await self._queue.put(_PendingRequest(matrix=matrix, columns=columns, future=future))
+            return await future
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    async def _collect_batch(self) -> list:
+        loop=asyncio.get_running_loop()
+        first=self._carry if self._carry is not None else await self._queue.get()
+        self._carry=None
+        batch=[first]
+        n_rows=len(first.matrix)
+        deadline=loop.time()+self.max_wait
+        while n_rows<self.max_batch_size:
+            if self._queue.empty():
+                timeout=deadline-loop.time()
+                if timeout<=0:
+                    break
+                try:
+                    request=await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                request=self._queue.get_nowait()
+            # Requests are never split, one that does not fit opens the next batch
+            if n_rows+len(request.matrix)>self.max_batch_size or request.columns!=first.columns:
+                self._carry=request
+                break
+            batch.append(request)
+            n_rows+=len(request.matrix)
+        return batch
+
+    async def _run(self):
+        while True:
+            batch=await self._collect_batch()
+            try:
+                served_model=self.model_registry.get()
+                matrix=np.concatenate([request.matrix for request in batch])
+                x=pd.DataFrame(matrix, columns=batch[0].columns)
+                network_model=served_model.network_model
+                if self.prediction_cache is not None:
+                    network_model=CachedNetworkModel(network_model, served_model.version, self.prediction_cache)
+                # Predict off the event loop so new requests keep queueing for the next batch
+                with timer("micro_batch"):
+                    y_pred=await asyncio.to_thread(network_model.predict, x)
+                self.batches_processed+=1
+                self.rows_processed+=len(matrix)
+
+                offsets=np.cumsum([len(request.matrix) for request in batch])[:-1]
+                for request, predictions in zip(batch, np.split(np.asarray(y_pred), offsets)):
+                    if not request.future.done():
+                        request.future.set_result((predictions.tolist(), served_model.version))
+            except Exception as e:
+                logging.info(f"Micro-batch of {len(batch)} requests failed: {e}")
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
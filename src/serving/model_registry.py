@@ -0,0 +1,252 @@
+import os
+import sys
+import time
+import pickle
+import shutil
+import hashlib
+import threading
+from typing import Optional
+from datetime import datetime
+from dataclasses import dataclass, replace
+from src.logging.logger import logging
+from src.exception.exception import NetworkSecurityException
+from src.utils.ml_utils.model.estimator import NetworkModel
+from src.utils.main_utils.utils import read_yaml_file, load_mmap_object
+from src.constants import (
+    MODEL_SERVING_DIR,
+    MODEL_SERVING_MMAP_MODE,
+    MODEL_SERVING_BUNDLE_FILE_NAME,
+    MODEL_SERVING_DRIFT_REFERENCE_FILE_NAME,
+    MODEL_SERVING_MODEL_FILE_NAME,
+    MODEL_SERVING_PREPROCESSOR_FILE_NAME,
+    MODEL_SERVING_RELOAD_INTERVAL_SECONDS,
+    MODEL_SERVING_RELEASES_DIR,
+    MODEL_SERVING_CURRENT_FILE_NAME,
+    MODEL_SERVING_RELEASE_HISTORY
+)
+
+@dataclass
+class ServedModel:
+    network_model: NetworkModel
+    version: str
+    loaded_at: datetime
+    load_duration: float
+    drift_reference: Optional[dict]=None
+
+def get_release_dir(model_dir: str) -> str:
+    """
+        Directory of the served release, model_dir itself for the flat layout used before releases
+    """
+    current_file_path=os.path.join(model_dir, MODEL_SERVING_CURRENT_FILE_NAME)
+    if not os.path.exists(current_file_path):
+        return model_dir
+    with open(current_file_path) as file_obj:
+        return os.path.join(model_dir, MODEL_SERVING_RELEASES_DIR, file_obj.read().strip())
+
+def publish_model_bundle(bundle_dir: str, model_dir: str=MODEL_SERVING_DIR,
+                         release_history: int=MODEL_SERVING_RELEASE_HISTORY) -> str:
+    """
+        Copy a complete serving bundle into model_dir/releases and serve it. The switch is one
+        atomic rename of the CURRENT pointer, a reader sees the previous release or the new one
+    """
+    try:
+        releases_dir=os.path.join(model_dir, MODEL_SERVING_RELEASES_DIR)
+        # Year first so the names sort in publish order, pruning relies on it
+        release_name=datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        release_dir=os.path.join(releases_dir, release_name)
+        temp_release_dir=f"{release_dir}.tmp"
+        shutil.copytree(bundle_dir, temp_release_dir)
+        os.replace(temp_release_dir, release_dir)
+
+        current_file_path=os.path.join(model_dir, MODEL_SERVING_CURRENT_FILE_NAME)
+        with open(f"{current_file_path}.tmp", "w") as file_obj:
+            file_obj.write(release_name)
+        os.replace(f"{current_file_path}.tmp", current_file_path)
+        logging.info(f"Published model release {release_name} from {bundle_dir}")
+
+        # Processes still mapping a deleted release keep their pages until they reload
+        old_releases=sorted(name for name in os.listdir(releases_dir)
+                            if name!=release_name and not name.endswith(".tmp"))
+        for name in old_releases[:max(0, len(old_releases)-release_history)]:
+            shutil.rmtree(os.path.join(releases_dir, name), ignore_errors=True)
+        return release_dir
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+class ModelRegistry:
+    """
+        Keeps the NetworkModel built from the release served in best_model/ resident in
+        the process and hot-swaps it when a new release is published
+    """
+    def __init__(self,
+                 model_dir: str=MODEL_SERVING_DIR,
+                 reload_interval: float=MODEL_SERVING_RELOAD_INTERVAL_SECONDS,
+                 mmap_mode: str=MODEL_SERVING_MMAP_MODE):
+        try:
+            self.model_dir=model_dir
+            self._set_release_dir(get_release_dir(model_dir))
+            self.mmap_mode=mmap_mode
+            self.reload_interval=reload_interval
+            self._served_model=None
+            self._fingerprint=None
+            self._load_lock=threading.Lock()
+            self._stop_event=threading.Event()
+            self._watcher=None
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def _set_release_dir(self, release_dir: str):
+        self.release_dir=release_dir
+        self.preprocessor_file_path=os.path.join(release_dir, MODEL_SERVING_PREPROCESSOR_FILE_NAME)
+        self.model_file_path=os.path.join(release_dir, MODEL_SERVING_MODEL_FILE_NAME)
+        self.drift_reference_file_path=os.path.join(release_dir, MODEL_SERVING_DRIFT_REFERENCE_FILE_NAME)
+        self.bundle_file_path=os.path.join(release_dir, MODEL_SERVING_BUNDLE_FILE_NAME)
+
+    def _get_fingerprint(self):
+        """
+            Cheap change detection based on the served release and mtime and size of its artifacts
+        """
+        release_dir=get_release_dir(self.model_dir)
+        if release_dir!=self.release_dir:
+            return (release_dir,)
+        fingerprint=[release_dir]
+        for file_path in (self.preprocessor_file_path, self.model_file_path):
+            if not os.path.exists(file_path):
+                return None
+            stat=os.stat(file_path)
+            fingerprint.append((stat.st_mtime_ns, stat.st_size))
+        # The bundle and the drift reference are optional, the pickles alone are still served
+        for file_path in (self.bundle_file_path, self.drift_reference_file_path):
+            if os.path.exists(file_path):
+                stat=os.stat(file_path)
+                fingerprint.append((stat.st_mtime_ns, stat.st_size))
+            else:
+                fingerprint.append(None)
+        return tuple(fingerprint)
+
+    def _get_bundle_version(self) -> str:
+        checksum=hashlib.sha256()
+        with open(self.bundle_file_path, "rb") as file_obj:
+            for block in iter(lambda: file_obj.read(1<<20), b""):
+                checksum.update(block)
+        return checksum.hexdigest()[:12]
+
+    def _load_drift_reference(self) -> Optional[dict]:
+        if not os.path.exists(self.drift_reference_file_path):
+            return None
+        try:
+            return read_yaml_file(self.drift_reference_file_path)
+        except Exception as e:
+            logging.info(f"Drift reference could not be loaded, serving without drift checks: {e}")
+            return None
+
+    def load(self) -> ServedModel:
+        try:
+            with self._load_lock:
+                self._set_release_dir(get_release_dir(self.model_dir))
+                fingerprint=self._get_fingerprint()
+                if fingerprint is None:
+                    raise Exception(f"Model artifacts not found in: {self.model_dir}")
+
+                start_time=time.perf_counter()
+                # Version is the checksum of the artifacts, so a touched but unchanged file is not reloaded
+                use_bundle=os.path.exists(self.bundle_file_path)
+                if use_bundle:
+                    version=self._get_bundle_version()
+                else:
+                    with open(self.preprocessor_file_path, "rb") as file_obj:
+                        preprocessor_bytes=file_obj.read()
+                    with open(self.model_file_path, "rb") as file_obj:
+                        model_bytes=file_obj.read()
+                    checksum=hashlib.sha256(preprocessor_bytes)
+                    checksum.update(model_bytes)
+                    version=checksum.hexdigest()[:12]
+                drift_reference=self._load_drift_reference()
+                if self._served_model is not None and self._served_model.version==version:
+                    if self._served_model.drift_reference!=drift_reference:
+                        self._served_model=replace(self._served_model, drift_reference=drift_reference)
+                    self._fingerprint=fingerprint
+                    return self._served_model
+
+                if use_bundle:
+                    # Arrays stay in the page cache and are shared by every worker mapping the bundle
+                    network_model=load_mmap_object(self.bundle_file_path, mmap_mode=self.mmap_mode)
+                else:
+                    network_model=NetworkModel(preprocessor=pickle.loads(preprocessor_bytes),
+                                               model=pickle.loads(model_bytes))
+                served_model=ServedModel(
+                    network_model=network_model,
+                    version=version,
+                    loaded_at=datetime.now(),
+                    load_duration=time.perf_counter()-start_time,
+                    drift_reference=drift_reference
+                )
+
+                # Single reference assignment, in-flight requests keep the model they already hold
+                self._served_model=served_model
+                self._fingerprint=fingerprint
+                logging.info(f"Loaded model version {version} from {self.model_dir} in {served_model.load_duration:.3f}s")
+                return served_model
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def get(self) -> ServedModel:
+        try:
+            served_model=self._served_model
+            if served_model is None:
+                served_model=self.load()
+            return served_model
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def refresh(self) -> ServedModel:
+        """
+            Reload immediately if the artifacts changed since the last load
+        """
+        try:
+            if self._served_model is None or self._get_fingerprint()!=self._fingerprint:
+                return self.load()
+            return self._served_model
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def _watch(self):
+        pending_fingerprint=None
+        while not self._stop_event.wait(self.reload_interval):
+            try:
+                fingerprint=self._get_fingerprint()
+                if fingerprint is None or fingerprint==self._fingerprint:
+                    pending_fingerprint=None
+                    continue
+
+                # Wait until the artifacts stop changing for one interval before swapping
+                if fingerprint!=pending_fingerprint:
+                    pending_fingerprint=fingerprint
+                    continue
+                self.load()
+                pending_fingerprint=None
+            except Exception as e:
+                logging.info(f"Model reload failed, keeping the current model: {e}")
+
+    def start(self):
+        try:
+            try:
+                self.load()
+            except Exception as e:
+                logging.info(f"No model loaded at startup: {e}")
+
+            if self.reload_interval and self._watcher is None:
+                self._stop_event.clear()
+                self._watcher=threading.Thread(target=self._watch, name="model-registry-watcher", daemon=True)
+                self._watcher.start()
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def stop(self):
+        try:
+            self._stop_event.set()
+            if self._watcher is not None:
+                self._watcher.join()
+                self._watcher=None
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
@@ -0,0 +1,125 @@
+import os
+import re
+import sys
+import uuid
+import queue
+import asyncio
+import threading
+import pandas as pd
+from datetime import datetime
+from src.logging.logger import logging
+from src.exception.exception import NetworkSecurityException
+from src.constants import PREDICTION_OUTPUT_DIR, PREDICTION_OUTPUT_QUEUE_SIZE, PREDICTION_OUTPUT_MAX_FILES
+
+# Names produced by new_prediction_id, other files in the output directory are never pruned
+PREDICTION_OUTPUT_FILE_PATTERN=re.compile(r"^\d{8}_\d{6}_[0-9a-f]{8}\.csv$")
+
+class PredictionOutputSink:
+    """
+        Writes every prediction response to its own CSV file from a background thread.
+        The queue is bounded, when it is full submit waits for space off the event loop
+        instead of dropping results. After each write only the newest max_files
+        prediction files are kept
+    """
+    def __init__(self, output_dir: str=PREDICTION_OUTPUT_DIR, max_queue_size: int=PREDICTION_OUTPUT_QUEUE_SIZE,
+                 max_files: int=PREDICTION_OUTPUT_MAX_FILES):
+        try:
+            self.output_dir=output_dir
+            self.max_files=max_files
+            self.written=0
+            self.failed=0
+            self.pruned=0
+            self._queue=queue.Queue(maxsize=max_queue_size)
+            self._writer=None
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def start(self):
+        try:
+            if self._writer is None:
+                os.makedirs(self.output_dir, exist_ok=True)
+                self._writer=threading.Thread(target=self._run, name="prediction-output-writer", daemon=True)
+                self._writer.start()
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def stop(self):
+        """
+            Write everything still queued, then stop the writer
+        """
+        try:
+            if self._writer is not None:
+                self._queue.put(None)
+                self._writer.join()
+                self._writer=None
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def new_prediction_id(self) -> str:
+        return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+    async def submit(self, dataframe: pd.DataFrame, prediction_id: str=None) -> str:
+        """
+            Queue the dataframe and return the path it will be written to
+        """
+        try:
+            if self._writer is None:
+                raise Exception("Prediction output sink is not running")
+            prediction_id=prediction_id or self.new_prediction_id()
+            file_path=os.path.join(self.output_dir, f"{prediction_id}.csv")
+            try:
+                self._queue.put_nowait((file_path, dataframe))
+            except queue.Full:
+                await asyncio.to_thread(self._queue.put, (file_path, dataframe))
+            return file_path
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def _run(self):
+        while True:
+            item=self._queue.get()
+            if item is None:
+                break
+            file_path, dataframe=item
+            try:
+                # Written under a temporary name so readers never pick up a partial file
+                temp_file_path=f"{file_path}.tmp"
+                dataframe.to_csv(temp_file_path)
+                os.replace(temp_file_path, file_path)
+                self.written+=1
+            except Exception as e:
+                self.failed+=1
+                logging.info(f"Writing prediction output {file_path} failed: {e}")
+            self._prune()
+
+    def _prune(self):
+        """
+            Delete the oldest prediction files beyond max_files. The directory is listed rather
+            than tracked, so files written by other workers or earlier runs count too
+        """
+        if self.max_files is None:
+            return
+        try:
+            file_paths=[entry for entry in os.scandir(self.output_dir)
+                        if entry.is_file() and PREDICTION_OUTPUT_FILE_PATTERN.match(entry.name)]
+            if len(file_paths)<=self.max_files:
+                return
+            file_paths.sort(key=lambda entry: (entry.stat().st_mtime_ns, entry.name))
+            for entry in file_paths[:len(file_paths)-self.max_files]:
+                try:
+                    os.remove(entry.path)
+                    self.pruned+=1
+                except FileNotFoundError:
+                    # Already pruned by another worker
+                    pass
+        except Exception as e:
+            logging.info(f"Pruning prediction outputs in {self.output_dir} failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "output_dir": self.output_dir,
+            "pending": self._queue.qsize(),
+            "written": self.written,
+            "failed": self.failed,
+            "pruned": self.pruned
+        }
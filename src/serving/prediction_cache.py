@@ -0,0 +1,158 @@
+import sys
+import time
+import threading
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from src.utils.ml_utils.model.estimator import NetworkModel
+from src.exception.exception import NetworkSecurityException
+from src.utils.main_utils.ternary_codec import pack_ternary, TERNARY_VALUES_PER_WORD
+from src.constants import (
+    PREDICTION_CACHE_MAX_SIZE,
+    PREDICTION_CACHE_TTL_SECONDS
+)
+
+def pack_rows(matrix: np.ndarray):
+    """
+        One uint64 key per row. A row is cacheable when every feature is one of the
+        schema values or missing, anything else is scored without the cache
+    """
+    try:
+        n_rows, n_features=matrix.shape
+        if n_features>TERNARY_VALUES_PER_WORD:
+            return np.zeros(n_rows, dtype=np.uint64), np.zeros(n_rows, dtype=bool)
+        packed, cacheable=pack_ternary(matrix)
+        return packed[:, 0], cacheable
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+class PredictionCache:
+    """
+        Bounded LRU of predictions keyed by the packed feature row. Entries expire
+        after ttl seconds and the whole cache is dropped when the model version changes.
+        Predictions are returned in the dtype the model produced them in
+    """
+    def __init__(self, max_size: int=PREDICTION_CACHE_MAX_SIZE, ttl: float=PREDICTION_CACHE_TTL_SECONDS):
+        try:
+            self.max_size=max_size
+            self.ttl=ttl
+            self.version=None
+            self.prediction_dtype=None
+            self.hits=0
+            self.misses=0
+            self.uncacheable=0
+            self.evictions=0
+            self.invalidations=0
+            self._entries=OrderedDict()
+            self._lock=threading.Lock()
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def _check_version(self, version: str):
+        if version!=self.version:
+            if self.version is not None:
+                self.invalidations+=1
+            self._entries.clear()
+            self.version=version
+            self.prediction_dtype=None
+
+    def lookup(self, keys: np.ndarray, version: str):
+        """
+            Cached predictions for keys and the mask of keys that were found
+        """
+        try:
+            found=np.zeros(len(keys), dtype=bool)
+            now=time.monotonic()
+            with self._lock:
+                self._check_version(version)
+                predictions=np.zeros(len(keys), dtype=np.float64 if self.prediction_dtype is None else self.prediction_dtype)
+                for i, key in enumerate(keys.tolist()):
+                    entry=self._entries.get(key)
+                    if entry is None:
+                        continue
+                    if entry[1]<now:
+                        del self._entries[key]
+                        continue
+                    self._entries.move_to_end(key)
+                    predictions[i]=entry[0]
+                    found[i]=True
+                self.hits+=int(found.sum())
+                self.misses+=int(len(keys)-found.sum())
+            return predictions, found
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def store(self, keys: np.ndarray, predictions: np.ndarray, version: str):
+        try:
+            expires_at=time.monotonic()+self.ttl
+            with self._lock:
+                self._check_version(version)
+                self.prediction_dtype=predictions.dtype
+                for key, prediction in zip(keys.tolist(), predictions.tolist()):
+                    self._entries[key]=(prediction, expires_at)
+                    self._entries.move_to_end(key)
+                while len(self._entries)>self.max_size:
+                    self._entries.popitem(last=False)
+                    self.evictions+=1
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def predict(self, network_model: NetworkModel, version: str, x: pd.DataFrame) -> np.ndarray:
+        """
+            NetworkModel.predict for the rows not in the cache, each distinct row is scored once
+        """
+        try:
+            columns=list(network_model.preprocessor.feature_names_in_)
+            if not set(columns).issubset(x.columns):
+                return network_model.predict(x)
+
+            keys, cacheable=pack_rows(x[columns].to_numpy(dtype=np.float64))
+            cacheable_rows=np.flatnonzero(cacheable)
+            uncacheable_rows=np.flatnonzero(~cacheable)
+
+            cached, found=self.lookup(keys[cacheable_rows], version)
+            missed_rows=cacheable_rows[~found]
+            missed_keys, first_rows, inverse=np.unique(keys[missed_rows], return_index=True, return_inverse=True)
+
+            rows_to_predict=np.concatenate([missed_rows[first_rows], uncacheable_rows])
+            predicted=np.asarray(network_model.predict(x.iloc[rows_to_predict])) if len(rows_to_predict) else None
+            # Same dtype as an uncached NetworkModel.predict, whether or not every row was a hit
+            y_pred=np.zeros(len(x), dtype=cached.dtype if predicted is None else predicted.dtype)
+            y_pred[cacheable_rows[found]]=cached[found]
+            if predicted is not None:
+                y_pred[missed_rows]=predicted[:len(first_rows)][inverse.ravel()]
+                y_pred[uncacheable_rows]=predicted[len(first_rows):]
+                self.store(missed_keys, predicted[:len(first_rows)], version)
+            with self._lock:
+                self.uncacheable+=len(uncacheable_rows)
+            return y_pred
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups=self.hits+self.misses
+            return {
+                "version": self.version,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits/lookups if lookups else 0.0,
+                "uncacheable": self.uncacheable,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+class CachedNetworkModel:
+    """
+        NetworkModel stand-in whose predict goes through the prediction cache
+    """
+    def __init__(self, network_model: NetworkModel, version: str, prediction_cache: PredictionCache):
+        self.network_model=network_model
+        self.version=version
+        self.prediction_cache=prediction_cache
+
+    def predict(self, x: pd.DataFrame) -> np.ndarray:
+        return self.prediction_cache.predict(self.network_model, self.version, x)
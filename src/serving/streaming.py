@@ -0,0 +1,36 @@
+import sys
+import pandas as pd
+from typing import IO, Iterator
+from src.logging.logger import logging
+from src.constants import PREDICTION_COLUMN_NAME
+from src.constants import PREDICTION_STREAM_CHUNK_SIZE
+from src.utils.ml_utils.model.estimator import NetworkModel
+from src.exception.exception import NetworkSecurityException
+from src.utils.main_utils.instrumentation import timer
+
+def stream_predictions(file_obj: IO,
+                       network_model: NetworkModel,
+                       chunk_size: int=PREDICTION_STREAM_CHUNK_SIZE,
+                       output_format: str="csv") -> Iterator[str]:
+    """
+        Score a CSV upload chunk by chunk so memory is bounded by chunk_size rows
+    """
+    try:
+        total_rows=0
+        reader=pd.read_csv(file_obj, chunksize=chunk_size)
+        chunk_index=0
+        while True:
+            with timer("csv_parse", route="/predict/stream"):
+                chunk=next(reader, None)
+            if chunk is None:
+                break
+            chunk[PREDICTION_COLUMN_NAME]=network_model.predict(chunk)
+            total_rows+=len(chunk)
+            if output_format=="ndjson":
+                yield chunk.to_json(orient="records", lines=True).rstrip("\n")+"\n"
+            else:
+                yield chunk.to_csv(index=False, header=chunk_index==0)
+            chunk_index+=1
+        logging.info(f"Streamed predictions for {total_rows} rows")
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
@@ -0,0 +1,162 @@
+import sys
+import time
+import bisect
+import threading
+import functools
+from contextlib import nullcontext
+from src.exception.exception import NetworkSecurityException
+from src.constants import (
+    INSTRUMENTATION_ENABLED,
+    INSTRUMENTATION_METRIC_PREFIX,
+    INSTRUMENTATION_HISTOGRAM_BUCKETS
+)
+
+# Shared by every disabled timer so a disabled timer allocates nothing
+_DISABLED_TIMER=nullcontext()
+
+def _escape_label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ""
+    return "{"+",".join(f'{name}="{_escape_label_value(value)}"' for name, value in labels)+"}"
+
+class Histogram:
+    """
+        Durations of one operation and label set, bucketed the way Prometheus expects
+    """
+    def __init__(self, buckets: list):
+        self.buckets=buckets
+        # One extra slot for values above the last bucket, reported as le="+Inf"
+        self.bucket_counts=[0]*(len(buckets)+1)
+        self.count=0
+        self.sum=0.0
+        self.max=0.0
+
+    def observe(self, value: float):
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)]+=1
+        self.count+=1
+        self.sum+=value
+        if value>self.max:
+            self.max=value
+
+class _Timer:
+    __slots__=("registry", "operation", "labels", "start_time")
+
+    def __init__(self, registry, operation: str, labels: dict):
+        self.registry=registry
+        self.operation=operation
+        self.labels=labels
+
+    def __enter__(self):
+        self.start_time=time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.registry.observe(self.operation, time.perf_counter()-self.start_time, **self.labels)
+        return False
+
+class MetricsRegistry:
+    """
+        Process wide duration histograms keyed by operation name and labels.
+        timer() is a context manager and timed() a decorator, both cost one
+        attribute check when instrumentation is disabled
+    """
+    def __init__(self,
+                 enabled: bool=INSTRUMENTATION_ENABLED,
+                 prefix: str=INSTRUMENTATION_METRIC_PREFIX,
+                 buckets: list=INSTRUMENTATION_HISTOGRAM_BUCKETS):
+        try:
+            self.enabled=enabled
+            self.prefix=prefix
+            self.buckets=sorted(buckets)
+            self._histograms={}
+            self._lock=threading.Lock()
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def observe(self, operation: str, seconds: float, **labels):
+        if not self.enabled:
+            return
+        key=(operation, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram=self._histograms.get(key)
+            if histogram is None:
+                histogram=self._histograms[key]=Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def timer(self, operation: str, **labels):
+        if not self.enabled:
+            return _DISABLED_TIMER
+        return _Timer(self, operation, labels)
+
+    def timed(self, operation: str, **labels):
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                with _Timer(self, operation, labels):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def summary(self) -> dict:
+        """
+            count, total, mean and max seconds per operation, for the pipeline summary artifact
+        """
+        with self._lock:
+            return {
+                f"{operation}{_format_labels(labels)}": {
+                    "count": histogram.count,
+                    "total_seconds": histogram.sum,
+                    "mean_seconds": histogram.sum/histogram.count if histogram.count else 0.0,
+                    "max_seconds": histogram.max
+                }
+                for (operation, labels), histogram in sorted(self._histograms.items())
+            }
+
+    def render_prometheus(self, extra_metrics: list=None) -> str:
+        """
+            Prometheus text exposition of the histograms. extra_metrics holds
+            (name, type, help, value, labels) tuples for counters and gauges kept elsewhere
+        """
+        try:
+            name=f"{self.prefix}_operation_duration_seconds"
+            lines=[f"# HELP {name} Wall time of instrumented operations in seconds",
+                   f"# TYPE {name} histogram"]
+            with self._lock:
+                histograms=sorted(self._histograms.items())
+                for (operation, labels), histogram in histograms:
+                    labels=(("operation", operation),)+labels
+                    cumulative=0
+                    for bound, bucket_count in zip(self.buckets+["+Inf"], histogram.bucket_counts):
+                        cumulative+=bucket_count
+                        lines.append(f"{name}_bucket{_format_labels(labels+(('le', bound),))} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+
+            for metric_name, metric_type, help_text, value, labels in extra_metrics or []:
+                metric_name=f"{self.prefix}_{metric_name}"
+                lines.append(f"# HELP {metric_name} {help_text}")
+                lines.append(f"# TYPE {metric_name} {metric_type}")
+                lines.append(f"{metric_name}{_format_labels(sorted((labels or {}).items()))} {value}")
+            return "\n".join(lines)+"\n"
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+metrics_registry=MetricsRegistry()
+
+def timer(operation: str, **labels):
+    """
+        with timer("csv_parse", route="/predict"): ...
+    """
+    return metrics_registry.timer(operation, **labels)
+
+def timed(operation: str, **labels):
+    return metrics_registry.timed(operation, **labels)
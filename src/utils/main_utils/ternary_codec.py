@@ -0,0 +1,126 @@
+import sys
+import numpy as np
+import pandas as pd
+from src.constants import DATA_VALIDATION_FEATURE_VALUES
+from src.exception.exception import NetworkSecurityException
+
+# 2 bits per value, codes 0-2 index DATA_VALIDATION_FEATURE_VALUES and 3 marks a missing value
+TERNARY_MISSING_CODE=3
+TERNARY_VALUES_PER_WORD=32
+
+def is_ternary(array: np.ndarray, values: list=DATA_VALIDATION_FEATURE_VALUES, allow_missing: bool=False) -> bool:
+    try:
+        array=np.asarray(array)
+        valid=np.isin(array, values)
+        if allow_missing and np.issubdtype(array.dtype, np.floating):
+            valid|=np.isnan(array)
+        return bool(valid.all())
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+def compact_array(array: np.ndarray) -> np.ndarray:
+    """
+        int8 copy of an array whose values are whole numbers in the int8 range, the array itself otherwise
+    """
+    try:
+        array=np.asarray(array)
+        if array.dtype==np.int8 or array.size==0 or not np.issubdtype(array.dtype, np.number):
+            return array
+        if np.issubdtype(array.dtype, np.floating) and not np.isfinite(array).all():
+            return array
+        limits=np.iinfo(np.int8)
+        if array.min()<limits.min or array.max()>limits.max or not (array==np.round(array)).all():
+            return array
+        return array.astype(np.int8)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+def pack_ternary(matrix: np.ndarray, values: list=DATA_VALIDATION_FEATURE_VALUES):
+    """
+        Rows packed 2 bits per value into ceil(n_columns/32) uint64 words. Returns the packed
+        words and a mask of the rows where every value is one of values or missing
+    """
+    try:
+        matrix=np.asarray(matrix)
+        n_rows, n_columns=matrix.shape
+        if len(values)>TERNARY_MISSING_CODE:
+            raise Exception(f"At most {TERNARY_MISSING_CODE} values fit in 2 bits, got {values}")
+        n_words=max(1, -(-n_columns//TERNARY_VALUES_PER_WORD))
+        packed=np.zeros((n_rows, n_words), dtype=np.uint64)
+        valid=np.ones(n_rows, dtype=bool)
+        is_float=np.issubdtype(matrix.dtype, np.floating)
+        for j in range(n_columns):
+            column=matrix[:, j]
+            codes=np.full(n_rows, 255, dtype=np.uint8)
+            for code, value in enumerate(values):
+                codes[column==value]=code
+            if is_float:
+                codes[np.isnan(column)]=TERNARY_MISSING_CODE
+            valid&=codes!=255
+            word, position=divmod(j, TERNARY_VALUES_PER_WORD)
+            packed[:, word]|=(codes&TERNARY_MISSING_CODE).astype(np.uint64)<<np.uint64(2*position)
+        return packed, valid
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+def unpack_ternary(packed: np.ndarray, n_columns: int, values: list=DATA_VALIDATION_FEATURE_VALUES,
+                   dtype=np.float32) -> np.ndarray:
+    """
+        Inverse of pack_ternary. Missing values come back as NaN, which an integer dtype cannot hold
+    """
+    try:
+        packed=np.asarray(packed, dtype=np.uint64)
+        n_rows=packed.shape[0]
+        is_integer=np.issubdtype(np.dtype(dtype), np.integer)
+        table=np.array(list(values)+[0 if is_integer else np.nan], dtype=dtype)
+        # Column-major so each column of the result is contiguous
+        matrix=np.empty((n_rows, n_columns), dtype=dtype, order="F")
+        for j in range(n_columns):
+            word, position=divmod(j, TERNARY_VALUES_PER_WORD)
+            codes=((packed[:, word]>>np.uint64(2*position))&np.uint64(TERNARY_MISSING_CODE)).astype(np.uint8)
+            if is_integer and (codes==TERNARY_MISSING_CODE).any():
+                raise Exception(f"Column {j} has missing values, unpack it to a float dtype")
+            matrix[:, j]=table[codes]
+        return matrix
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+def save_packed_dataframe(file_obj, dataframe: pd.DataFrame, values: list=DATA_VALIDATION_FEATURE_VALUES) -> None:
+    """
+        npz with the ternary columns packed into uint64 words, other numeric columns stored as
+        they are and non-numeric ones as strings, npz does not hold object arrays
+    """
+    try:
+        packed_columns=[column for column in dataframe.columns
+                        if pd.api.types.is_numeric_dtype(dataframe[column])
+                        and is_ternary(dataframe[column].to_numpy(), values, allow_missing=True)]
+        packed, _=pack_ternary(dataframe[packed_columns].to_numpy(), values)
+        missing_columns=[column for column in packed_columns if dataframe[column].isna().any()]
+        raw_columns=[column for column in dataframe.columns if column not in packed_columns]
+        np.savez(file_obj,
+                 columns=np.array(list(dataframe.columns), dtype=str),
+                 packed_columns=np.array(packed_columns, dtype=str),
+                 missing_columns=np.array(missing_columns, dtype=str),
+                 values=np.array(values),
+                 packed=packed,
+                 **{f"raw_{i}": dataframe[column].to_numpy() if pd.api.types.is_numeric_dtype(dataframe[column])
+                    else dataframe[column].to_numpy(dtype=str) for i, column in enumerate(raw_columns)})
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+def load_packed_dataframe(file_obj) -> pd.DataFrame:
+    try:
+        with np.load(file_obj, allow_pickle=False) as archive:
+            columns=archive["columns"].tolist()
+            packed_columns=archive["packed_columns"].tolist()
+            missing_columns=set(archive["missing_columns"].tolist())
+            values=archive["values"].tolist()
+            matrix=unpack_ternary(archive["packed"], len(packed_columns), values,
+                                  dtype=np.float32 if missing_columns else np.int8)
+            raw_columns=[column for column in columns if column not in packed_columns]
+            data={column: archive[f"raw_{i}"] for i, column in enumerate(raw_columns)}
+        for j, column in enumerate(packed_columns):
+            data[column]=matrix[:, j] if column in missing_columns or matrix.dtype==np.int8 else matrix[:, j].astype(np.int8)
+        return pd.DataFrame(data, columns=columns)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
@@ -1,17 +1,19 @@
 import os
 import sys
 import yaml
+import joblib
 import pickle
+import itertools
 import numpy as np
-from sklearn.metrics import r2_score
+import pandas as pd
 from src.logging.logger import logging
-from sklearn.model_selection import GridSearchCV
 from src.exception.exception import NetworkSecurityException
+from src.utils.main_utils.ternary_codec import save_packed_dataframe, load_packed_dataframe, compact_array
 
 def read_yaml_file(file_path: str) -> dict:
     try:
         with open(file_path, 'rb') as f:
-            return yaml.safe_load(file_path)
+            return yaml.safe_load(f)
     except Exception as e:
         raise NetworkSecurityException(e, sys)
     
@@ -34,16 +36,215 @@ def save_numpy_array_data(file_path: str, array: np.array) -> None:
     except Exception as e:
         raise NetworkSecurityException(e, sys)
     
+def get_schema_dtype_plan(schema_file_path: str) -> dict:
+    """
+        Storage dtype of every schema column, the integer features are all in {-1, 0, 1} so int64 is stored as int8
+    """
+    try:
+        schema=read_yaml_file(schema_file_path)
+        dtype_plan={}
+        for column in schema["columns"]:
+            (column_name, column_dtype), = column.items()
+            dtype_plan[column_name]="int8" if str(column_dtype).strip().startswith("int") else str(column_dtype).strip()
+        return dtype_plan
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+def _apply_dtype_plan(dataframe: pd.DataFrame, dtype_plan: dict) -> dict:
+    """
+        Planned dtype per column, falling back to float32 for missing values and to the
+        original dtype when the values do not fit
+    """
+    dtypes={}
+    for column in dataframe.columns:
+        values=dataframe[column]
+        planned_dtype=dtype_plan.get(column) if dtype_plan else None
+        if planned_dtype is None or not pd.api.types.is_numeric_dtype(values):
+            dtypes[column]=values.dtype
+        elif values.isna().any():
+            dtypes[column]=np.dtype("float32")
+        elif np.issubdtype(np.dtype(planned_dtype), np.integer):
+            limits=np.iinfo(np.dtype(planned_dtype))
+            fits=values.empty or (values.min()>=limits.min and values.max()<=limits.max and (values==values.round()).all())
+            dtypes[column]=np.dtype(planned_dtype) if fits else values.dtype
+        else:
+            dtypes[column]=np.dtype(planned_dtype)
+    return dtypes
+
+def save_dataframe(file_path: str, dataframe: pd.DataFrame, dtype_plan: dict=None) -> None:
+    """
+        Write a dataframe in the format given by the file extension: csv, npy, parquet or packed.
+        npy files hold one structured array so they can be memory-mapped on load, packed files
+        hold the {-1, 0, 1} columns at 2 bits per value
+    """
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        file_format=os.path.splitext(file_path)[1].lstrip(".")
+        if file_format=="csv":
+            dataframe.to_csv(file_path, index=False, header=True)
+        elif file_format=="npy":
+            dtypes=_apply_dtype_plan(dataframe, dtype_plan)
+            records=np.empty(len(dataframe), dtype=[(column, dtypes[column]) for column in dataframe.columns])
+            for column in dataframe.columns:
+                records[column]=dataframe[column].to_numpy()
+            with open(file_path, "wb") as file_obj:
+                np.save(file_obj, records)
+        elif file_format=="parquet":
+            # Requires pyarrow or fastparquet
+            dataframe.astype(_apply_dtype_plan(dataframe, dtype_plan)).to_parquet(file_path, index=False)
+        elif file_format=="packed":
+            # Written through a file object so numpy does not append .npz
+            with open(file_path, "wb") as file_obj:
+                save_packed_dataframe(file_obj, dataframe)
+        else:
+            raise Exception(f"Unsupported artifact format: {file_path}")
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+def load_dataframe(file_path: str, mmap: bool=False) -> pd.DataFrame:
+    try:
+        file_format=os.path.splitext(file_path)[1].lstrip(".")
+        if file_format=="csv":
+            return pd.read_csv(file_path)
+        if file_format=="npy":
+            records=np.load(file_path, mmap_mode="r" if mmap else None)
+            return pd.DataFrame({column: records[column] for column in records.dtype.names})
+        if file_format=="parquet":
+            return pd.read_parquet(file_path)
+        if file_format=="packed":
+            with open(file_path, "rb") as file_obj:
+                return load_packed_dataframe(file_obj)
+        raise Exception(f"Unsupported artifact format: {file_path}")
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+def iter_dataframe_chunks(file_path: str, chunk_size: int):
+    """
+        Yield the rows of a dataframe artifact chunk_size at a time. csv is read incrementally,
+        npy is memory-mapped and only the sliced rows are copied, parquet and packed files are
+        loaded whole and then sliced
+    """
+    try:
+        file_format=os.path.splitext(file_path)[1].lstrip(".")
+        if file_format=="csv":
+            yield from pd.read_csv(file_path, chunksize=chunk_size)
+            return
+        if file_format=="npy":
+            records=np.load(file_path, mmap_mode="r")
+            for start in range(0, len(records), chunk_size):
+                chunk=np.array(records[start:start+chunk_size])
+                yield pd.DataFrame({column: chunk[column] for column in chunk.dtype.names},
+                                   index=pd.RangeIndex(start, start+len(chunk)))
+            return
+        dataframe=load_dataframe(file_path)
+        for start in range(0, len(dataframe), chunk_size):
+            yield dataframe.iloc[start:start+chunk_size]
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+def count_dataframe_rows(file_path: str, chunk_size: int=1_000_000) -> int:
+    try:
+        if file_path.endswith(".npy"):
+            return len(np.load(file_path, mmap_mode="r"))
+        if file_path.endswith(".csv"):
+            return sum(len(chunk) for chunk in pd.read_csv(file_path, usecols=[0], chunksize=chunk_size))
+        return len(load_dataframe(file_path))
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+def save_dataframe_chunks(file_path: str, get_chunks, dtype_plan: dict=None) -> None:
+    """
+        Write the dataframe chunks returned by get_chunks() without holding them all.
+        csv is written in one pass. npy takes two, the first finds the row count and the
+        dtype of every column, so get_chunks must return the same chunks on each call.
+        parquet and packed files are concatenated and written whole, their peak memory is
+        the whole dataframe
+    """
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        file_format=os.path.splitext(file_path)[1].lstrip(".")
+        if file_format=="csv":
+            for chunk_index, chunk in enumerate(get_chunks()):
+                chunk.to_csv(file_path, mode="w" if chunk_index==0 else "a", header=chunk_index==0, index=False)
+        elif file_format=="npy":
+            n_rows=0
+            dtypes={}
+            for chunk in get_chunks():
+                n_rows+=len(chunk)
+                for column, dtype in _apply_dtype_plan(chunk, dtype_plan).items():
+                    dtypes[column]=np.result_type(dtypes[column], dtype) if column in dtypes else dtype
+            temp_file_path=f"{file_path}.tmp"
+            records=np.lib.format.open_memmap(temp_file_path, mode="w+", shape=(n_rows,),
+                                              dtype=[(column, dtype) for column, dtype in dtypes.items()])
+            start=0
+            for chunk in get_chunks():
+                for column in chunk.columns:
+                    records[column][start:start+len(chunk)]=chunk[column].to_numpy()
+                start+=len(chunk)
+            records.flush()
+            del records
+            os.replace(temp_file_path, file_path)
+        else:
+            save_dataframe(file_path, pd.concat(list(get_chunks()), ignore_index=True), dtype_plan)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+def append_dataframe(file_path: str, dataframe: pd.DataFrame, dtype_plan: dict=None, chunk_size: int=100_000) -> None:
+    """
+        CSV is appended in place. npy is rewritten with the new rows at the end, chunk_size
+        rows of the old file at a time. parquet and packed files are loaded whole and
+        rewritten, every append costs the memory and time of the whole file
+    """
+    try:
+        if not os.path.exists(file_path):
+            save_dataframe(file_path, dataframe, dtype_plan)
+        elif file_path.endswith(".csv"):
+            dataframe.to_csv(file_path, mode="a", index=False, header=False)
+        elif file_path.endswith(".npy"):
+            # The old file is only replaced once the new one is complete
+            save_dataframe_chunks(file_path,
+                                  lambda: itertools.chain(iter_dataframe_chunks(file_path, chunk_size), [dataframe]),
+                                  dtype_plan)
+        else:
+            save_dataframe(file_path, pd.concat([load_dataframe(file_path), dataframe], ignore_index=True), dtype_plan)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
 def save_object(file_path: str, obj: object) -> None:
     try:
         logging.info("Entered the save_object method of utils.py")
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        with open(file_path, "wb") as file_obj:
+        # Write to a temporary file and rename so readers never see a partial pickle
+        temp_file_path=f"{file_path}.tmp"
+        with open(temp_file_path, "wb") as file_obj:
             pickle.dump(obj, file_obj)
+        os.replace(temp_file_path, file_path)
         logging.info("Exited the save_object method of utils.py")
     except Exception as e:
         raise NetworkSecurityException(e, sys)
     
+def save_mmap_object(file_path: str, obj: object) -> None:
+    """
+        joblib dump without compression, the numpy arrays inside obj can then be
+        memory-mapped by load_mmap_object and shared between processes
+    """
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        # Replaced atomically, processes that mapped the previous file keep their pages
+        temp_file_path=f"{file_path}.tmp"
+        joblib.dump(obj, temp_file_path)
+        os.replace(temp_file_path, file_path)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+def load_mmap_object(file_path: str, mmap_mode: str="r") -> object:
+    try:
+        if not os.path.exists(file_path):
+            raise Exception(f"The file: {file_path} does not exists")
+        return joblib.load(file_path, mmap_mode=mmap_mode)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
 def load_object(file_path: str) -> object:
     try:
         if not os.path.exists(file_path):
@@ -54,36 +255,47 @@ def load_object(file_path: str) -> object:
     except Exception as e:
         raise NetworkSecurityException(e, sys)
     
-def load_numpy_array_data(file_path: str) -> np.array:
+def save_numpy_array_chunks(file_path: str, chunks, n_rows: int) -> None:
+    """
+        Write n_rows of row chunks into one npy file through a memory map, so the whole array
+        is never held in memory. Like compact_array the file is int8 while every chunk fits,
+        it is rewritten as float64 at the first chunk that does not
+    """
     try:
-        with open(file_path, 'rb') as file_obj:
-            return np.load(file_obj)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        temp_file_path=f"{file_path}.tmp"
+        array=None
+        start=0
+        for chunk in chunks:
+            # An empty chunk writes nothing and would give the upgrade copy a zero step
+            if len(chunk)==0:
+                continue
+            chunk=compact_array(chunk)
+            if array is None:
+                dtype=np.int8 if chunk.dtype==np.int8 else np.float64
+                array=np.lib.format.open_memmap(temp_file_path, mode="w+", dtype=dtype, shape=(n_rows, chunk.shape[1]))
+            elif chunk.dtype!=np.int8 and array.dtype==np.int8:
+                upgraded=np.lib.format.open_memmap(f"{temp_file_path}.float64", mode="w+", dtype=np.float64, shape=array.shape)
+                for copy_start in range(0, start, len(chunk)):
+                    upgraded[copy_start:min(copy_start+len(chunk), start)]=array[copy_start:min(copy_start+len(chunk), start)]
+                del array
+                os.replace(f"{temp_file_path}.float64", temp_file_path)
+                array=upgraded
+            array[start:start+len(chunk)]=chunk
+            start+=len(chunk)
+        if array is None or start!=n_rows:
+            raise Exception(f"Expected {n_rows} rows for {file_path}, got {start}")
+        array.flush()
+        del array
+        os.replace(temp_file_path, file_path)
     except Exception as e:
         raise NetworkSecurityException(e, sys)
-    
-def evaluate_models(x_train, y_train, x_test, y_test, models, param):
-    try:
-        report={}
-        for i in range(len(list(models))):
-            model=list(models.values())[i]
-            para=param[list(models.keys())[i]]
-
-            gs=GridSearchCV(model, para, cv=3)
-            gs.fit(x_train, y_train)
-
-            model.set_params(**gs.best_params_)
-            model.fit(x_train, y_train)
-
-            y_train_pred=model.predict(x_train)
-            y_test_pred=model.predict(x_test)
-
-            train_model_score=r2_score(y_train, y_train_pred)
-            test_model_score=r2_score(y_test, y_test_pred)
-
-            report[list(models.keys())[i]] = test_model_score
-
-            return report
 
+def load_numpy_array_data(file_path: str, mmap: bool=False) -> np.array:
+    try:
+        if mmap:
+            return np.load(file_path, mmap_mode="r")
+        with open(file_path, 'rb') as file_obj:
+            return np.load(file_obj)
     except Exception as e:
         raise NetworkSecurityException(e, sys)
-    
\ No newline at end of file
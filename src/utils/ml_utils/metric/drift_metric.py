@@ -0,0 +1,118 @@
+import sys
+import numpy as np
+import pandas as pd
+from src.exception.exception import NetworkSecurityException
+
+def compute_value_histograms(dataframe: pd.DataFrame, columns: list, values: list) -> np.ndarray:
+    """
+        Counts of every value per column in one pass, shape (n_columns, n_values+1).
+        The last bucket counts missing and out-of-domain values
+    """
+    try:
+        x=dataframe[columns].to_numpy(dtype=np.float64)
+        sorted_values=np.sort(np.asarray(values, dtype=np.float64))
+        n_buckets=len(sorted_values)+1
+
+        codes=np.searchsorted(sorted_values, x)
+        in_domain=(codes<len(sorted_values))&(sorted_values[np.minimum(codes, len(sorted_values)-1)]==x)
+        codes=np.where(in_domain, codes, len(sorted_values))
+
+        codes+=n_buckets*np.arange(len(columns))
+        return np.bincount(codes.ravel(), minlength=n_buckets*len(columns)).reshape(len(columns), n_buckets)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+def ks_test_from_histograms(reference: np.ndarray, current: np.ndarray):
+    """
+        Two-sample KS statistic and p-value per column from value counts. The statistic is
+        exact, the p-value is scipy's ks_2samp(method="asymp"), the limiting distribution
+        at n*m/(n+m) rows, not the exact distribution ks_2samp uses by default for small
+        samples. Both samples are over a few discrete values, the p-value is conservative
+    """
+    try:
+        from scipy.stats import kstwo
+        n_reference=reference.sum(axis=1)
+        n_current=current.sum(axis=1)
+        reference_cdf=np.cumsum(reference, axis=1)/np.maximum(n_reference, 1)[:, None]
+        current_cdf=np.cumsum(current, axis=1)/np.maximum(n_current, 1)[:, None]
+        statistic=np.abs(reference_cdf-current_cdf).max(axis=1)
+
+        effective_n=np.round(n_reference*n_current/np.maximum(n_reference+n_current, 1))
+        p_value=np.where(effective_n>0, kstwo.sf(statistic, np.maximum(effective_n, 1)), 1.0)
+        return statistic, np.clip(p_value, 0, 1)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+def chi_square_test_from_histograms(reference: np.ndarray, current: np.ndarray):
+    """
+        Chi-square test of homogeneity per column on the 2 x n_buckets contingency table
+    """
+    try:
+        from scipy.stats import chi2
+        table=np.stack([reference, current], axis=1).astype(np.float64)
+        bucket_totals=table.sum(axis=1, keepdims=True)
+        sample_totals=table.sum(axis=2, keepdims=True)
+        expected=sample_totals*bucket_totals/np.maximum(table.sum(axis=(1, 2), keepdims=True), 1)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cells=np.where(expected>0, (table-expected)**2/expected, 0.0)
+        statistic=cells.sum(axis=(1, 2))
+        dof=np.maximum((bucket_totals[:, 0, :]>0).sum(axis=1)-1, 1)
+        return statistic, chi2.sf(statistic, dof)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+def population_stability_index(reference: np.ndarray, current: np.ndarray, epsilon: float=1e-4) -> np.ndarray:
+    try:
+        reference_share=np.clip(reference/np.maximum(reference.sum(axis=1, keepdims=True), 1), epsilon, None)
+        current_share=np.clip(current/np.maximum(current.sum(axis=1, keepdims=True), 1), epsilon, None)
+        return ((current_share-reference_share)*np.log(current_share/reference_share)).sum(axis=1)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+def build_drift_reference(dataframe: pd.DataFrame, columns: list, values: list) -> dict:
+    """
+        Summary of the training data that drift checks run against, no rows are retained
+    """
+    try:
+        histograms=compute_value_histograms(dataframe, columns, values)
+        return {
+            "values": [value for value in values],
+            "num_of_rows": int(len(dataframe)),
+            "histograms": {column: histograms[i].tolist() for i, column in enumerate(columns)}
+        }
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+def detect_drift_from_reference(drift_reference: dict, dataframe: pd.DataFrame,
+                                threshold: float=0.05, psi_threshold: float=0.2):
+    """
+        KS, chi-square and PSI of every reference column present in the dataframe.
+        A column drifts when the KS p-value is below threshold, as in the original column loop
+    """
+    try:
+        columns=[column for column in drift_reference["histograms"] if column in dataframe.columns]
+        reference=np.array([drift_reference["histograms"][column] for column in columns])
+        current=compute_value_histograms(dataframe, columns, drift_reference["values"])
+
+        ks_statistic, ks_p_value=ks_test_from_histograms(reference, current)
+        _, chi_square_p_value=chi_square_test_from_histograms(reference, current)
+        psi=population_stability_index(reference, current)
+
+        status=True
+        report={}
+        for i, column in enumerate(columns):
+            is_found=bool(ks_p_value[i]<threshold)
+            if is_found:
+                status=False
+            report[column]={
+                "p_value": float(ks_p_value[i]),
+                "ks_statistic": float(ks_statistic[i]),
+                "chi_square_p_value": float(chi_square_p_value[i]),
+                "psi": float(psi[i]),
+                "psi_drift": bool(psi[i]>psi_threshold),
+                "drift_status": is_found
+            }
+        return status, report
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
@@ -2,19 +2,48 @@ import os
 import sys
 from src.logging.logger import logging
 from src.exception.exception import NetworkSecurityException
+from src.constants import MODEL_INFERENCE_BACKEND, MODEL_INFERENCE_BACKENDS, MODEL_INFERENCE_COMPILED_MAX_ROWS
+from src.utils.ml_utils.model.tree_compiler import compile_tree_ensemble
+from src.utils.main_utils.instrumentation import timer
 
 class NetworkModel:
-    def __init__(self, preprocessor, model):
+    def __init__(self, preprocessor, model, inference_backend: str=MODEL_INFERENCE_BACKEND):
         try:
             self.preprocessor=preprocessor
             self.model=model
+            if inference_backend not in MODEL_INFERENCE_BACKENDS:
+                raise Exception(f"Unsupported inference backend: {inference_backend}, expected one of {MODEL_INFERENCE_BACKENDS}")
+            self.compiled_model=None
+            if inference_backend=="compiled":
+                self.compile()
         except Exception as e:
             raise NetworkSecurityException(e, sys)
-        
+
+    def compile(self):
+        """
+            Flatten a tree ensemble into node arrays for predict, other models keep the sklearn path
+        """
+        try:
+            self.compiled_model=compile_tree_ensemble(self.model)
+            if self.compiled_model is None:
+                logging.info(f"No compiled inference for {type(self.model).__name__}, using sklearn predict")
+            return self.compiled_model
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
     def predict(self, x):
         try:
-            x_transform=self.preprocessor.transform(x)
-            y_hat=self.model.predict(x_transform)
+            with timer("preprocess"):
+                x_transform=self.preprocessor.transform(x)
+            # Models pickled before the compiled backend existed have no compiled_model attribute.
+            # The vectorized walk wins on small batches where sklearn's per-tree call overhead
+            # dominates, large batches are faster in sklearn's compiled per-tree loop
+            compiled_model=getattr(self, "compiled_model", None)
+            if compiled_model is not None and x_transform.shape[0]<=MODEL_INFERENCE_COMPILED_MAX_ROWS:
+                with timer("model_predict", backend="compiled"):
+                    return compiled_model.predict(x_transform)
+            with timer("model_predict", backend="sklearn"):
+                y_hat=self.model.predict(x_transform)
             return y_hat
         except Exception as e:
             raise NetworkSecurityException(e, sys)
@@ -0,0 +1,224 @@
+import os
+import sys
+import time
+import joblib
+import tempfile
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.metrics import r2_score
+from sklearn.base import clone, is_classifier
+from sklearn.model_selection import ParameterGrid, check_cv
+from src.logging.logger import logging
+from src.exception.exception import NetworkSecurityException
+
+def _fit_and_score(model, params: dict, x, y, train_idx, test_idx):
+    estimator=clone(model).set_params(**params)
+    start_time=time.perf_counter()
+    estimator.fit(x[train_idx], y[train_idx])
+    fit_time=time.perf_counter()-start_time
+
+    start_time=time.perf_counter()
+    score=estimator.score(x[test_idx], y[test_idx])
+    score_time=time.perf_counter()-start_time
+    return score, fit_time, score_time
+
+def _refit(model, params: dict, x, y):
+    estimator=clone(model).set_params(**params)
+    start_time=time.perf_counter()
+    estimator.fit(x, y)
+    return estimator, time.perf_counter()-start_time
+
+def _share_array(array, temp_file_path: str):
+    """
+        Array the workers can memory-map, an in-memory array is dumped to temp_file_path
+    """
+    if isinstance(array, np.memmap):
+        return array
+    joblib.dump(np.ascontiguousarray(array), temp_file_path)
+    return joblib.load(temp_file_path, mmap_mode="r")
+
+def _build_search_jobs(model_name: str, model, candidates: dict, sample_idx, y, cv: int, round_index: int=0):
+    """
+        One job per (candidate, fold), fold indices are mapped back onto the full training matrix
+    """
+    jobs=[]
+    splitter=check_cv(cv, y[sample_idx], classifier=is_classifier(model))
+    folds=list(splitter.split(sample_idx, y[sample_idx]))
+    for candidate_index, params in candidates.items():
+        for fold_index, (train_idx, test_idx) in enumerate(folds):
+            jobs.append({
+                "model_name": model_name,
+                "candidate": candidate_index,
+                "params": params,
+                "fold": fold_index,
+                "round": round_index,
+                "train_idx": sample_idx[train_idx],
+                "test_idx": sample_idx[test_idx]
+            })
+    return jobs
+
+def _run_search_jobs(parallel, jobs: list, models: dict, x, y, report: dict) -> dict:
+    """
+        Run the jobs on the pool, record their timings into the report and
+        return the mean fold score of every candidate
+    """
+    results=parallel(
+        delayed(_fit_and_score)(models[job["model_name"]], job["params"], x, y, job["train_idx"], job["test_idx"])
+        for job in jobs
+    )
+    fold_scores={}
+    for job, (score, fit_time, score_time) in zip(jobs, results):
+        report[job["model_name"]]["jobs"].append({
+            "params": job["params"],
+            "round": job["round"],
+            "n_resources": len(job["train_idx"])+len(job["test_idx"]),
+            "fold": job["fold"],
+            "score": float(score),
+            "fit_time": fit_time,
+            "score_time": score_time
+        })
+        fold_scores.setdefault(job["model_name"], {}).setdefault(job["candidate"], []).append(score)
+    return {
+        model_name: {candidate: float(np.mean(scores)) for candidate, scores in candidates.items()}
+        for model_name, candidates in fold_scores.items()
+    }
+
+def _grid_search(parallel, models: dict, param: dict, x, y, cv: int, report: dict) -> dict:
+    sample_idx=np.arange(len(y))
+    jobs=[]
+    for model_name, model in models.items():
+        candidates=dict(enumerate(ParameterGrid(param[model_name])))
+        jobs.extend(_build_search_jobs(model_name, model, candidates, sample_idx, y, cv))
+    logging.info(f"Scheduling {len(jobs)} grid search jobs for {len(models)} models")
+
+    mean_scores=_run_search_jobs(parallel, jobs, models, x, y, report)
+    best_params={}
+    for model_name, candidate_scores in mean_scores.items():
+        # Same selection rule as GridSearchCV: highest mean fold score, first candidate wins ties
+        best_index=max(candidate_scores, key=lambda candidate: (candidate_scores[candidate], -candidate))
+        best_params[model_name]=ParameterGrid(param[model_name])[best_index]
+        report[model_name]["best_cv_score"]=candidate_scores[best_index]
+    return best_params
+
+def _halving_search(parallel, models: dict, param: dict, x, y, cv: int, report: dict,
+                    factor: int=3, time_budget: float=None) -> dict:
+    """
+        Successive halving over the sample size: every round keeps the best 1/factor
+        candidates and multiplies the number of training rows by factor. Rounds of all
+        models are scheduled together and no new round starts once the time budget
+        would be exceeded
+    """
+    start_time=time.perf_counter()
+    n_samples=len(y)
+    sample_order=np.random.RandomState(42).permutation(n_samples)
+
+    candidates={}
+    resources={}
+    for model_name in models:
+        candidates[model_name]=dict(enumerate(ParameterGrid(param[model_name])))
+
+        # Number of evaluated rounds before a single candidate is left, last round uses every row
+        n_rounds, n_candidates=0, len(candidates[model_name])
+        while n_candidates>1:
+            n_rounds+=1
+            n_candidates=int(np.ceil(n_candidates/factor))
+        min_resources=2*cv*len(np.unique(y))
+        resources[model_name]=[
+            max(n_samples//factor**(n_rounds-1-round_index), min_resources)
+            for round_index in range(n_rounds)
+        ]
+
+    best_scores={}
+    round_index, last_round_time=0, 0.0
+    while True:
+        active_models=[model_name for model_name in models if len(candidates[model_name])>1]
+        if not active_models:
+            break
+        elapsed_time=time.perf_counter()-start_time
+        if time_budget is not None and elapsed_time+last_round_time>time_budget:
+            logging.info(f"Search budget of {time_budget}s reached after {elapsed_time:.1f}s, "
+                         f"keeping the best candidates of round {round_index-1}")
+            break
+
+        jobs=[]
+        for model_name in active_models:
+            sample_idx=np.sort(sample_order[:resources[model_name][round_index]])
+            jobs.extend(_build_search_jobs(model_name, models[model_name], candidates[model_name],
+                                           sample_idx, y, cv, round_index))
+        logging.info(f"Halving round {round_index}: {len(jobs)} jobs for {len(active_models)} models")
+
+        round_start_time=time.perf_counter()
+        mean_scores=_run_search_jobs(parallel, jobs, models, x, y, report)
+        last_round_time=time.perf_counter()-round_start_time
+
+        for model_name, candidate_scores in mean_scores.items():
+            ranked=sorted(candidate_scores, key=lambda candidate: (-candidate_scores[candidate], candidate))
+            n_keep=int(np.ceil(len(ranked)/factor))
+            candidates[model_name]={candidate: candidates[model_name][candidate] for candidate in ranked[:n_keep]}
+            best_scores[model_name]=candidate_scores[ranked[0]]
+        round_index+=1
+
+    best_params={}
+    for model_name in models:
+        # Candidates are ordered best first after every round
+        best_params[model_name]=next(iter(candidates[model_name].values()))
+        report[model_name]["best_cv_score"]=best_scores.get(model_name)
+    return best_params
+
+def evaluate_models(x_train, y_train, x_test, y_test, models, param, n_jobs: int=1, cv: int=3,
+                    search_mode: str="grid", time_budget: float=None, halving_factor: int=3):
+    """
+        Search every model by scheduling all (model, params, fold) jobs on one process pool.
+        search_mode is "grid" for the exhaustive search or "halving" for budgeted successive halving.
+        The workers memory-map the training matrix read-only: joblib hands them the file and
+        offset of a memory-mapped x_train, such as a slice of the transformed .npy artifact,
+        an in-memory x_train is dumped once to a temporary file first.
+        The best estimator of each model replaces its entry in models
+    """
+    try:
+        report={model_name: {"jobs": []} for model_name in models}
+        with tempfile.TemporaryDirectory() as temp_dir:
+            x_shared=_share_array(x_train, os.path.join(temp_dir, "x_train.joblib"))
+            y_shared=_share_array(y_train, os.path.join(temp_dir, "y_train.joblib"))
+
+            parallel=Parallel(n_jobs=n_jobs, max_nbytes=None)
+            logging.info(f"Starting {search_mode} search for {len(models)} models with n_jobs={n_jobs}")
+            if search_mode=="grid":
+                best_params=_grid_search(parallel, models, param, x_shared, y_shared, cv, report)
+            elif search_mode=="halving":
+                best_params=_halving_search(parallel, models, param, x_shared, y_shared, cv, report,
+                                            factor=halving_factor, time_budget=time_budget)
+            else:
+                raise Exception(f"Unknown search mode: {search_mode}")
+            for model_name in models:
+                report[model_name]["best_params"]=best_params[model_name]
+
+            refits=parallel(
+                delayed(_refit)(models[model_name], best_params[model_name], x_shared, y_shared)
+                for model_name in models
+            )
+
+        for model_name, (model, refit_time) in zip(list(models), refits):
+            models[model_name]=model
+
+            y_train_pred=model.predict(x_train)
+            start_time=time.perf_counter()
+            y_test_pred=model.predict(x_test)
+            predict_time=time.perf_counter()-start_time
+
+            train_model_score=r2_score(y_train, y_train_pred)
+            test_model_score=r2_score(y_test, y_test_pred)
+
+            report[model_name].update({
+                "train_score": float(train_model_score),
+                "test_score": float(test_model_score),
+                "search_time": float(sum(job["fit_time"]+job["score_time"] for job in report[model_name]["jobs"])),
+                "refit_time": refit_time,
+                "predict_time": predict_time
+            })
+            logging.info(f"{model_name}: best params {best_params[model_name]}, test score {test_model_score}")
+
+        return report
+
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
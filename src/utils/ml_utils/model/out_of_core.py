@@ -0,0 +1,89 @@
+import sys
+import time
+import numpy as np
+from src.logging.logger import logging
+from src.exception.exception import NetworkSecurityException
+
+# The transformation maps the target to 0/1, partial_fit needs every class on its first call
+OUT_OF_CORE_CLASSES=np.array([0, 1])
+
+def iter_array_chunks(x, y, chunk_size: int, rng: np.random.Generator=None):
+    """
+        Copies of chunk_size rows of a (memory-mapped) array pair. With rng the chunks are
+        visited in a random order and the rows of each chunk are shuffled, the file is still
+        read one contiguous slice at a time
+    """
+    starts=np.arange(0, len(x), chunk_size)
+    if rng is not None:
+        starts=rng.permutation(starts)
+    for start in starts:
+        x_chunk=np.asarray(x[start:start+chunk_size], dtype=np.float64)
+        y_chunk=np.asarray(y[start:start+chunk_size])
+        if rng is not None:
+            order=rng.permutation(len(x_chunk))
+            x_chunk, y_chunk=x_chunk[order], y_chunk[order]
+        yield x_chunk, y_chunk
+
+def predict_in_chunks(model, x, chunk_size: int) -> np.ndarray:
+    try:
+        y_pred=None
+        for start in range(0, len(x), chunk_size):
+            chunk_pred=model.predict(np.asarray(x[start:start+chunk_size], dtype=np.float64))
+            if y_pred is None:
+                y_pred=np.empty(len(x), dtype=chunk_pred.dtype)
+            y_pred[start:start+len(chunk_pred)]=chunk_pred
+        return y_pred
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+def r2_score_in_chunks(model, x, y, chunk_size: int) -> float:
+    """
+        sklearn's r2_score, the score evaluate_models reports, accumulated chunk by chunk
+    """
+    try:
+        n_rows, sum_y, sum_y_squared, residual_sum=0, 0.0, 0.0, 0.0
+        for x_chunk, y_chunk in iter_array_chunks(x, y, chunk_size):
+            y_chunk=y_chunk.astype(np.float64)
+            y_pred=model.predict(x_chunk).astype(np.float64)
+            n_rows+=len(y_chunk)
+            sum_y+=y_chunk.sum()
+            sum_y_squared+=np.square(y_chunk).sum()
+            residual_sum+=np.square(y_chunk-y_pred).sum()
+        total_sum=sum_y_squared-sum_y*sum_y/n_rows
+        if total_sum<=0:
+            return 1.0 if residual_sum==0 else 0.0
+        return float(1-residual_sum/total_sum)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+def evaluate_out_of_core_models(x_train, y_train, x_test, y_test, models: dict, chunk_size: int,
+                                epochs: int, random_state: int=42) -> dict:
+    """
+        Train every partial_fit model on epochs passes over x_train, chunk_size rows at a
+        time, so only one chunk of the (memory-mapped) arrays is in memory. Returns report
+        entries in the evaluate_models format, the trained models replace their entries in models
+    """
+    try:
+        report={}
+        for model_name, model in models.items():
+            rng=np.random.default_rng(random_state)
+            start_time=time.perf_counter()
+            for epoch in range(epochs):
+                for x_chunk, y_chunk in iter_array_chunks(x_train, y_train, chunk_size, rng):
+                    model.partial_fit(x_chunk, y_chunk, classes=OUT_OF_CORE_CLASSES)
+            fit_time=time.perf_counter()-start_time
+
+            train_model_score=r2_score_in_chunks(model, x_train, y_train, chunk_size)
+            test_model_score=r2_score_in_chunks(model, x_test, y_test, chunk_size)
+            report[model_name]={
+                "training_mode": "out_of_core",
+                "chunk_size": chunk_size,
+                "epochs": epochs,
+                "train_score": train_model_score,
+                "test_score": test_model_score,
+                "fit_time": fit_time
+            }
+            logging.info(f"{model_name}: {epochs} out-of-core epochs in {fit_time:.1f}s, test score {test_model_score}")
+        return report
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
@@ -0,0 +1,185 @@
+import sys
+import numpy as np
+from src.exception.exception import NetworkSecurityException
+from src.constants import MODEL_INFERENCE_BLOCK_SIZE
+
+def _float32_thresholds(threshold: np.ndarray) -> np.ndarray:
+    """
+        Largest float32 not above each float64 threshold. sklearn compares float32
+        inputs against float64 thresholds, for a float32 x the comparison x <= t is
+        the same as x <= floor32(t), so the whole traversal can stay in float32
+    """
+    threshold32=threshold.astype(np.float32)
+    above=threshold32.astype(np.float64)>threshold
+    threshold32[above]=np.nextafter(threshold32[above], np.float32(-np.inf))
+    return threshold32
+
+class CompiledTreeEnsemble:
+    """
+        Trees of a fitted ensemble flattened into contiguous node arrays.
+        All trees are walked together, one vectorized step per tree level,
+        and leaf values are accumulated in the same order sklearn uses so
+        predictions match the original estimator
+    """
+    def __init__(self, trees: list, leaf_values: list, classes: np.ndarray, aggregation: str,
+                 init_value: np.ndarray=None, divisor: float=1.0, block_size: int=MODEL_INFERENCE_BLOCK_SIZE):
+        try:
+            offsets=np.cumsum([0]+[tree.node_count for tree in trees])
+            self.n_trees=len(trees)
+            self.n_features=trees[0].n_features
+            self.roots=offsets[:-1].astype(np.intp)
+
+            feature=[]
+            threshold=[]
+            children=[]
+            missing_go_to_left=[]
+            for tree, offset in zip(trees, offsets[:-1]):
+                is_leaf=tree.children_left==-1
+                # Children that are leaves are stored as ~leaf_id, a negative id ends the walk
+                child=np.where(is_leaf[:, None], 0, np.stack([tree.children_left, tree.children_right], axis=1))
+                children.append(np.where(is_leaf[child], ~(child+offset), child+offset))
+                feature.append(np.where(is_leaf, 0, tree.feature))
+                threshold.append(tree.threshold)
+                missing_go_to_left.append(tree.missing_go_to_left.astype(bool))
+
+            self.is_leaf=np.concatenate([tree.children_left==-1 for tree in trees])
+            self.feature=np.concatenate(feature).astype(np.intp)
+            self.threshold=_float32_thresholds(np.concatenate(threshold))
+            # children[2*node] is the left child, children[2*node+1] the right one
+            self.children=np.concatenate(children).astype(np.intp).ravel()
+            self.missing_go_to_left=np.concatenate(missing_go_to_left)
+            self.leaf_values=np.concatenate(leaf_values).astype(np.float64)
+            self.classes=classes
+            self.aggregation=aggregation
+            self.init_value=init_value
+            self.divisor=divisor
+            # Upper bound on rows x trees walked at once, keeps the traversal buffers small
+            self.block_size=block_size
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def apply(self, x: np.ndarray) -> np.ndarray:
+        """
+            Global leaf index of every row in every tree, shape (n_rows, n_trees)
+        """
+        n_rows=x.shape[0]
+        x_flat=x.ravel()
+        has_missing=bool(np.isnan(x_flat).any())
+        leaves=np.repeat(self.roots[None, :], n_rows, axis=0).ravel()
+        # One entry per (row, tree) pair still inside a tree, pairs that reach a leaf are dropped
+        inner=~self.is_leaf[leaves]
+        position=np.flatnonzero(inner)
+        node=leaves[inner]
+        row_offset=(position//self.n_trees)*self.n_features
+        while position.size:
+            value=x_flat[row_offset+self.feature[node]]
+            go_right=~(value<=self.threshold[node])
+            if has_missing:
+                go_right&=~(np.isnan(value)&self.missing_go_to_left[node])
+            node=self.children[2*node+go_right]
+            is_leaf=node<0
+            if is_leaf.any():
+                leaves[position[is_leaf]]=~node[is_leaf]
+                is_inner=~is_leaf
+                position=position[is_inner]
+                node=node[is_inner]
+                row_offset=row_offset[is_inner]
+        return leaves.reshape(n_rows, self.n_trees)
+
+    def _predict_block(self, x: np.ndarray) -> np.ndarray:
+        leaves=self.apply(x)
+        # (n_trees, n_rows, n_outputs), summing over the leading axis adds trees in order
+        values=self.leaf_values[leaves.T]
+        if self.init_value is not None:
+            init_value=np.broadcast_to(self.init_value, (1,)+values.shape[1:])
+            values=np.concatenate([init_value, values])
+        total=values.sum(axis=0)
+
+        if self.aggregation=="gradient_boosting":
+            if total.shape[1]==1:
+                return (total[:, 0]>=0).astype(np.intp)
+            return np.argmax(total, axis=1)
+        if self.aggregation=="adaboost":
+            total/=self.divisor
+            if total.shape[1]==2:
+                return (total[:, 1]-total[:, 0]>0).astype(np.intp)
+            return np.argmax(total, axis=1)
+        total/=self.divisor
+        return np.argmax(total, axis=1)
+
+    def predict(self, x) -> np.ndarray:
+        try:
+            x=np.ascontiguousarray(x, dtype=np.float32)
+            if x.ndim!=2 or x.shape[1]!=self.n_features:
+                raise Exception(f"Expected input with {self.n_features} features, got shape {x.shape}")
+            block_rows=max(1, self.block_size//self.n_trees)
+            encoded=np.empty(x.shape[0], dtype=np.intp)
+            for start in range(0, x.shape[0], block_rows):
+                encoded[start:start+block_rows]=self._predict_block(x[start:start+block_rows])
+            return self.classes.take(encoded)
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+def _class_leaf_values(tree, n_classes: int) -> np.ndarray:
+    return tree.value[:, 0, :n_classes]
+
+def compile_tree_ensemble(model):
+    """
+        CompiledTreeEnsemble for the tree models ModelTrainer can select,
+        None when the model has no compiled equivalent
+    """
+    try:
+        # Imported here so serving does not pay for sklearn.ensemble until a model is compiled
+        from sklearn.tree import DecisionTreeClassifier
+        from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, AdaBoostClassifier
+
+        if isinstance(model, DecisionTreeClassifier) and model.n_outputs_==1:
+            tree=model.tree_
+            return CompiledTreeEnsemble([tree], [_class_leaf_values(tree, model.n_classes_)],
+                                        model.classes_, "forest")
+
+        if isinstance(model, RandomForestClassifier) and model.n_outputs_==1:
+            trees=[estimator.tree_ for estimator in model.estimators_]
+            leaf_values=[_class_leaf_values(tree, model.n_classes_) for tree in trees]
+            return CompiledTreeEnsemble(trees, leaf_values, model.classes_, "forest",
+                                        divisor=float(len(trees)))
+
+        if isinstance(model, GradientBoostingClassifier):
+            # The init estimator must not depend on X, which holds for the default prior and "zero"
+            if model.init_!="zero" and not hasattr(model.init_, "class_prior_"):
+                return None
+            init_value=model._raw_predict_init(np.zeros((1, model.n_features_in_), dtype=np.float32))[0]
+            n_outputs=model.estimators_.shape[1]
+            trees=[]
+            leaf_values=[]
+            for stage in model.estimators_:
+                for k, estimator in enumerate(stage):
+                    tree=estimator.tree_
+                    # Each stage tree only updates its own output column
+                    value=np.zeros((tree.node_count, n_outputs))
+                    value[:, k]=model.learning_rate*tree.value[:, 0, 0]
+                    trees.append(tree)
+                    leaf_values.append(value)
+            return CompiledTreeEnsemble(trees, leaf_values, model.classes_, "gradient_boosting",
+                                        init_value=init_value)
+
+        if isinstance(model, AdaBoostClassifier) and model.n_classes_>1:
+            if not all(isinstance(estimator, DecisionTreeClassifier) for estimator in model.estimators_):
+                return None
+            n_classes=model.n_classes_
+            trees=[]
+            leaf_values=[]
+            for estimator, weight in zip(model.estimators_, model.estimator_weights_):
+                tree=estimator.tree_
+                # SAMME adds the estimator weight to the voted class and -weight/(n_classes-1) to the others
+                leaf_class=estimator.classes_[np.argmax(_class_leaf_values(tree, len(estimator.classes_)), axis=1)]
+                predicted=np.searchsorted(model.classes_, leaf_class)
+                value=np.full((tree.node_count, n_classes), -1/(n_classes-1)*weight)
+                value[np.arange(tree.node_count), predicted]=weight
+                trees.append(tree)
+                leaf_values.append(value)
+            return CompiledTreeEnsemble(trees, leaf_values, model.classes_, "adaboost",
+                                        divisor=float(model.estimator_weights_.sum()))
+        return None
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
@@ -0,0 +1,48 @@
+import sys
+import numpy as np
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.utils.validation import check_is_fitted
+from src.exception.exception import NetworkSecurityException
+
+class FeatureBinner(TransformerMixin, BaseEstimator):
+    """
+        Maps every column to uint8 bin codes. The bins are the distinct training values of
+        the column, split at the midpoints between them, so the ternary features become
+        0/1/2 and a KNN-averaged value falls in the bin of the nearest feature value.
+        Columns with more than max_bins distinct values are split at quantiles instead.
+        Expects imputed input, a missing value falls in the last bin
+    """
+    def __init__(self, max_bins: int=255):
+        self.max_bins=max_bins
+
+    def fit(self, X, y=None):
+        try:
+            if not 2<=self.max_bins<=256:
+                raise Exception(f"max_bins must be between 2 and 256 to fit uint8 codes, got {self.max_bins}")
+            x_arr=np.asarray(X, dtype=np.float64)
+            self.n_features_in_=x_arr.shape[1]
+            self.bin_thresholds_=[]
+            for j in range(x_arr.shape[1]):
+                column=x_arr[:, j][~np.isnan(x_arr[:, j])]
+                values=np.unique(column)
+                if len(values)>self.max_bins:
+                    thresholds=np.unique(np.quantile(column, np.linspace(0, 1, self.max_bins+1)[1:-1]))
+                else:
+                    thresholds=(values[:-1]+values[1:])/2
+                self.bin_thresholds_.append(thresholds)
+            return self
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def transform(self, X):
+        try:
+            check_is_fitted(self)
+            x_arr=np.asarray(X, dtype=np.float64)
+            if x_arr.shape[1]!=self.n_features_in_:
+                raise Exception(f"FeatureBinner was fitted on {self.n_features_in_} features, got {x_arr.shape[1]}")
+            codes=np.empty(x_arr.shape, dtype=np.uint8)
+            for j, thresholds in enumerate(self.bin_thresholds_):
+                codes[:, j]=np.searchsorted(thresholds, x_arr[:, j])
+            return codes
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
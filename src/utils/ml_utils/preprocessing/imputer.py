@@ -0,0 +1,46 @@
+import sys
+import numpy as np
+import pandas as pd
+from sklearn.impute import KNNImputer, SimpleImputer
+from sklearn.utils.validation import check_is_fitted, validate_data
+from src.exception.exception import NetworkSecurityException
+
+class FastPathKNNImputer(KNNImputer):
+    """
+        KNNImputer that only pays for neighbour search on rows that actually
+        contain missing values, complete rows are passed through unchanged
+    """
+    def transform(self, X):
+        try:
+            check_is_fitted(self)
+            # Fall back to the full implementation for configurations that change the output columns
+            if self.add_indicator or not np.all(self._valid_mask) or not np.isnan(self.missing_values):
+                return super().transform(X)
+
+            # Same checks as KNNImputer: feature names, their order and the feature count must match fit
+            x_arr=validate_data(self, X, reset=False, dtype=np.float64, copy=True,
+                                force_writeable=True, ensure_all_finite="allow-nan")
+            missing_rows=np.isnan(x_arr).any(axis=1)
+            if missing_rows.any():
+                x_missing=X[missing_rows] if isinstance(X, pd.DataFrame) else x_arr[missing_rows]
+                x_arr[missing_rows]=super().transform(x_missing)
+            return x_arr
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+def build_imputer(engine: str, imputer_params: dict):
+    """
+        Create the imputer for one of the DATA_TRANSFORMATION_IMPUTER_ENGINES
+    """
+    try:
+        if engine=="knn":
+            return KNNImputer(**imputer_params)
+        if engine=="fast_path":
+            return FastPathKNNImputer(**imputer_params)
+        if engine=="most_frequent":
+            # Precomputed per-column lookup, no training rows are kept in the pickled object
+            return SimpleImputer(missing_values=imputer_params.get("missing_values", np.nan),
+                                 strategy="most_frequent")
+        raise Exception(f"Unknown imputer engine: {engine}")
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
@@ -1,15 +1,7 @@
-from pymongo.mongo_client import MongoClient
-from pymongo.server_api import ServerApi
-from dotenv import load_dotenv
-import os
+from src.config.mongo_db_connection import get_mongo_connection
 
-# Load varibales from .env into environment
-load_dotenv()
-
-uri = os.getenv('MONGO_DB_URL')
-
-# Create a new client and connect to the server
-client = MongoClient(uri, server_api=ServerApi('1'))
+# Same pooled client, settings and MONGO_DB_URL from .env as the pipeline
+client = get_mongo_connection().get_client()
 
 # Send a ping to confirm a successful connection
 try:
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from sklearn.base import clone
+from src.exception.exception import NetworkSecurityException
+from src.utils.ml_utils.preprocessing.binning import FeatureBinner
+
+def test_ternary_features_map_to_three_codes():
+    x=np.array([[-1.0, 1.0], [0.0, -1.0], [1.0, 1.0], [0.0, -1.0]])
+    codes=FeatureBinner().fit_transform(x)
+    assert codes.dtype==np.uint8
+    assert np.array_equal(codes, np.array([[0, 1], [1, 0], [2, 1], [1, 0]]))
+
+def test_imputed_values_fall_in_the_bin_of_the_nearest_value():
+    binner=FeatureBinner().fit(np.array([[-1.0], [0.0], [1.0]]))
+    codes=binner.transform(np.array([[-0.6], [-0.4], [0.4], [0.6], [-5.0], [5.0]]))
+    assert codes[:, 0].tolist()==[0, 1, 1, 2, 0, 2]
+
+def test_many_distinct_values_are_split_at_quantiles():
+    x=np.random.default_rng(0).normal(size=(5000, 1))
+    codes=FeatureBinner(max_bins=16).fit_transform(x)
+    counts=np.bincount(codes[:, 0])
+    assert len(counts)==16
+    assert counts.min()>=5000//16-1
+
+def test_binning_keeps_the_order_of_values():
+    x=np.random.default_rng(1).normal(size=(1000, 3))
+    codes=FeatureBinner(max_bins=32).fit_transform(x)
+    for j in range(x.shape[1]):
+        order=np.argsort(x[:, j])
+        assert np.all(np.diff(codes[order, j].astype(int))>=0)
+
+def test_binner_rejects_invalid_input():
+    with pytest.raises(NetworkSecurityException):
+        FeatureBinner(max_bins=300).fit(np.zeros((3, 1)))
+    binner=FeatureBinner().fit(np.zeros((3, 2)))
+    with pytest.raises(NetworkSecurityException):
+        binner.transform(np.zeros((3, 3)))
+    with pytest.raises(NetworkSecurityException):
+        clone(binner).transform(np.zeros((3, 2)))
@@ -0,0 +1,133 @@
+import datetime
+import numpy as np
+import pandas as pd
+import pytest
+from bson import ObjectId
+from src.constants import TARGET_COLUMN, SCHEMA_FILE_PATH
+from src.components.data_ingestion import DataIngestion
+from src.entity.config_entity import TrainingPipelineConfig, DataIngestionConfig
+from src.config.mongo_db_connection import MongoDBConnection, set_mongo_connection
+from src.utils.main_utils.utils import read_yaml_file, save_dataframe, load_dataframe
+
+pytest.importorskip("mongomock")
+
+COLUMNS=[list(column.keys())[0] for column in read_yaml_file(SCHEMA_FILE_PATH)["columns"]]
+START_TIME=datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+
+def make_document(seed: int, seconds: float) -> dict:
+    rng=np.random.default_rng(seed)
+    document={column: int(value) for column, value in zip(COLUMNS, rng.choice([-1, 0, 1], size=len(COLUMNS)))}
+    document[TARGET_COLUMN]=int(rng.choice([-1, 1]))
+    # The first four bytes of an ObjectId are its creation time in seconds
+    document["_id"]=ObjectId(f"{int(START_TIME.timestamp()+seconds):08x}{seed:016x}")
+    document["row_hash"]=f"{seed:016x}"
+    document["row_occurrence"]=0
+    return document
+
+@pytest.fixture
+def data_ingestion(tmp_path):
+    set_mongo_connection(MongoDBConnection("mongomock://test"))
+    config=DataIngestionConfig(TrainingPipelineConfig(datetime.datetime.now()))
+    config.incremental_feature_store_file_path=str(tmp_path/"feature_store"/"phisingData.csv")
+    config.watermark_file_path=str(tmp_path/"feature_store"/"watermark.yaml")
+    config.watermark_safety_window=60
+    config.batch_size=7
+    data_ingestion=DataIngestion(config)
+    data_ingestion.get_collection().drop()
+    return data_ingestion
+
+def ingest(data_ingestion: DataIngestion) -> pd.DataFrame:
+    watermark=data_ingestion.read_watermark()
+    if watermark is not None and not data_ingestion.is_watermark_valid(data_ingestion.get_collection(), watermark):
+        watermark=None
+    dataframe, next_watermark=data_ingestion.export_collection_as_dataframe(watermark)
+    if dataframe is None:
+        watermark=None
+        dataframe, next_watermark=data_ingestion.export_collection_as_dataframe()
+    return data_ingestion.merge_with_previous_feature_store(dataframe, next_watermark, has_previous=watermark is not None)
+
+def test_late_commit_inside_the_window_is_ingested_once(data_ingestion):
+    collection=data_ingestion.get_collection()
+    collection.insert_many([make_document(seed, seconds=seed) for seed in range(20)])
+    assert len(ingest(data_ingestion))==20
+
+    # A parallel loader commits a document older than the newest one after the previous run
+    collection.insert_one(make_document(100, seconds=15.5))
+    collection.insert_many([make_document(seed, seconds=seed) for seed in range(20, 25)])
+    dataframe=ingest(data_ingestion)
+    assert len(dataframe)==26
+    assert len(ingest(data_ingestion))==26
+
+def test_late_commit_before_the_window_reloads_everything(data_ingestion):
+    collection=data_ingestion.get_collection()
+    collection.insert_many([make_document(seed, seconds=seed*10) for seed in range(20)])
+    ingest(data_ingestion)
+
+    collection.insert_one(make_document(100, seconds=5))
+    assert len(ingest(data_ingestion))==21
+
+def test_deleted_documents_reload_everything(data_ingestion):
+    collection=data_ingestion.get_collection()
+    collection.insert_many([make_document(seed, seconds=seed*10) for seed in range(20)])
+    ingest(data_ingestion)
+
+    collection.delete_one({"row_hash": f"{2:016x}"})
+    assert len(ingest(data_ingestion))==19
+    collection.delete_one({"row_hash": f"{19:016x}"})
+    assert len(ingest(data_ingestion))==18
+
+def make_feature_store(seed: int, n_rows: int) -> pd.DataFrame:
+    rng=np.random.default_rng(seed)
+    dataframe=pd.DataFrame(rng.choice([-1, 0, 1], size=(n_rows, len(COLUMNS))), columns=COLUMNS)
+    dataframe[TARGET_COLUMN]=rng.choice([-1, 1], size=n_rows, p=[0.3, 0.7])
+    return dataframe
+
+@pytest.fixture
+def splitter(tmp_path):
+    config=DataIngestionConfig(TrainingPipelineConfig(datetime.datetime.now()))
+    config.feature_store_file_path=str(tmp_path/"feature_store"/"phisingData.npy")
+    config.training_file_path=str(tmp_path/"ingested"/"train.npy")
+    config.testing_file_path=str(tmp_path/"ingested"/"test.npy")
+    config.split_mode="hash"
+    config.split_chunk_size=64
+    return DataIngestion(config)
+
+def split(splitter: DataIngestion, dataframe: pd.DataFrame):
+    save_dataframe(splitter.data_ingestion_config.feature_store_file_path, dataframe, splitter._dtype_plan)
+    splitter.split_data_into_train_test(dataframe)
+    return (load_dataframe(splitter.data_ingestion_config.training_file_path),
+            load_dataframe(splitter.data_ingestion_config.testing_file_path))
+
+@pytest.mark.parametrize("stratify", [False, True])
+def test_rows_keep_their_side_across_incremental_runs(splitter, stratify):
+    splitter.data_ingestion_config.split_stratify=stratify
+    first=make_feature_store(0, 500)
+    train_df, test_df=split(splitter, first)
+    assert len(train_df)+len(test_df)==500
+
+    # Incremental runs append to the feature store, the split of the earlier rows does not move
+    grown_train_df, grown_test_df=split(splitter, pd.concat([first, make_feature_store(1, 300)], ignore_index=True))
+    assert len(grown_train_df)+len(grown_test_df)==800
+    pd.testing.assert_frame_equal(grown_train_df.iloc[:len(train_df)], train_df)
+    pd.testing.assert_frame_equal(grown_test_df.iloc[:len(test_df)], test_df)
+
+def test_stratified_split_keeps_the_class_ratio(splitter):
+    splitter.data_ingestion_config.split_stratify=True
+    ratio=splitter.data_ingestion_config.train_test_split_ratio
+    dataframe=make_feature_store(2, 1000)
+    _, test_df=split(splitter, dataframe)
+    for label, n_rows in dataframe[TARGET_COLUMN].value_counts().items():
+        assert (test_df[TARGET_COLUMN]==label).sum()==int(n_rows*ratio)
+
+def test_split_does_not_depend_on_chunk_size_or_storage_dtype(splitter):
+    dataframe=make_feature_store(3, 300)
+    test_mask=splitter.get_test_mask(dataframe, {})
+    assert 0<test_mask.sum()<len(dataframe)
+    assert np.array_equal(splitter.get_test_mask(dataframe.astype(np.float32), {}), test_mask)
+    chunked_mask=np.concatenate([splitter.get_test_mask(dataframe.iloc[start:start+7], {}) for start in range(0, 300, 7)])
+    assert np.array_equal(chunked_mask, test_mask)
+
+    splitter.data_ingestion_config.split_stratify=True
+    class_counts={}
+    stratified_mask=np.concatenate([splitter.get_test_mask(dataframe.iloc[start:start+7], class_counts) for start in range(0, 300, 7)])
+    assert np.array_equal(stratified_mask, splitter.get_test_mask(dataframe, {}))
@@ -0,0 +1,67 @@
+import datetime
+import numpy as np
+import pandas as pd
+from scipy.stats import ks_2samp, chi2_contingency
+from src.constants import TARGET_COLUMN
+from src.components.data_validation import DataValidation
+from src.entity.config_entity import TrainingPipelineConfig, DataValidationConfig
+from src.utils.main_utils.utils import read_yaml_file
+from src.utils.ml_utils.metric.drift_metric import (
+    compute_value_histograms,
+    ks_test_from_histograms,
+    chi_square_test_from_histograms,
+    population_stability_index,
+    build_drift_reference,
+    detect_drift_from_reference
+)
+
+VALUES=[-1, 0, 1]
+
+def make_samples(seed: int, n_rows: int, shares: list) -> pd.DataFrame:
+    rng=np.random.default_rng(seed)
+    return pd.DataFrame({"a": rng.choice(VALUES, size=n_rows, p=shares),
+                         "b": rng.choice(VALUES, size=n_rows)}).astype(np.float64)
+
+def test_histograms_count_values_and_put_the_rest_in_the_last_bucket():
+    dataframe=pd.DataFrame({"a": [-1, 0, 1, 1, np.nan, 3], "b": [1, 1, 1, 1, 1, 1]})
+    histograms=compute_value_histograms(dataframe, ["a", "b"], VALUES)
+    assert histograms.tolist()==[[1, 1, 2, 2], [0, 0, 6, 0]]
+
+def test_ks_matches_scipy_asymp():
+    reference=make_samples(0, 3000, [.2, .3, .5])
+    for seed, n_rows, shares in [(1, 500, [.2, .3, .5]), (2, 800, [.3, .3, .4]), (3, 50, [.25, .25, .5])]:
+        current=make_samples(seed, n_rows, shares)
+        statistic, p_value=ks_test_from_histograms(compute_value_histograms(reference, ["a"], VALUES),
+                                                   compute_value_histograms(current, ["a"], VALUES))
+        expected=ks_2samp(reference["a"], current["a"], method="asymp")
+        np.testing.assert_allclose(statistic[0], expected.statistic)
+        np.testing.assert_allclose(p_value[0], expected.pvalue, rtol=1e-9)
+
+def test_chi_square_matches_scipy():
+    reference=compute_value_histograms(make_samples(0, 3000, [.2, .3, .5]), ["a"], VALUES)
+    current=compute_value_histograms(make_samples(1, 500, [.3, .3, .4]), ["a"], VALUES)
+    _, p_value=chi_square_test_from_histograms(reference, current)
+    table=np.stack([reference[0], current[0]])
+    expected=chi2_contingency(table[:, table.sum(axis=0)>0], correction=False)
+    np.testing.assert_allclose(p_value[0], expected.pvalue)
+
+def test_psi_is_zero_for_the_same_distribution():
+    histograms=compute_value_histograms(make_samples(0, 1000, [.2, .3, .5]), ["a", "b"], VALUES)
+    np.testing.assert_allclose(population_stability_index(histograms, histograms*3), 0.0, atol=1e-12)
+
+def test_only_the_shifted_column_drifts():
+    drift_reference=build_drift_reference(make_samples(0, 5000, [.2, .3, .5]), ["a", "b"], VALUES)
+    status, report=detect_drift_from_reference(drift_reference, make_samples(1, 2000, [.5, .3, .2]))
+    assert status is False
+    assert report["a"]["drift_status"] and report["a"]["psi_drift"]
+    assert not report["b"]["drift_status"]
+
+def test_drift_reference_leaves_out_the_target(tmp_path):
+    config=DataValidationConfig(TrainingPipelineConfig(datetime.datetime.now()))
+    config.drift_reference_file_path=str(tmp_path/"reference.yaml")
+    config.drift_report_file_path=str(tmp_path/"report.yaml")
+    dataframe=make_samples(0, 100, [.2, .3, .5])
+    dataframe[TARGET_COLUMN]=np.where(dataframe["b"]>0, 1.0, -1.0)
+    DataValidation(None, config).detect_data_drift(dataframe, dataframe)
+    assert TARGET_COLUMN not in read_yaml_file(config.drift_reference_file_path)["histograms"]
+    assert TARGET_COLUMN not in read_yaml_file(config.drift_report_file_path)
@@ -0,0 +1,14 @@
+import os
+import sys
+import json
+import subprocess
+from benchmarks.import_time_benchmark import FORBIDDEN_MODULES
+
+REPO_DIR=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_serving_app_does_not_import_training_modules():
+    # Fresh interpreter, modules imported by the other tests must not hide a regression
+    script=f"import sys, json, app; print(json.dumps([module for module in {FORBIDDEN_MODULES!r} if module in sys.modules]))"
+    result=subprocess.run([sys.executable, "-c", script], cwd=REPO_DIR, capture_output=True, text=True)
+    assert result.returncode==0, result.stderr[-2000:]
+    assert json.loads(result.stdout.strip().splitlines()[-1])==[]
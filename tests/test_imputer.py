@@ -0,0 +1,34 @@
+import re
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.impute import KNNImputer
+from src.exception.exception import NetworkSecurityException
+from src.utils.ml_utils.preprocessing.imputer import FastPathKNNImputer
+
+def make_dataframe(seed: int) -> pd.DataFrame:
+    rng=np.random.default_rng(seed)
+    dataframe=pd.DataFrame(rng.choice([-1.0, 0.0, 1.0], size=(60, 4)), columns=["a", "b", "c", "d"])
+    dataframe.iloc[::7, 1]=np.nan
+    return dataframe
+
+def test_fast_path_matches_knn_imputer():
+    train_df, test_df=make_dataframe(0), make_dataframe(1)
+    expected=KNNImputer(n_neighbors=3).fit(train_df).transform(test_df)
+    assert np.array_equal(FastPathKNNImputer(n_neighbors=3).fit(train_df).transform(test_df), expected)
+
+@pytest.mark.parametrize("columns", [["d", "c", "b", "a"], ["a", "b", "c", "d", "e"], ["a", "b", "c"]],
+                         ids=["reordered", "extra", "missing"])
+def test_mismatched_columns_raise_like_knn_imputer(columns):
+    train_df=make_dataframe(0)
+    # Complete rows only, they never reach KNNImputer.transform on the fast path
+    test_df=make_dataframe(1).dropna().assign(e=1.0)[columns]
+    with pytest.raises(ValueError) as knn_error:
+        KNNImputer().fit(train_df).transform(test_df)
+    with pytest.raises(NetworkSecurityException, match=re.escape(str(knn_error.value).splitlines()[0])):
+        FastPathKNNImputer().fit(train_df).transform(test_df)
+
+def test_wrong_feature_count_raises_on_arrays():
+    imputer=FastPathKNNImputer().fit(make_dataframe(0).to_numpy())
+    with pytest.raises(NetworkSecurityException, match="features"):
+        imputer.transform(np.zeros((3, 5)))
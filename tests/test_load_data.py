@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+from load_data import MongoDBDataLoading
+from src.config.mongo_db_connection import MongoDBConnection, set_mongo_connection, get_mongo_connection
+
+pytest.importorskip("mongomock")
+
+@pytest.fixture
+def csv_file_path(tmp_path):
+    set_mongo_connection(MongoDBConnection("mongomock://test"))
+    get_mongo_connection().get_collection("test", "rows").drop()
+    file_path=tmp_path/"rows.csv"
+    pd.DataFrame({"row": range(100), "a": [i%3-1 for i in range(100)]}).to_csv(file_path, index=False)
+    return str(file_path)
+
+def test_resume_sends_only_the_chunks_not_in_the_checkpoint(csv_file_path, tmp_path, monkeypatch):
+    data_loading=MongoDBDataLoading(chunk_size=10, max_workers=2, checkpoint_dir=str(tmp_path/"checkpoints"))
+    insert_documents=MongoDBDataLoading.insert_documents
+
+    def failing_insert(self, collection, documents):
+        if documents[0]["row"]==30:
+            raise Exception("insert failed")
+        return insert_documents(self, collection, documents)
+
+    monkeypatch.setattr(MongoDBDataLoading, "insert_documents", failing_insert)
+    with pytest.raises(Exception):
+        data_loading.load_csv(csv_file_path, "test", "rows")
+    checkpoint_file_path=data_loading.get_checkpoint_file_path(csv_file_path, "test", "rows")
+    chunks_done=data_loading.read_checkpoint(checkpoint_file_path, data_loading.get_file_identity(csv_file_path))
+    assert 3 not in chunks_done
+
+    monkeypatch.setattr(MongoDBDataLoading, "insert_documents", insert_documents)
+    summary=data_loading.load_csv(csv_file_path, "test", "rows")
+    assert summary["resumed_chunks"]==len(chunks_done)
+    assert summary["inserted"]==10*(10-len(chunks_done))
+    assert summary["duplicates"]==0
+    assert get_mongo_connection().get_collection("test", "rows").count_documents({})==100
@@ -0,0 +1,61 @@
+import asyncio
+import numpy as np
+from types import SimpleNamespace
+from src.serving.micro_batcher import MicroBatcher, records_to_matrix
+
+class EchoModel:
+    """
+        Predicts the first feature, so every row can be traced back to its request
+    """
+    def __init__(self):
+        self.batch_sizes=[]
+
+    def predict(self, x):
+        self.batch_sizes.append(len(x))
+        return x["id"].to_numpy()
+
+class StaticRegistry:
+    def __init__(self, network_model):
+        self.served_model=SimpleNamespace(network_model=network_model, version="v1")
+
+    def get(self):
+        return self.served_model
+
+async def score_concurrently(micro_batcher, request_sizes):
+    await micro_batcher.start()
+    try:
+        starts=np.cumsum([0]+request_sizes[:-1])
+        requests=[
+            np.column_stack([np.arange(start, start+size, dtype=np.float64), np.zeros(size)])
+            for start, size in zip(starts, request_sizes)
+        ]
+        return requests, await asyncio.gather(*(micro_batcher.predict(matrix, ["id", "other"]) for matrix in requests))
+    finally:
+        await micro_batcher.stop()
+
+def test_every_request_gets_its_own_rows_in_order():
+    network_model=EchoModel()
+    micro_batcher=MicroBatcher(StaticRegistry(network_model), max_batch_size=16, max_wait=0.05)
+    request_sizes=[1, 5, 3, 7, 2, 9, 1, 4, 6, 2]
+    requests, results=asyncio.run(score_concurrently(micro_batcher, request_sizes))
+
+    for matrix, (predictions, version) in zip(requests, results):
+        assert predictions==matrix[:, 0].tolist()
+        assert version=="v1"
+    # Concurrent requests share batches, no batch goes over the limit
+    assert micro_batcher.batches_processed<len(request_sizes)
+    assert micro_batcher.rows_processed==sum(request_sizes)
+    assert max(network_model.batch_sizes)<=16
+
+def test_request_larger_than_a_batch_is_not_split():
+    network_model=EchoModel()
+    micro_batcher=MicroBatcher(StaticRegistry(network_model), max_batch_size=4, max_wait=0.05)
+    requests, results=asyncio.run(score_concurrently(micro_batcher, [2, 10, 3]))
+
+    assert [predictions for predictions, _ in results]==[matrix[:, 0].tolist() for matrix in requests]
+    assert 10 in network_model.batch_sizes
+
+def test_records_to_matrix_keeps_column_order_and_nulls():
+    matrix=records_to_matrix([{"b": 2, "a": 1}, {"a": None, "b": -1}], ["a", "b"])
+    assert matrix.dtype==np.float64
+    assert np.array_equal(matrix, np.array([[1.0, 2.0], [np.nan, -1.0]]), equal_nan=True)
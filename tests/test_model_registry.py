@@ -0,0 +1,120 @@
+import os
+import time
+import numpy as np
+from datetime import datetime
+from types import SimpleNamespace
+import pandas as pd
+from sklearn.impute import SimpleImputer
+from sklearn.tree import DecisionTreeClassifier
+from src.utils.main_utils.utils import save_object, save_mmap_object
+from src.utils.ml_utils.model.estimator import NetworkModel
+from src.serving import model_registry
+from src.serving.model_registry import ModelRegistry, publish_model_bundle, get_release_dir
+from src.constants import (
+    MODEL_SERVING_BUNDLE_FILE_NAME,
+    MODEL_SERVING_MODEL_FILE_NAME,
+    MODEL_SERVING_PREPROCESSOR_FILE_NAME,
+    MODEL_SERVING_CURRENT_FILE_NAME,
+    MODEL_SERVING_RELEASES_DIR
+)
+
+def write_bundle(bundle_dir: str, seed: int) -> NetworkModel:
+    rng=np.random.default_rng(seed)
+    x=pd.DataFrame(rng.choice([-1.0, 0.0, 1.0], size=(100, 3)), columns=["a", "b", "c"])
+    y=rng.integers(0, 2, size=100)
+    preprocessor=SimpleImputer().fit(x)
+    network_model=NetworkModel(preprocessor, DecisionTreeClassifier(random_state=seed).fit(preprocessor.transform(x), y),
+                               inference_backend="sklearn")
+    save_object(os.path.join(bundle_dir, MODEL_SERVING_PREPROCESSOR_FILE_NAME), network_model.preprocessor)
+    save_object(os.path.join(bundle_dir, MODEL_SERVING_MODEL_FILE_NAME), network_model.model)
+    save_mmap_object(os.path.join(bundle_dir, MODEL_SERVING_BUNDLE_FILE_NAME), network_model)
+    return network_model
+
+def test_flat_model_dir_is_served_without_releases(tmp_path):
+    write_bundle(str(tmp_path), seed=0)
+    registry=ModelRegistry(str(tmp_path), reload_interval=0)
+    assert registry.get().version
+    assert registry.release_dir==str(tmp_path)
+
+def test_publish_swaps_the_whole_bundle(tmp_path):
+    model_dir=str(tmp_path/"best_model")
+    write_bundle(str(tmp_path/"bundle_1"), seed=0)
+    publish_model_bundle(str(tmp_path/"bundle_1"), model_dir)
+    registry=ModelRegistry(model_dir, reload_interval=0)
+    first_model=registry.get()
+
+    write_bundle(str(tmp_path/"bundle_2"), seed=1)
+    release_dir=publish_model_bundle(str(tmp_path/"bundle_2"), model_dir)
+    assert get_release_dir(model_dir)==release_dir
+    second_model=registry.refresh()
+    assert second_model.version!=first_model.version
+    assert registry.release_dir==release_dir
+
+def test_unpublished_bundle_is_not_served(tmp_path):
+    model_dir=str(tmp_path/"best_model")
+    write_bundle(str(tmp_path/"bundle_1"), seed=0)
+    publish_model_bundle(str(tmp_path/"bundle_1"), model_dir)
+    registry=ModelRegistry(model_dir, reload_interval=0)
+    version=registry.get().version
+
+    # A staged bundle is invisible until it is published
+    write_bundle(str(tmp_path/"bundle_2"), seed=1)
+    assert registry.refresh().version==version
+
+def test_publish_keeps_release_history(tmp_path):
+    model_dir=str(tmp_path/"best_model")
+    write_bundle(str(tmp_path/"bundle"), seed=0)
+    for _ in range(4):
+        release_dir=publish_model_bundle(str(tmp_path/"bundle"), model_dir, release_history=1)
+    releases=sorted(os.listdir(os.path.dirname(release_dir)))
+    assert releases[-1]==os.path.basename(release_dir)
+    assert len(releases)==2
+    with open(os.path.join(model_dir, MODEL_SERVING_CURRENT_FILE_NAME)) as file_obj:
+        assert file_obj.read()==os.path.basename(release_dir)
+
+def test_watcher_hot_swaps_a_published_release(tmp_path):
+    model_dir=str(tmp_path/"best_model")
+    write_bundle(str(tmp_path/"bundle_1"), seed=0)
+    publish_model_bundle(str(tmp_path/"bundle_1"), model_dir)
+    registry=ModelRegistry(model_dir, reload_interval=0.05)
+    registry.start()
+    try:
+        # A request holding the first model keeps it through the swap
+        in_flight_model=registry.get()
+        second_network_model=write_bundle(str(tmp_path/"bundle_2"), seed=1)
+        publish_model_bundle(str(tmp_path/"bundle_2"), model_dir)
+        deadline=time.monotonic()+5
+        while registry.get().version==in_flight_model.version and time.monotonic()<deadline:
+            time.sleep(0.05)
+    finally:
+        registry.stop()
+
+    served_model=registry.get()
+    assert served_model.version!=in_flight_model.version
+    x=pd.DataFrame([[1.0, -1.0, 0.0], [0.0, 1.0, -1.0]], columns=["a", "b", "c"])
+    assert np.array_equal(served_model.network_model.predict(x), second_network_model.predict(x))
+    assert in_flight_model.network_model is not served_model.network_model
+
+def test_touched_but_unchanged_bundle_keeps_the_loaded_model(tmp_path):
+    write_bundle(str(tmp_path), seed=0)
+    registry=ModelRegistry(str(tmp_path), reload_interval=0)
+    served_model=registry.get()
+
+    bundle_file_path=os.path.join(str(tmp_path), MODEL_SERVING_BUNDLE_FILE_NAME)
+    stat=os.stat(bundle_file_path)
+    os.utime(bundle_file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns+10**9))
+    assert registry.refresh() is served_model
+
+def test_pruning_keeps_the_newest_releases_across_a_year_boundary(tmp_path, monkeypatch):
+    model_dir=str(tmp_path/"best_model")
+    write_bundle(str(tmp_path/"bundle"), seed=0)
+    publish_times=iter([datetime(2026, 12, 30, 23, 59), datetime(2026, 12, 31, 12, 0),
+                        datetime(2027, 1, 1, 0, 1), datetime(2027, 1, 2, 8, 30)])
+    monkeypatch.setattr(model_registry, "datetime", SimpleNamespace(now=lambda: next(publish_times)))
+    # Left behind by an interrupted publish, never a release
+    os.makedirs(os.path.join(model_dir, MODEL_SERVING_RELEASES_DIR, "20260101_000000_000000.tmp"))
+
+    release_dirs=[publish_model_bundle(str(tmp_path/"bundle"), model_dir, release_history=1) for _ in range(4)]
+    releases=sorted(name for name in os.listdir(os.path.join(model_dir, MODEL_SERVING_RELEASES_DIR)) if not name.endswith(".tmp"))
+    assert releases==[os.path.basename(release_dir) for release_dir in release_dirs[-2:]]
+    assert get_release_dir(model_dir)==release_dirs[-1]
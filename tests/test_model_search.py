@@ -0,0 +1,34 @@
+import numpy as np
+from sklearn.tree import DecisionTreeClassifier
+from src.utils.ml_utils.model import model_search
+from src.utils.ml_utils.model.model_search import evaluate_models
+
+def make_split(tmp_path):
+    rng=np.random.default_rng(0)
+    x=rng.integers(-1, 2, size=(120, 5)).astype(np.float64)
+    y=(x[:, 0]+x[:, 1]>0).astype(np.float64)
+    file_path=tmp_path/"train.npy"
+    np.save(file_path, np.column_stack([x, y]))
+    train_arr=np.load(file_path, mmap_mode="r")
+    return train_arr[:90, :-1], train_arr[:90, -1], x[90:], y[90:]
+
+def test_memory_mapped_training_matrix_is_not_copied(tmp_path, monkeypatch):
+    x_train, y_train, x_test, y_test=make_split(tmp_path)
+    dumped=[]
+    monkeypatch.setattr(model_search.joblib, "dump", lambda value, file_path: dumped.append(file_path))
+
+    models={"Decision Tree": DecisionTreeClassifier(random_state=0)}
+    report=evaluate_models(x_train, y_train, x_test, y_test, models, {"Decision Tree": {"max_depth": [1, 3]}}, n_jobs=2)
+
+    assert dumped==[]
+    assert report["Decision Tree"]["best_params"]=={"max_depth": 3}
+    assert len(report["Decision Tree"]["jobs"])==6
+
+def test_in_memory_training_matrix_matches_memory_mapped(tmp_path):
+    x_train, y_train, x_test, y_test=make_split(tmp_path)
+    params={"Decision Tree": {"max_depth": [1, 2, 3]}}
+    mapped=evaluate_models(x_train, y_train, x_test, y_test, {"Decision Tree": DecisionTreeClassifier(random_state=0)}, params)
+    in_memory=evaluate_models(np.array(x_train), np.array(y_train), x_test, y_test,
+                              {"Decision Tree": DecisionTreeClassifier(random_state=0)}, params)
+    assert [job["score"] for job in mapped["Decision Tree"]["jobs"]]==[job["score"] for job in in_memory["Decision Tree"]["jobs"]]
+    assert mapped["Decision Tree"]["test_score"]==in_memory["Decision Tree"]["test_score"]
@@ -0,0 +1,21 @@
+import pytest
+from src.config.mongo_db_connection import MongoDBConnection
+
+def test_real_urls_declare_the_server_api():
+    connection=MongoDBConnection("mongodb://localhost:27017", server_selection_timeout_ms=10)
+    client=connection.get_client()
+    assert client.options.pool_options.server_api.version=="1"
+    connection.close()
+
+def test_server_api_can_be_left_undeclared():
+    connection=MongoDBConnection("mongodb://localhost:27017", server_api_version=None)
+    assert connection.get_client().options.pool_options.server_api is None
+    connection.close()
+
+def test_mock_urls_get_an_in_process_client():
+    pytest.importorskip("mongomock")
+    connection=MongoDBConnection("mongomock://test")
+    collection=connection.get_collection("test", "rows")
+    collection.drop()
+    collection.insert_one({"a": 1})
+    assert connection.get_collection("test", "rows").count_documents({})==1
@@ -0,0 +1,51 @@
+import numpy as np
+from sklearn.metrics import r2_score
+from sklearn.linear_model import SGDClassifier
+from sklearn.tree import DecisionTreeClassifier
+from src.utils.ml_utils.model.out_of_core import (
+    iter_array_chunks,
+    predict_in_chunks,
+    r2_score_in_chunks,
+    evaluate_out_of_core_models
+)
+
+def make_memory_mapped_split(tmp_path, n_rows: int=250):
+    rng=np.random.default_rng(0)
+    x=rng.choice([-1, 0, 1], size=(n_rows, 4)).astype(np.int8)
+    y=(x[:, 0]+x[:, 1]>0).astype(np.int8)
+    np.save(tmp_path/"train.npy", np.column_stack([x, y]))
+    train_arr=np.load(tmp_path/"train.npy", mmap_mode="r")
+    return train_arr[:, :-1], train_arr[:, -1]
+
+def test_chunks_cover_every_row_once(tmp_path):
+    x, y=make_memory_mapped_split(tmp_path)
+    chunks=list(iter_array_chunks(x, y, chunk_size=60))
+    assert [len(x_chunk) for x_chunk, _ in chunks]==[60, 60, 60, 60, 10]
+    assert all(x_chunk.dtype==np.float64 and not isinstance(x_chunk, np.memmap) for x_chunk, _ in chunks)
+    assert np.array_equal(np.concatenate([x_chunk for x_chunk, _ in chunks]), x)
+    assert np.array_equal(np.concatenate([y_chunk for _, y_chunk in chunks]), y)
+
+def test_shuffled_chunks_keep_rows_and_labels_together(tmp_path):
+    x, y=make_memory_mapped_split(tmp_path)
+    chunks=list(iter_array_chunks(x, y, chunk_size=60, rng=np.random.default_rng(1)))
+    x_shuffled=np.concatenate([x_chunk for x_chunk, _ in chunks])
+    y_shuffled=np.concatenate([y_chunk for _, y_chunk in chunks])
+    assert not np.array_equal(x_shuffled, x)
+    rows=sorted(map(tuple, np.column_stack([x_shuffled, y_shuffled]).tolist()))
+    assert rows==sorted(map(tuple, np.column_stack([x, y]).astype(np.float64).tolist()))
+
+def test_chunked_scores_match_the_in_memory_ones(tmp_path):
+    x, y=make_memory_mapped_split(tmp_path)
+    model=DecisionTreeClassifier(max_depth=2, random_state=0).fit(np.asarray(x), np.asarray(y))
+    assert np.array_equal(predict_in_chunks(model, x, chunk_size=60), model.predict(np.asarray(x)))
+    assert np.isclose(r2_score_in_chunks(model, x, y, chunk_size=60), r2_score(y, model.predict(np.asarray(x))))
+
+def test_out_of_core_models_are_trained_and_reported(tmp_path):
+    x, y=make_memory_mapped_split(tmp_path)
+    models={"SGD Logistic Regression": SGDClassifier(loss="log_loss", random_state=42)}
+    report=evaluate_out_of_core_models(x[:200], y[:200], x[200:], y[200:], models, chunk_size=50, epochs=3)
+    entry=report["SGD Logistic Regression"]
+    assert entry["training_mode"]=="out_of_core"
+    assert (entry["chunk_size"], entry["epochs"])==(50, 3)
+    assert entry["test_score"]==r2_score_in_chunks(models["SGD Logistic Regression"], x[200:], y[200:], 50)
+    assert hasattr(models["SGD Logistic Regression"], "coef_")
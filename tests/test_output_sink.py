@@ -0,0 +1,28 @@
+import os
+import asyncio
+import pandas as pd
+from src.serving.output_sink import PredictionOutputSink
+
+async def write_predictions(sink: PredictionOutputSink, n_files: int) -> list:
+    sink.start()
+    try:
+        return [await sink.submit(pd.DataFrame({"predicted_column": [i]}), f"20260101_00000{i}_{i:08x}")
+                for i in range(n_files)]
+    finally:
+        sink.stop()
+
+def test_only_the_newest_prediction_files_are_kept(tmp_path):
+    (tmp_path/"output.csv").write_text("kept\n")
+    sink=PredictionOutputSink(str(tmp_path), max_files=3)
+    file_paths=asyncio.run(write_predictions(sink, 6))
+
+    assert sorted(path.name for path in tmp_path.iterdir())==sorted(
+        [os.path.basename(file_path) for file_path in file_paths[-3:]]+["output.csv"])
+    assert sink.stats()["written"]==6
+    assert sink.stats()["pruned"]==3
+
+def test_retention_can_be_disabled(tmp_path):
+    sink=PredictionOutputSink(str(tmp_path), max_files=None)
+    asyncio.run(write_predictions(sink, 4))
+    assert len(list(tmp_path.iterdir()))==4
+    assert sink.stats()["pruned"]==0
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+from sklearn.impute import SimpleImputer
+from sklearn.tree import DecisionTreeClassifier
+from src.serving.prediction_cache import PredictionCache
+from src.utils.ml_utils.model.estimator import NetworkModel
+
+COLUMNS=["a", "b", "c"]
+
+def make_model() -> NetworkModel:
+    rng=np.random.default_rng(0)
+    x=pd.DataFrame(rng.choice([-1.0, 0.0, 1.0], size=(200, 3)), columns=COLUMNS)
+    y=(x["a"]+x["b"]>0).astype(np.int8).to_numpy()
+    preprocessor=SimpleImputer().fit(x)
+    model=DecisionTreeClassifier(random_state=0).fit(preprocessor.transform(x), y)
+    return NetworkModel(preprocessor=preprocessor, model=model, inference_backend="sklearn")
+
+def make_rows(n_rows: int, seed: int) -> pd.DataFrame:
+    rng=np.random.default_rng(seed)
+    return pd.DataFrame(rng.choice([-1.0, 0.0, 1.0], size=(n_rows, 3)), columns=COLUMNS)
+
+def test_cached_and_uncached_predictions_are_identical():
+    network_model=make_model()
+    cache=PredictionCache(max_size=100, ttl=60)
+    x=make_rows(50, seed=1)
+    uncached=network_model.predict(x)
+
+    cold=cache.predict(network_model, "v1", x)
+    warm=cache.predict(network_model, "v1", x)
+
+    assert cache.hits>0
+    for y_pred in (cold, warm):
+        assert y_pred.dtype==uncached.dtype
+        np.testing.assert_array_equal(y_pred, uncached)
+    assert warm.tolist()==uncached.tolist()
+
+def test_uncacheable_rows_are_scored_without_the_cache():
+    network_model=make_model()
+    cache=PredictionCache(max_size=100, ttl=60)
+    x=make_rows(10, seed=2)
+    x.loc[3, "a"]=0.5
+    np.testing.assert_array_equal(cache.predict(network_model, "v1", x), network_model.predict(x))
+    assert cache.uncacheable==1
+
+def test_lru_evicts_the_least_recently_used_key():
+    cache=PredictionCache(max_size=2, ttl=60)
+    cache.store(np.array([1, 2], dtype=np.uint64), np.array([0, 1], dtype=np.int8), "v1")
+    cache.lookup(np.array([1], dtype=np.uint64), "v1")
+    cache.store(np.array([3], dtype=np.uint64), np.array([1], dtype=np.int8), "v1")
+
+    predictions, found=cache.lookup(np.array([1, 2, 3], dtype=np.uint64), "v1")
+    assert found.tolist()==[True, False, True]
+    assert predictions.dtype==np.int8
+    assert cache.evictions==1
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now=[1000.0]
+    monkeypatch.setattr("src.serving.prediction_cache.time.monotonic", lambda: now[0])
+    cache=PredictionCache(max_size=10, ttl=5)
+    cache.store(np.array([7], dtype=np.uint64), np.array([1], dtype=np.int8), "v1")
+    now[0]+=4
+    assert cache.lookup(np.array([7], dtype=np.uint64), "v1")[1].all()
+    now[0]+=2
+    assert not cache.lookup(np.array([7], dtype=np.uint64), "v1")[1].any()
+
+def test_new_model_version_drops_the_cache():
+    cache=PredictionCache(max_size=10, ttl=60)
+    cache.store(np.array([7], dtype=np.uint64), np.array([1], dtype=np.int8), "v1")
+    assert not cache.lookup(np.array([7], dtype=np.uint64), "v2")[1].any()
+    assert cache.invalidations==1
@@ -0,0 +1,60 @@
+import pytest
+from src import constants
+from src.entity.artifact_entity import DataIngestionArtifact
+from src.pipeline.training_pipeline import TrainingPipeline
+from src.pipeline.stage_cache import StageCache, compute_cache_key
+from src.config.mongo_db_connection import MongoDBConnection, set_mongo_connection, get_mongo_connection
+
+def test_cache_key_does_not_depend_on_dict_order():
+    assert compute_cache_key("stage", {"a": 1, "b": 2})==compute_cache_key("stage", {"b": 2, "a": 1})
+    assert compute_cache_key("stage", {"a": 1})!=compute_cache_key("stage", {"a": 2})
+
+def test_entry_is_ignored_once_its_files_are_gone(tmp_path):
+    train_file_path=tmp_path/"train.npy"
+    train_file_path.write_bytes(b"")
+    artifact=DataIngestionArtifact(trained_file_path=str(train_file_path), test_file_path=str(train_file_path))
+    stage_cache=StageCache(str(tmp_path/"stage_cache"))
+    stage_cache.put("data_ingestion", "key", artifact, duration=1.5)
+    assert stage_cache.get("data_ingestion", "key")["duration"]==1.5
+    assert stage_cache.get("data_ingestion", "other_key") is None
+    train_file_path.unlink()
+    assert stage_cache.get("data_ingestion", "key") is None
+
+@pytest.fixture
+def collection():
+    pytest.importorskip("mongomock")
+    set_mongo_connection(MongoDBConnection("mongomock://test"))
+    collection=get_mongo_connection().get_collection(constants.DATA_INGESTION_DATABASE_NAME,
+                                                     constants.DATA_INGESTION_COLLECTION_NAME)
+    collection.drop()
+    collection.insert_many([{"row_hash": f"{i:016x}", "row_occurrence": 0} for i in range(10)])
+    return collection
+
+def test_replaced_document_changes_every_key(collection):
+    cache_keys=TrainingPipeline().get_stage_cache_keys()
+    assert TrainingPipeline().get_stage_cache_keys()==cache_keys
+
+    collection.delete_one({"row_hash": f"{3:016x}"})
+    collection.insert_one({"row_hash": f"{30:016x}", "row_occurrence": 0})
+    changed_keys=TrainingPipeline().get_stage_cache_keys()
+    assert all(changed_keys[stage_name]!=cache_keys[stage_name] for stage_name in cache_keys)
+
+@pytest.mark.parametrize("constant_name, value, first_changed_stage", [
+    ("DATA_INGESTION_BATCH_SIZE", 17, "data_ingestion"),
+    ("DATA_INGESTION_INCREMENTAL", False, "data_ingestion"),
+    ("DATA_VALIDATION_DRIFT_THRESHOLD", 0.01, "data_validation"),
+    ("DATA_VALIDATION_PSI_THRESHOLD", 0.5, "data_validation"),
+    ("DATA_VALIDATION_FEATURE_VALUES", [-1, 1], "data_validation"),
+    ("DATA_TRANSFORMATION_CHUNK_SIZE", 10, "data_transformation"),
+    ("MODEL_TRAINER_N_JOBS", 1, "model_trainer"),
+])
+def test_setting_changes_the_key_of_its_stage_and_later_ones(collection, monkeypatch, constant_name, value, first_changed_stage):
+    cache_keys=TrainingPipeline().get_stage_cache_keys()
+    monkeypatch.setattr(constants, constant_name, value)
+    changed_keys=TrainingPipeline().get_stage_cache_keys()
+    stage_names=list(cache_keys)
+    first_changed=stage_names.index(first_changed_stage)
+    for stage_name in stage_names[:first_changed]:
+        assert changed_keys[stage_name]==cache_keys[stage_name]
+    for stage_name in stage_names[first_changed:]:
+        assert changed_keys[stage_name]!=cache_keys[stage_name]
@@ -0,0 +1,51 @@
+import io
+import numpy as np
+import pandas as pd
+from src.utils.main_utils.ternary_codec import (
+    is_ternary,
+    compact_array,
+    pack_ternary,
+    unpack_ternary,
+    save_packed_dataframe,
+    load_packed_dataframe
+)
+
+def test_pack_round_trip_across_words():
+    rng=np.random.default_rng(0)
+    matrix=rng.choice([-1.0, 0.0, 1.0, np.nan], size=(200, 70))
+    packed, valid=pack_ternary(matrix)
+    assert packed.shape==(200, 3)
+    assert valid.all()
+    np.testing.assert_array_equal(unpack_ternary(packed, 70, dtype=np.float64), matrix)
+
+def test_rows_with_other_values_are_not_valid():
+    matrix=np.array([[1.0, 0.0], [0.5, 1.0], [-1.0, 2.0]])
+    _, valid=pack_ternary(matrix)
+    assert valid.tolist()==[True, False, False]
+
+def test_equal_rows_pack_to_equal_words():
+    packed, _=pack_ternary(np.array([[1, -1, 0], [1, -1, 0], [1, 0, -1]]))
+    assert packed[0, 0]==packed[1, 0]!=packed[2, 0]
+
+def test_compact_array_only_narrows_whole_int8_values():
+    assert compact_array(np.array([-1.0, 0.0, 1.0])).dtype==np.int8
+    assert compact_array(np.array([0.5, 1.0])).dtype==np.float64
+    assert compact_array(np.array([1.0, np.nan])).dtype==np.float64
+    assert compact_array(np.array([1000])).dtype==np.int64
+    assert is_ternary(np.array([1.0, np.nan]), allow_missing=True)
+    assert not is_ternary(np.array([1.0, np.nan]))
+
+def test_packed_dataframe_round_trip():
+    dataframe=pd.DataFrame({
+        "a": np.array([-1, 0, 1, 1], dtype=np.int8),
+        "b": [1.0, np.nan, -1.0, 0.0],
+        "name": ["w", "x", "y", "z"],
+        "c": [0.25, 1.0, 2.0, 3.0]
+    })
+    file_obj=io.BytesIO()
+    save_packed_dataframe(file_obj, dataframe)
+    file_obj.seek(0)
+    loaded=load_packed_dataframe(file_obj)
+    assert list(loaded.columns)==list(dataframe.columns)
+    assert loaded["a"].dtype==np.int8
+    pd.testing.assert_frame_equal(loaded.astype({"b": np.float64}), dataframe)
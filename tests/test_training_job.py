@@ -0,0 +1,67 @@
+import time
+import threading
+from datetime import datetime
+from src.pipeline.training_job import TrainingJobManager
+
+def wait_for(manager, job_ids, timeout=10.0):
+    deadline=time.monotonic()+timeout
+    while time.monotonic()<deadline:
+        if all(manager.get(job_id).status=="succeeded" for job_id in job_ids):
+            return
+        time.sleep(0.02)
+    raise AssertionError("training jobs did not finish")
+
+def make_fake_run(manager, running, lock):
+    def fake_run(job):
+        job.status, job.started_at="running", datetime.now()
+        manager._save(job)
+        with lock:
+            running["now"]+=1
+            running["max"]=max(running["max"], running["now"])
+        time.sleep(0.1)
+        with lock:
+            running["now"]-=1
+        job.status, job.finished_at="succeeded", datetime.now()
+        manager._save(job)
+    return fake_run
+
+def test_jobs_of_two_workers_never_train_together(tmp_path):
+    running, lock={"now": 0, "max": 0}, threading.Lock()
+    managers=[TrainingJobManager(store_dir=str(tmp_path)) for _ in range(2)]
+    for manager in managers:
+        manager._run=make_fake_run(manager, running, lock)
+    try:
+        job_ids=[managers[i%2].submit().job_id for i in range(4)]
+        wait_for(managers[0], job_ids)
+    finally:
+        for manager in managers:
+            manager.stop()
+    assert running["max"]==1
+
+def test_any_worker_answers_for_a_job(tmp_path):
+    submitting_manager=TrainingJobManager(store_dir=str(tmp_path))
+    other_manager=TrainingJobManager(store_dir=str(tmp_path))
+    submitting_manager._run=make_fake_run(submitting_manager, {"now": 0, "max": 0}, threading.Lock())
+    try:
+        job=submitting_manager.submit(force=True)
+        wait_for(other_manager, [job.job_id])
+    finally:
+        submitting_manager.stop()
+
+    shared_job=other_manager.get(job.job_id)
+    assert shared_job.force is True
+    assert shared_job.submitted_at==job.submitted_at
+    assert [listed.job_id for listed in other_manager.list_jobs()]==[job.job_id]
+    assert other_manager.get("unknown") is None
+
+def test_history_prunes_finished_job_files(tmp_path):
+    manager=TrainingJobManager(history_size=2, store_dir=str(tmp_path))
+    manager._run=make_fake_run(manager, {"now": 0, "max": 0}, threading.Lock())
+    try:
+        job_ids=[]
+        for _ in range(4):
+            job_ids.append(manager.submit().job_id)
+            wait_for(manager, job_ids[-1:])
+    finally:
+        manager.stop()
+    assert sorted(path.stem for path in tmp_path.glob("*.json"))==sorted(job_ids[-2:])
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.impute import SimpleImputer
+from sklearn.tree import DecisionTreeClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, AdaBoostClassifier
+from src.utils.ml_utils.model.estimator import NetworkModel
+from src.utils.ml_utils.model.tree_compiler import compile_tree_ensemble
+
+def make_data(n_classes: int=2):
+    rng=np.random.default_rng(0)
+    # Ternary features like the phishing data plus continuous ones to exercise the float32 thresholds
+    x=np.column_stack([rng.choice([-1.0, 0.0, 1.0], size=(600, 4)), rng.normal(size=(600, 3))])
+    y=(x[:, 0]+x[:, 4]+rng.normal(scale=0.5, size=600)>0).astype(int)
+    if n_classes==3:
+        y+=(x[:, 5]>0.5).astype(int)
+    return x, np.where(y==0, -1, y)
+
+MODELS=[
+    DecisionTreeClassifier(random_state=0),
+    RandomForestClassifier(n_estimators=16, random_state=0),
+    GradientBoostingClassifier(n_estimators=16, random_state=0),
+    AdaBoostClassifier(n_estimators=16, random_state=0),
+]
+
+@pytest.mark.parametrize("n_classes", [2, 3])
+@pytest.mark.parametrize("model", MODELS, ids=lambda model: type(model).__name__)
+def test_compiled_predictions_match_sklearn(model, n_classes):
+    x, y=make_data(n_classes)
+    model.fit(x[:400], y[:400])
+    compiled_model=compile_tree_ensemble(model)
+    assert compiled_model is not None
+    assert np.array_equal(compiled_model.predict(x[400:]), model.predict(x[400:]))
+    assert compiled_model.predict(x[400:]).dtype==model.predict(x[400:]).dtype
+
+def test_compiled_predictions_match_sklearn_on_missing_values():
+    x, y=make_data()
+    x_missing=x.copy()
+    x_missing[np.random.default_rng(1).random(x.shape)<0.1]=np.nan
+    model=RandomForestClassifier(n_estimators=8, random_state=0).fit(x_missing[:400], y[:400])
+    assert np.array_equal(compile_tree_ensemble(model).predict(x_missing[400:]), model.predict(x_missing[400:]))
+
+def test_small_blocks_match_one_block():
+    x, y=make_data()
+    model=RandomForestClassifier(n_estimators=8, random_state=0).fit(x[:400], y[:400])
+    compiled_model=compile_tree_ensemble(model)
+    y_pred=compiled_model.predict(x[400:])
+    compiled_model.block_size=compiled_model.n_trees*7
+    assert np.array_equal(compiled_model.predict(x[400:]), y_pred)
+
+def test_other_models_are_not_compiled():
+    x, y=make_data()
+    assert compile_tree_ensemble(LogisticRegression().fit(x, y)) is None
+
+def test_compiled_backend_is_opt_in():
+    x, y=make_data()
+    x=pd.DataFrame(x, columns=[f"f{j}" for j in range(x.shape[1])])
+    preprocessor=SimpleImputer().fit(x)
+    model=RandomForestClassifier(n_estimators=8, random_state=0).fit(preprocessor.transform(x), y)
+    assert NetworkModel(preprocessor, model).compiled_model is None
+    compiled_network_model=NetworkModel(preprocessor, model, inference_backend="compiled")
+    assert compiled_network_model.compiled_model is not None
+    assert np.array_equal(compiled_network_model.predict(x.iloc[:100]), model.predict(preprocessor.transform(x.iloc[:100])))
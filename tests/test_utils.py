@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.constants import SCHEMA_FILE_PATH, TARGET_COLUMN
+from src.utils.main_utils.utils import (
+    save_dataframe,
+    load_dataframe,
+    append_dataframe,
+    iter_dataframe_chunks,
+    save_numpy_array_chunks,
+    get_schema_dtype_plan,
+    _apply_dtype_plan
+)
+
+FORMATS=["csv", "npy", "parquet", "packed"]
+
+def make_dataframe(seed: int, n_rows: int) -> pd.DataFrame:
+    rng=np.random.default_rng(seed)
+    return pd.DataFrame({"a": rng.choice([-1, 0, 1], size=n_rows), "b": rng.choice([-1, 1], size=n_rows)})
+
+@pytest.mark.parametrize("file_format", FORMATS)
+def test_append_puts_the_new_rows_at_the_end(tmp_path, file_format):
+    if file_format=="parquet":
+        pytest.importorskip("pyarrow")
+    file_path=str(tmp_path/f"data.{file_format}")
+    first, second=make_dataframe(0, 250), make_dataframe(1, 40)
+    second.loc[3, "b"]=np.nan
+    dtype_plan={"a": "int8", "b": "int8"}
+    save_dataframe(file_path, first, dtype_plan)
+    append_dataframe(file_path, second, dtype_plan, chunk_size=100)
+    loaded=load_dataframe(file_path)
+    expected=pd.concat([first, second], ignore_index=True)
+    np.testing.assert_array_equal(loaded.to_numpy(dtype=np.float64), expected.to_numpy(dtype=np.float64))
+    if file_format=="npy":
+        assert loaded["a"].dtype==np.int8
+        assert loaded["b"].dtype==np.float32
+
+def test_schema_integer_columns_are_stored_as_int8():
+    dtype_plan=get_schema_dtype_plan(SCHEMA_FILE_PATH)
+    assert dtype_plan[TARGET_COLUMN]=="int8"
+    assert set(dtype_plan.values())=={"int8"}
+
+def test_dtype_plan_falls_back_when_values_do_not_fit():
+    dataframe=pd.DataFrame({
+        "ternary": [-1, 0, 1],
+        "missing": [1.0, np.nan, -1.0],
+        "too_large": [1, 300, -1],
+        "fractional": [0.5, 1.0, -1.0],
+        "unplanned": [1, 2, 3],
+        "text": ["x", "y", "z"]
+    })
+    dtypes=_apply_dtype_plan(dataframe, {column: "int8" for column in dataframe.columns if column!="unplanned"})
+    assert dtypes["ternary"]==np.int8
+    assert dtypes["missing"]==np.float32
+    assert dtypes["too_large"]==dataframe["too_large"].dtype
+    assert dtypes["fractional"]==dataframe["fractional"].dtype
+    assert dtypes["unplanned"]==dataframe["unplanned"].dtype
+    assert dtypes["text"]==dataframe["text"].dtype
+
+@pytest.mark.parametrize("file_format", FORMATS)
+def test_artifact_formats_round_trip(tmp_path, file_format):
+    if file_format=="parquet":
+        pytest.importorskip("pyarrow")
+    file_path=str(tmp_path/f"data.{file_format}")
+    dataframe=make_dataframe(2, 230)
+    dataframe.loc[7, "a"]=np.nan
+    save_dataframe(file_path, dataframe, {"a": "int8", "b": "int8"})
+
+    loaded=load_dataframe(file_path)
+    assert list(loaded.columns)==["a", "b"]
+    np.testing.assert_array_equal(loaded.to_numpy(dtype=np.float64), dataframe.to_numpy(dtype=np.float64))
+    chunks=list(iter_dataframe_chunks(file_path, chunk_size=100))
+    assert [len(chunk) for chunk in chunks]==[100, 100, 30]
+    np.testing.assert_array_equal(pd.concat(chunks, ignore_index=True).to_numpy(dtype=np.float64),
+                                  dataframe.to_numpy(dtype=np.float64))
+    if file_format=="npy":
+        assert load_dataframe(file_path, mmap=True)["b"].dtype==np.int8
+
+def test_numpy_chunks_upgrade_to_float64_around_empty_chunks(tmp_path):
+    file_path=str(tmp_path/"train.npy")
+    chunks=[np.array([[1.0, -1.0], [0.0, 1.0]]), np.empty((0, 2)), np.array([[0.5, 1.0]]), np.empty((0, 2))]
+    save_numpy_array_chunks(file_path, iter(chunks), n_rows=3)
+    loaded=np.load(file_path)
+    assert loaded.dtype==np.float64
+    np.testing.assert_array_equal(loaded, np.concatenate(chunks))